@@ -1,8 +1,13 @@
-from statsmodels.tsa.stattools import adfuller
+from app.analytics.stationarity import adf
 
-def adf_test(series):
-    result = adfuller(series.dropna())
+def adf_test(series, cache_key=None):
+    """
+    ADF with AIC lag selection; pass `cache_key` (e.g. the pair) to reuse
+    the selected lag across calls instead of re-searching every time.
+    """
+    result = adf(series, cache_key=cache_key)
     return {
-        "adf_stat": result[0],
-        "p_value": result[1]
+        "adf_stat": result["adf_stat"],
+        "p_value": result["p_value"],
+        "lag": result["lag"]
     }
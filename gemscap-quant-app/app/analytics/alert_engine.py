@@ -0,0 +1,387 @@
+import itertools
+import json
+import logging
+import threading
+import time
+import urllib.request
+from collections import deque
+
+from app.analytics.signal_quality import (
+    hedge_ratio_dispersion, liquidity_ratio, CORR_MIN, HEDGE_STABILITY_RATIO
+)
+from app.analytics.pair_state import HEDGE_MODES
+from app.metrics import REGISTRY, timed
+
+logger = logging.getLogger("alert_engine")
+
+ALERT_EVENTS = REGISTRY.counter("gq_alert_events_total", "Alert notifications", ("kind", "state"))
+
+
+# -------------------------------
+# Metrics
+# -------------------------------
+def _zscore(snap, rule):
+    z = snap.zscore(rule.window, rule.hedge_mode)
+    return abs(float(z.iloc[-1])) if len(z) else None
+
+
+def _correlation(snap, rule):
+    # latest value of the pair's O(1) rolling engine, same as latest_correlation
+    return snap.rolling(rule.window).corr()
+
+
+def _hedge_instability(snap, rule):
+    dispersion = hedge_ratio_dispersion(snap.hedge_series(rule.window, rule.hedge_mode))
+    if dispersion is None:
+        return None
+    recent, full = dispersion
+    return float(recent / full) if full > 0 else None
+
+
+def _liquidity(snap, rule):
+    return liquidity_ratio(snap.volume, rule.window)
+
+
+# kind -> (metric, direction, default threshold, default clear level, default hedge mode)
+# "above": fires when value >= threshold, clears once value < clear
+# "below": fires when value <= threshold, clears once value > clear
+# zscore, correlation and hedge_instability levels mirror check_zscore_alert
+# and the signal_quality / trade_guard checks. Liquidity is stricter than
+# signal_quality's liquidity_ok (ratio > 1, i.e. any below-average bar):
+# it fires when a bar trades at half the average volume or less.
+RULE_KINDS = {
+    "zscore": (_zscore, "above", 2.0, 1.5, "ols"),
+    "correlation": (_correlation, "below", CORR_MIN, CORR_MIN + 0.05, "ols"),
+    "hedge_instability": (_hedge_instability, "above", HEDGE_STABILITY_RATIO, HEDGE_STABILITY_RATIO * 0.8, "rolling"),
+    "liquidity": (_liquidity, "below", 0.5, 0.8, "ols"),
+}
+
+
+class AlertRule:
+    """
+    One subscription: a metric on a pair with a trigger level, a clear
+    level (hysteresis) and a cooldown between notifications.
+    """
+
+    def __init__(self, rule_id: int, kind: str, symbol_y: str, symbol_x: str,
+                 threshold: float | None = None, clear: float | None = None,
+                 window: int = 50, hedge_mode: str | None = None, cooldown_sec: float = 60.0):
+        if kind not in RULE_KINDS:
+            raise ValueError(f"kind must be one of {list(RULE_KINDS)}")
+        if hedge_mode is not None and hedge_mode not in HEDGE_MODES:
+            raise ValueError(f"hedge_mode must be one of {list(HEDGE_MODES)}")
+        if window < 2:
+            raise ValueError("window must be at least 2")
+
+        _, direction, default_threshold, default_clear, default_mode = RULE_KINDS[kind]
+        self.id = rule_id
+        self.kind = kind
+        self.symbol_y = symbol_y
+        self.symbol_x = symbol_x
+        self.threshold = default_threshold if threshold is None else threshold
+        self.clear = default_clear if clear is None else clear
+        self.window = window
+        self.hedge_mode = hedge_mode or default_mode
+        self.cooldown_sec = cooldown_sec
+        self.direction = direction
+
+        if (direction == "above" and self.clear > self.threshold) or \
+                (direction == "below" and self.clear < self.threshold):
+            raise ValueError("clear level must sit on the safe side of threshold")
+
+        self.active = False
+        self.notified = False
+        self.value = None
+        self.last_fired_ns = None
+
+    @property
+    def pair(self):
+        return (self.symbol_y, self.symbol_x)
+
+    @property
+    def metric_key(self):
+        return (self.kind, self.window, self.hedge_mode)
+
+    def step(self, value: float, ts: int):
+        """
+        Advances the hysteresis state; returns "triggered", "resolved" or None.
+        A breach inside the cooldown (bar time since the last notification)
+        is tracked but silent, and so is its resolution.
+        """
+        self.value = value
+        above = self.direction == "above"
+
+        if not self.active:
+            if (value >= self.threshold) if above else (value <= self.threshold):
+                self.active = True
+                self.notified = self.last_fired_ns is None or \
+                    ts - self.last_fired_ns >= self.cooldown_sec * 1e9
+                if self.notified:
+                    self.last_fired_ns = ts
+                    return "triggered"
+            return None
+
+        if (value < self.clear) if above else (value > self.clear):
+            self.active = False
+            if self.notified:
+                self.notified = False
+                return "resolved"
+        return None
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id, "kind": self.kind,
+            "symbol_y": self.symbol_y, "symbol_x": self.symbol_x,
+            "threshold": self.threshold, "clear": self.clear,
+            "window": self.window, "hedge_mode": self.hedge_mode,
+            "cooldown_sec": self.cooldown_sec,
+            "active": self.active, "value": self.value,
+        }
+
+
+# -------------------------------
+# Sinks
+# -------------------------------
+class LogSink:
+    def send(self, event: dict):
+        logger.warning(f"ALERT {event['state']}: {event['kind']} {event['symbol_y']}/{event['symbol_x']} "
+                       f"value={event['value']:.4f} threshold={event['threshold']}")
+
+
+class QueueSink:
+    """
+    Keeps the newest `maxlen` events in memory for the API to read.
+    """
+
+    def __init__(self, maxlen: int = 1000):
+        self._events = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def send(self, event: dict):
+        with self._lock:
+            self._events.append(event)
+
+    def recent(self, n: int = 100) -> list:
+        with self._lock:
+            return list(self._events)[-n:]
+
+
+class WebhookSink:
+    """
+    POSTs each event as JSON to `url` from a background thread, so a slow
+    endpoint never delays rule evaluation. Events beyond `max_pending`
+    are dropped and counted.
+    """
+
+    def __init__(self, url: str, timeout: float = 2.0, max_pending: int = 1000):
+        self.url = url
+        self.timeout = timeout
+        self._pending = deque(maxlen=max_pending)
+        self._wake = threading.Event()
+        self.sent = self.failed = self.dropped = 0
+        threading.Thread(target=self._run, name="alert-webhook", daemon=True).start()
+
+    def send(self, event: dict):
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(event)
+        self._wake.set()
+
+    def _post(self, event: dict):
+        req = urllib.request.Request(
+            self.url, data=json.dumps(event).encode(),
+            headers={"Content-Type": "application/json"}, method="POST"
+        )
+        with urllib.request.urlopen(req, timeout=self.timeout):
+            pass
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            while self._pending:
+                event = self._pending.popleft()
+                try:
+                    self._post(event)
+                    self.sent += 1
+                except Exception:
+                    self.failed += 1
+                    logger.warning(f"Webhook delivery to {self.url} failed", exc_info=True)
+
+
+# -------------------------------
+# Engine
+# -------------------------------
+class AlertEngine:
+    """
+    Evaluates registered rules whenever a bar closes.
+
+    Rules are indexed symbol -> pairs -> rules, so a bar only touches the
+    pairs that contain its symbol. Within a pair every metric is computed
+    once per (kind, window, hedge_mode) and shared by all rules using it,
+    and a pair is evaluated once per new aligned bar however many legs
+    report it. Evaluation runs on its own thread; `on_bar` only marks the
+    symbol dirty, so ingestion never waits on analytics.
+    """
+
+    def __init__(self, pair_states, sinks: list, interval: str = "1s"):
+        self.pair_states = pair_states
+        self.sinks = list(sinks)
+        self.interval = interval
+        self._rules = {}
+        self._by_pair = {}
+        self._pairs_by_symbol = {}
+        self._last_eval = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        self._dirty = set()
+        self._dirty_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.evaluations = 0
+        self.notifications = 0
+        self.last_eval_ms = 0.0
+
+    # ------------------------------
+    # Rule registry
+    # ------------------------------
+    def add_rule(self, kind: str, symbol_y: str, symbol_x: str, **params) -> AlertRule:
+        rule = AlertRule(next(self._ids), kind, symbol_y, symbol_x, **params)
+        with self._lock:
+            self._rules[rule.id] = rule
+            self._by_pair.setdefault(rule.pair, {})[rule.id] = rule
+            for symbol in rule.pair:
+                self._pairs_by_symbol.setdefault(symbol, set()).add(rule.pair)
+        return rule
+
+    def remove_rule(self, rule_id: int) -> bool:
+        with self._lock:
+            rule = self._rules.pop(rule_id, None)
+            if rule is None:
+                return False
+            rules = self._by_pair[rule.pair]
+            del rules[rule_id]
+            if not rules:
+                del self._by_pair[rule.pair]
+                self._last_eval.pop(rule.pair, None)
+                for symbol in rule.pair:
+                    pairs = self._pairs_by_symbol[symbol]
+                    pairs.discard(rule.pair)
+                    if not pairs:
+                        del self._pairs_by_symbol[symbol]
+            return True
+
+    def rules(self) -> list:
+        with self._lock:
+            return [r.to_dict() for r in self._rules.values()]
+
+    # ------------------------------
+    # Evaluation
+    # ------------------------------
+    def on_bar(self, symbol: str, interval: str, seq: int):
+        if interval != self.interval or symbol not in self._pairs_by_symbol:
+            return
+        with self._dirty_lock:
+            self._dirty.add(symbol)
+        self._wake.set()
+
+    @timed("alerts")
+    def evaluate_pair(self, pair) -> list:
+        """
+        Runs every rule on `pair` against the latest snapshot, once per
+        new aligned bar. Returns the events sent to the sinks.
+        """
+        with self._lock:
+            rules = list(self._by_pair.get(pair, {}).values())
+        if not rules:
+            return []
+
+        snap = self.pair_states.snapshot(*pair)
+        if len(snap) == 0:
+            return []
+        ts = int(snap.y.index[-1].value)
+        if self._last_eval.get(pair) == ts:
+            return []
+        self._last_eval[pair] = ts
+
+        metrics = {}
+        events = []
+        for rule in rules:
+            key = rule.metric_key
+            if key not in metrics:
+                try:
+                    metrics[key] = RULE_KINDS[rule.kind][0](snap, rule)
+                except Exception:
+                    logger.exception(f"Metric {key} failed for {pair}")
+                    metrics[key] = None
+            value = metrics[key]
+            if value is None:
+                continue
+
+            state = rule.step(value, ts)
+            if state is not None:
+                events.append({
+                    "rule_id": rule.id, "state": state, "kind": rule.kind,
+                    "symbol_y": rule.symbol_y, "symbol_x": rule.symbol_x,
+                    "value": value, "threshold": rule.threshold, "ts": ts // 1_000_000,
+                })
+
+        for event in events:
+            ALERT_EVENTS.labels(event["kind"], event["state"]).inc()
+            for sink in self.sinks:
+                try:
+                    sink.send(event)
+                except Exception:
+                    logger.exception(f"Alert sink {type(sink).__name__} failed")
+
+        self.evaluations += 1
+        self.notifications += len(events)
+        return events
+
+    def run_once(self):
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        start = time.perf_counter()
+        with self._lock:
+            pairs = set().union(*(self._pairs_by_symbol.get(s, ()) for s in dirty)) if dirty else set()
+        for pair in pairs:
+            try:
+                self.evaluate_pair(pair)
+            except Exception:
+                logger.exception(f"Alert evaluation failed for {pair}")
+        if pairs:
+            self.last_eval_ms = (time.perf_counter() - start) * 1e3
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(1.0)
+            self._wake.clear()
+            self.run_once()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="alert-engine", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "rules": len(self._rules),
+                "pairs": len(self._by_pair),
+                "active": sum(r.active for r in self._rules.values()),
+                "evaluations": self.evaluations,
+                "notifications": self.notifications,
+                "last_eval_ms": round(self.last_eval_ms, 3),
+            }
@@ -1,39 +1,154 @@
+import numpy as np
 import pandas as pd
 
-def simulate_pairs_trade(df: pd.DataFrame):
-    position = 0
-    entry_price = 0
-    pnl = []
-    trades = []
-
-    for i in range(1, len(df)):
-        z = df.iloc[i]["zscore"]
-        spread = df.iloc[i]["spread"]
-
-        # Entry
-        if position == 0:
-            if z > 2:
-                position = -1
-                entry_price = spread
-                trades.append("SHORT")
-            elif z < -2:
-                position = 1
-                entry_price = spread
-                trades.append("LONG")
-
-        # Exit
-        elif position == 1 and z >= 0:
-            pnl.append(spread - entry_price)
-            position = 0
-
-        elif position == -1 and z <= 0:
-            pnl.append(entry_price - spread)
-            position = 0
-
-    total_pnl = sum(pnl)
-
-    return {
-        "total_pnl": round(total_pnl, 4),
-        "num_trades": len(pnl),
-        "win_rate": round(sum(p > 0 for p in pnl) / len(pnl), 2) if pnl else 0
+from app.metrics import timed
+
+
+def _next_true(mask: np.ndarray) -> np.ndarray:
+    """
+    nxt[i] = smallest k >= i with mask[k], or len(mask) if there is none.
+    """
+    n = len(mask)
+    idx = np.where(mask, np.arange(n), n)
+    return np.minimum.accumulate(idx[::-1])[::-1]
+
+
+def find_trades(z: np.ndarray, entry_z: float = 2.0, exit_z: float = 0.0,
+                stop_z: float | None = None):
+    """
+    Runs the pairs-trade state machine over a z-score array.
+
+    Flat -> short when z > entry_z, flat -> long when z < -entry_z.
+    A long exits once z >= -exit_z (or z < -stop_z), a short once
+    z <= exit_z (or z > stop_z). Nothing happens on the first bar, and a
+    bar that closes a trade never opens one, as in the original loop.
+
+    Entry/exit candidates are precomputed as "next index where ..." arrays,
+    so the Python loop runs once per trade rather than once per bar.
+    Returns (entry_idx, exit_idx, side) arrays; a trade still open at the
+    end has exit index -1.
+    """
+    n = len(z)
+    z = np.asarray(z, dtype=np.float64)
+
+    short_entry = z > entry_z
+    long_exit = z >= -exit_z
+    short_exit = z <= exit_z
+    if stop_z is not None:
+        long_exit |= z < -stop_z
+        short_exit |= z > stop_z
+
+    nxt_entry = np.append(_next_true(short_entry | (z < -entry_z)), n)
+    nxt_long_exit = np.append(_next_true(long_exit), n)
+    nxt_short_exit = np.append(_next_true(short_exit), n)
+
+    entries, exits, sides = [], [], []
+    i = 1
+    while i < n:
+        j = int(nxt_entry[i])
+        if j >= n:
+            break
+
+        side = -1 if short_entry[j] else 1
+        k = int((nxt_short_exit if side == -1 else nxt_long_exit)[j + 1])
+
+        entries.append(j)
+        sides.append(side)
+        if k >= n:
+            exits.append(-1)
+            break
+
+        exits.append(k)
+        i = k + 1
+
+    return (
+        np.array(entries, dtype=np.int64),
+        np.array(exits, dtype=np.int64),
+        np.array(sides, dtype=np.int8),
+    )
+
+
+def backtest_arrays(spread: np.ndarray, z: np.ndarray, entry_z: float = 2.0,
+                    exit_z: float = 0.0, stop_z: float | None = None,
+                    cost: float = 0.0, periods_per_year: float | None = None,
+                    return_trades: bool = False) -> dict:
+    """
+    Pairs-trade backtest on raw arrays.
+
+    `cost` is charged in spread units every time the position changes
+    (entry and exit). PnL per trade and total PnL are realized only;
+    drawdown and Sharpe use the bar-by-bar marked-to-market equity curve.
+    Sharpe is per bar unless `periods_per_year` is given.
+    """
+    spread = np.asarray(spread, dtype=np.float64)
+    n = len(spread)
+    entries, exits, sides = find_trades(z, entry_z, exit_z, stop_z)
+
+    closed = exits >= 0
+    trade_pnl = (
+        sides[closed] * (spread[exits[closed]] - spread[entries[closed]])
+        - 2 * cost
+    )
+
+    # position held after each bar, then marked-to-market bar PnL
+    delta = np.zeros(n + 1, dtype=np.int64)
+    np.add.at(delta, entries, sides)
+    np.add.at(delta, exits[closed], -sides[closed])
+    position = np.cumsum(delta[:n])
+
+    bar_pnl = np.zeros(n)
+    if n > 1:
+        bar_pnl[1:] = position[:-1] * np.diff(spread)
+        bar_pnl -= cost * np.abs(np.diff(position, prepend=0))
+
+    equity = np.cumsum(bar_pnl)
+    drawdown = np.maximum.accumulate(np.maximum(equity, 0)) - equity
+
+    std = bar_pnl.std(ddof=1) if n > 1 else 0.0
+    sharpe = bar_pnl.mean() / std if std > 0 else 0.0
+    if periods_per_year:
+        sharpe *= np.sqrt(periods_per_year)
+
+    num_trades = len(trade_pnl)
+    result = {
+        "total_pnl": round(float(trade_pnl.sum()), 4),
+        "num_trades": num_trades,
+        "win_rate": round(float((trade_pnl > 0).mean()), 2) if num_trades else 0,
+        "avg_trade_pnl": round(float(trade_pnl.mean()), 4) if num_trades else 0,
+        "max_drawdown": round(float(drawdown.max()), 4) if n else 0,
+        "sharpe": round(float(sharpe), 4),
+        "open_position": int(sides[-1]) if len(sides) and not closed[-1] else 0,
     }
+
+    if return_trades:
+        result["trades"] = [
+            {"entry": int(e), "exit": int(x), "side": "LONG" if s == 1 else "SHORT", "pnl": float(p)}
+            for e, x, s, p in zip(entries[closed], exits[closed], sides[closed], trade_pnl)
+        ]
+
+    return result
+
+
+@timed("backtest")
+def simulate_pairs_trade(df: pd.DataFrame, entry_z: float = 2.0, exit_z: float = 0.0,
+                         stop_z: float | None = None, cost: float = 0.0,
+                         periods_per_year: float | None = None,
+                         return_trades: bool = False):
+    result = backtest_arrays(
+        df["spread"].to_numpy(dtype=np.float64),
+        df["zscore"].to_numpy(dtype=np.float64),
+        entry_z=entry_z,
+        exit_z=exit_z,
+        stop_z=stop_z,
+        cost=cost,
+        periods_per_year=periods_per_year,
+        return_trades=return_trades,
+    )
+
+    if return_trades:
+        ts = df.index.astype(str)
+        for trade in result["trades"]:
+            trade["entry"] = ts[trade["entry"]]
+            trade["exit"] = ts[trade["exit"]]
+
+    return result
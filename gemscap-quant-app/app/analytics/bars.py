@@ -0,0 +1,273 @@
+import threading
+import numpy as np
+import pandas as pd
+from app.storage.tick_buffer import ColumnRing
+
+DEFAULT_BAR_CAPACITY = 10_000
+
+BAR_COLUMNS = {
+    "ts": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+    "vwap": np.float64,
+    "count": np.int64,
+}
+
+
+def interval_ns(interval: str) -> int:
+    return int(pd.Timedelta(interval).value)
+
+
+class BarBuilder:
+    """
+    Streaming OHLCV / VWAP / trade-count bars for one symbol and interval.
+
+    Each tick updates the open bar in O(1). When a tick lands in a later
+    bucket the open bar is closed, and any empty buckets in between are
+    filled with flat bars at the previous close (zero volume), matching
+    the `resample(...).last().ffill()` policy of `resample_ticks`.
+
+    `seq` counts closed bars and changes exactly when a new bar lands.
+    """
+
+    def __init__(self, interval: str = "1s", capacity: int = DEFAULT_BAR_CAPACITY):
+        self.interval = interval
+        self.step = interval_ns(interval)
+        self.bars = ColumnRing(BAR_COLUMNS, capacity)
+        self._lock = threading.Lock()
+        self._start = None
+
+    @property
+    def seq(self) -> int:
+        return self.bars.total
+
+    def _open(self, bucket, price, size):
+        self._start = bucket
+        self._o = self._h = self._l = self._c = price
+        self._vol = size
+        self._pv = price * size
+        self._n = 1
+
+    def _close(self):
+        vwap = self._pv / self._vol if self._vol > 0 else self._c
+        self.bars.append_row(
+            self._start, self._o, self._h, self._l, self._c,
+            self._vol, vwap, self._n
+        )
+
+    def _fill_gap(self, bucket):
+        missing = (bucket - self._start) // self.step - 1
+        if missing <= 0:
+            return
+
+        missing = min(missing, self.bars.capacity)
+        first = bucket - missing * self.step
+        c = self._c
+        self.bars.extend(
+            ts=np.arange(first, bucket, self.step, dtype=np.int64),
+            open=np.full(missing, c),
+            high=np.full(missing, c),
+            low=np.full(missing, c),
+            close=np.full(missing, c),
+            volume=np.zeros(missing),
+            vwap=np.full(missing, c),
+            count=np.zeros(missing, dtype=np.int64),
+        )
+
+    def on_tick(self, ts: int, price: float, size: float):
+        bucket = ts - ts % self.step
+
+        with self._lock:
+            if self._start is None:
+                self._open(bucket, price, size)
+                return
+
+            if bucket > self._start:
+                self._close()
+                self._fill_gap(bucket)
+                self._open(bucket, price, size)
+                return
+
+            # same bucket (or a late tick, folded into the open bar)
+            if price > self._h:
+                self._h = price
+            elif price < self._l:
+                self._l = price
+            self._c = price
+            self._vol += size
+            self._pv += price * size
+            self._n += 1
+
+    def load(self, ts, price, size):
+        """
+        Vectorized bulk load of ts-sorted historical ticks into an empty
+        builder, with the same bucketing and forward-fill as `on_tick`.
+        The last bucket is left open so live ticks continue it.
+        """
+        ts = np.asarray(ts, dtype=np.int64)
+        price = np.asarray(price, dtype=np.float64)
+        size = np.asarray(size, dtype=np.float64)
+        if len(ts) == 0:
+            return
+
+        bucket = ts - ts % self.step
+
+        # only the newest `capacity` bars can be kept; skip older ticks
+        keep = bucket >= bucket[-1] - self.bars.capacity * self.step
+        if not keep[0]:
+            ts, price, size, bucket = ts[keep], price[keep], size[keep], bucket[keep]
+
+        starts = np.r_[0, np.flatnonzero(np.diff(bucket)) + 1]
+        ends = np.r_[starts[1:], len(ts)]
+
+        opens = price[starts]
+        highs = np.maximum.reduceat(price, starts)
+        lows = np.minimum.reduceat(price, starts)
+        closes = price[ends - 1]
+        volume = np.add.reduceat(size, starts)
+        pv = np.add.reduceat(price * size, starts)
+        count = ends - starts
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vwap = np.where(volume > 0, pv / volume, closes)
+
+        # place bars on the full grid; empty buckets carry the previous close
+        first = bucket[starts[0]]
+        slot = (bucket[starts] - first) // self.step
+        grid = int(slot[-1]) + 1
+        filled = np.zeros(grid, dtype=bool)
+        filled[slot] = True
+        src = np.maximum.accumulate(np.where(filled, np.cumsum(filled) - 1, 0))
+        prev_close = closes[src]
+
+        bars = {
+            "ts": first + np.arange(grid, dtype=np.int64) * self.step,
+            "open": np.where(filled, opens[src], prev_close),
+            "high": np.where(filled, highs[src], prev_close),
+            "low": np.where(filled, lows[src], prev_close),
+            "close": prev_close,
+            "volume": np.where(filled, volume[src], 0.0),
+            "vwap": np.where(filled, vwap[src], prev_close),
+            "count": np.where(filled, count[src], 0),
+        }
+
+        with self._lock:
+            if self._start is not None:
+                raise RuntimeError("load() requires an empty builder")
+
+            self.bars.extend(**{k: v[:-1] for k, v in bars.items()})
+            self._open(int(bucket[-1]), float(opens[-1]), float(volume[-1]))
+            self._h, self._l, self._c = float(highs[-1]), float(lows[-1]), float(closes[-1])
+            self._pv = float(pv[-1])
+            self._n = int(count[-1])
+
+    def partial(self):
+        """
+        The bar still being built, or None before the first tick.
+        """
+        with self._lock:
+            if self._start is None:
+                return None
+            vwap = self._pv / self._vol if self._vol > 0 else self._c
+            return {
+                "ts": self._start, "open": self._o, "high": self._h,
+                "low": self._l, "close": self._c, "volume": self._vol,
+                "vwap": vwap, "count": self._n,
+            }
+
+    def frame(self, n: int | None = None, include_partial: bool = False) -> pd.DataFrame:
+        """
+        Finished bars (optionally plus the open one) indexed by UTC bar start.
+        """
+        cols = self.bars.snapshot(n)
+
+        if include_partial:
+            bar = self.partial()
+            if bar is not None:
+                cols = {k: np.append(v, bar[k]) for k, v in cols.items()}
+
+        index = pd.DatetimeIndex(pd.to_datetime(cols.pop("ts"), unit="ns", utc=True), name="ts")
+        return pd.DataFrame(cols, index=index)
+
+    def closes(self, n: int | None = None, include_partial: bool = False) -> pd.Series:
+        return self.frame(n, include_partial)["close"]
+
+
+class BarStore:
+    """
+    Bar builders for every (symbol, interval), created on first tick.
+    `get` creates them too; `find` and `seq` never do, so reads driven by
+    client input cannot add symbols.
+
+    Listeners added with `add_listener` are called as
+    fn(symbol, interval, seq) whenever a bar closes, on the thread that
+    delivered the tick, so they must be cheap and non-blocking.
+    """
+
+    def __init__(self, intervals: list[str], capacity: int = DEFAULT_BAR_CAPACITY):
+        self.intervals = list(intervals)
+        self.capacity = capacity
+        self._builders = {}
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, fn):
+        self._listeners.append(fn)
+
+    def remove_listener(self, fn):
+        if fn in self._listeners:
+            self._listeners.remove(fn)
+
+    def _symbol_builders(self, symbol: str) -> list:
+        builders = self._builders.get(symbol)
+        if builders is None:
+            with self._lock:
+                builders = self._builders.setdefault(symbol, [
+                    BarBuilder(interval, self.capacity) for interval in self.intervals
+                ])
+        return builders
+
+    def on_tick(self, symbol: str, ts: int, price: float, size: float):
+        for builder in self._symbol_builders(symbol):
+            seq = builder.seq
+            builder.on_tick(ts, price, size)
+            if builder.seq != seq:
+                for fn in self._listeners:
+                    fn(symbol, builder.interval, builder.seq)
+
+    def on_ticks(self, symbol: str, ts, price, size):
+        """
+        Batch form of `on_tick`. Listeners hear once per builder per batch,
+        with its latest seq, if any bar closed.
+        """
+        for builder in self._symbol_builders(symbol):
+            seq = builder.seq
+            on_tick = builder.on_tick
+            for t, p, s in zip(ts, price, size):
+                on_tick(t, p, s)
+            if builder.seq != seq:
+                for fn in self._listeners:
+                    fn(symbol, builder.interval, builder.seq)
+
+    def load(self, symbol: str, ts, price, size):
+        for builder in self._symbol_builders(symbol):
+            builder.load(ts, price, size)
+
+    def get(self, symbol: str, interval: str = "1s") -> BarBuilder:
+        return self._symbol_builders(symbol)[self.intervals.index(interval)]
+
+    def find(self, symbol: str, interval: str = "1s") -> BarBuilder | None:
+        builders = self._builders.get(symbol)
+        return builders[self.intervals.index(interval)] if builders is not None else None
+
+    def closes(self, symbol: str, interval: str = "1s") -> pd.Series:
+        return self.get(symbol, interval).closes()
+
+    def seq(self, symbol: str, interval: str = "1s") -> int:
+        builder = self.find(symbol, interval)
+        return builder.seq if builder is not None else 0
+
+    def symbols(self):
+        return list(self._builders)
@@ -0,0 +1,73 @@
+import numpy as np
+
+# "lttb": keeps the visual shape; "minmax": keeps every bucket's extremes (spikes)
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def lttb(x, y, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of `n_out` points that best
+    preserve the shape of y(x) when plotted. Always keeps the first and
+    last point; `x` must be increasing.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])
+
+    x = x - x[0]
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            nlo, nhi = edges[i + 1], edges[i + 2]
+            cx, cy = x[nlo:nhi].mean(), y[nlo:nhi].mean()
+        else:
+            cx, cy = x[-1], y[-1]
+
+        # twice the area of the triangle (a, candidate, next-bucket centroid)
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def minmax(y, n_out: int) -> np.ndarray:
+    """
+    Indices of the min and max of each of n_out / 2 equal buckets, in
+    order, plus the first and last point.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n <= 2:
+        return np.arange(n)
+
+    buckets = max((n_out - 2) // 2, 1)
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    picks = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            picks.append(lo + int(np.argmin(y[lo:hi])))
+            picks.append(lo + int(np.argmax(y[lo:hi])))
+    return np.unique(picks)
+
+
+def downsample(x, y, max_points: int, method: str = "lttb") -> np.ndarray:
+    """
+    Indices selecting at most `max_points` of the series for charting
+    (all of them if it is already short enough).
+    """
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"method must be one of {list(DOWNSAMPLE_METHODS)}")
+    if max_points <= 0 or len(y) <= max_points:
+        return np.arange(len(y))
+    if method == "minmax":
+        return minmax(y, max_points)
+    return lttb(x, y, max_points)
@@ -0,0 +1,128 @@
+import math
+import threading
+import numpy as np
+import pandas as pd
+from app.storage.tick_buffer import ColumnRing
+from app.config import KALMAN_DELTA, KALMAN_OBS_VAR
+
+DEFAULT_HISTORY = 10_000
+
+HISTORY_COLUMNS = {
+    "ts": np.int64,
+    "beta": np.float64,
+    "alpha": np.float64,
+    "spread": np.float64,
+    "innovation": np.float64,
+    "innovation_std": np.float64,
+}
+
+
+class KalmanHedge:
+    """
+    Recursive Kalman-filter estimate of y = beta * x + alpha, O(1) per bar.
+
+    The state (beta, alpha) follows a random walk with covariance
+    delta / (1 - delta) * I, observed with noise variance `obs_var`.
+    Both legs are scaled by their first observation, so `delta` and
+    `obs_var` are relative (per-bar drift and noise as fractions of price)
+    and the same defaults work for any pair.
+
+    `spread` uses the beta known before each bar (y - beta_prior * x), so
+    z-scores and backtests built on it have no look-ahead.
+    """
+
+    def __init__(self, delta: float = KALMAN_DELTA, obs_var: float = KALMAN_OBS_VAR,
+                 history: int = DEFAULT_HISTORY):
+        self.delta = delta
+        self.obs_var = obs_var
+        self.history = ColumnRing(HISTORY_COLUMNS, history)
+        self.last_ts = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._ref_y = None
+        self._ref_x = None
+        self._b, self._a = 1.0, 0.0
+        self._p00, self._p01, self._p11 = 1.0, 0.0, 1.0
+        self.n = 0
+
+    def update(self, y: float, x: float, ts: int = 0):
+        if self._ref_y is None:
+            self._ref_y, self._ref_x = y, x
+
+        yn = y / self._ref_y
+        xn = x / self._ref_x
+        q = self.delta / (1 - self.delta)
+
+        # predict
+        p00 = self._p00 + q
+        p01 = self._p01
+        p11 = self._p11 + q
+        b, a = self._b, self._a
+
+        # update with H = [xn, 1]
+        e = yn - (b * xn + a)
+        ph0 = p00 * xn + p01
+        ph1 = p01 * xn + p11
+        s = xn * ph0 + ph1 + self.obs_var
+        k0, k1 = ph0 / s, ph1 / s
+
+        self._b = b + k0 * e
+        self._a = a + k1 * e
+        self._p00 = p00 - k0 * ph0
+        self._p01 = p01 - k0 * ph1
+        self._p11 = p11 - k1 * ph1
+        self.n += 1
+        self.last_ts = ts
+
+        scale = self._ref_y / self._ref_x
+        self.history.append_row(
+            ts,
+            self._b * scale,
+            self._a * self._ref_y,
+            y - b * scale * x,
+            e * self._ref_y,
+            math.sqrt(s) * self._ref_y,
+        )
+
+    def beta(self):
+        return self._b * self._ref_y / self._ref_x if self.n else None
+
+    def alpha(self):
+        return self._a * self._ref_y if self.n else None
+
+    def feed(self, y: pd.Series, x: pd.Series):
+        """
+        Pushes aligned observations newer than the last one seen.
+        Starts over if the series begins after the last one seen (a gap).
+        """
+        ts = y.index.as_unit("ns").asi8
+
+        with self._lock:
+            if self.last_ts is not None and len(ts) and ts[0] > self.last_ts:
+                self.reset()
+                self.history = ColumnRing(HISTORY_COLUMNS, self.history.capacity)
+                self.last_ts = None
+
+            start = 0 if self.last_ts is None else int(np.searchsorted(ts, self.last_ts, side="right"))
+            for t, yv, xv in zip(ts[start:].tolist(), y.values[start:].tolist(), x.values[start:].tolist()):
+                self.update(yv, xv, t)
+
+    def frame(self, k: int | None = None) -> pd.DataFrame:
+        """
+        beta, alpha, spread and innovations for the last `k` bars.
+        """
+        cols = self.history.snapshot(k)
+        index = pd.DatetimeIndex(pd.to_datetime(cols.pop("ts"), unit="ns", utc=True), name="ts")
+        return pd.DataFrame(cols, index=index)
+
+
+def kalman_frame(y: pd.Series, x: pd.Series, delta: float = KALMAN_DELTA,
+                 obs_var: float = KALMAN_OBS_VAR) -> pd.DataFrame:
+    """
+    One-off filter run over aligned series, e.g. for backtest sweeps.
+    """
+    kf = KalmanHedge(delta, obs_var, history=max(len(y), 1))
+    kf.feed(y, x)
+    return kf.frame()
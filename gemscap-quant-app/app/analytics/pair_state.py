@@ -0,0 +1,236 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+
+from app.analytics.regression import hedge_ratio
+from app.analytics.spread import compute_spread
+from app.analytics.half_life import half_life
+from app.analytics.adf import adf_test
+from app.analytics.signal_quality import signal_quality, MIN_POINTS
+from app.analytics.rolling import RollingPairStats, DEFAULT_HISTORY
+from app.analytics.kalman import KalmanHedge
+from app.analytics.zscore import zscore as rolling_zscore
+from app.metrics import timed
+from app.config import ROLLING_ENGINES_PER_PAIR
+
+QUALITY_WINDOW = 50
+
+# ols: full-sample beta, rolling: rolling-window OLS beta, kalman: KalmanHedge beta
+HEDGE_MODES = ("ols", "rolling", "kalman")
+
+
+class PairSnapshot:
+    """
+    Analytics for one pair as of a given bar sequence.
+
+    Aligned bars, beta and spread are computed up front; everything else
+    (z-scores per window, half-life, ADF, quality) is computed on first
+    use and then shared by every request that sees the same snapshot.
+    """
+
+    def __init__(self, state, seq, y: pd.Series, x: pd.Series, volume: pd.Series):
+        self.state = state
+        self.seq = seq
+        self.y = y
+        self.x = x
+        self.volume = volume
+        self.beta = hedge_ratio(x, y) if len(y) else 0.0
+        self.spread = compute_spread(y, x, self.beta)
+        self._memo = {}
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self.y)
+
+    def _cached(self, key, fn):
+        with self._lock:
+            if key not in self._memo:
+                # timed per stage ("adf", "zscore", ...), inclusive of nested stages
+                with timed(key[0] if isinstance(key, tuple) else key):
+                    self._memo[key] = fn()
+            return self._memo[key]
+
+    def rolling(self, window: int) -> RollingPairStats:
+        return self._cached(("rolling", window), lambda: self.state.rolling(window, self.y, self.x))
+
+    def kalman(self) -> pd.DataFrame:
+        """
+        Kalman beta / alpha / spread per bar, aligned to this snapshot.
+        """
+        return self._cached("kalman", lambda: self.state.kalman(self.y, self.x).reindex(self.y.index))
+
+    def spread_series(self, window: int, mode: str = "ols") -> pd.Series:
+        """
+        Spread y - beta * x with beta from `mode` (see HEDGE_MODES).
+        """
+        if mode == "ols":
+            return self.spread
+        if mode == "rolling":
+            return self._cached(
+                ("spread", mode, window),
+                lambda: (self.y - self.hedge_series(window) * self.x).dropna()
+            )
+        if mode == "kalman":
+            return self._cached(("spread", mode), lambda: self.kalman()["spread"].dropna())
+        raise ValueError(f"Unknown hedge mode: {mode}")
+
+    def zscore(self, window: int, mode: str = "ols") -> pd.Series:
+        """
+        Rolling z-score of the spread, same values as zscore(spread, window).
+        """
+        def build():
+            if mode != "ols":
+                return rolling_zscore(self.spread_series(window, mode), window)
+            z = self.rolling(window).spread_zscore_series(self.beta).dropna()
+            return z.loc[z.index.intersection(self.spread.index)]
+        return self._cached(("zscore", window, mode), build)
+
+    def hedge_series(self, window: int, mode: str = "rolling") -> pd.Series:
+        if mode == "rolling":
+            return self._cached(
+                ("hedge", window),
+                lambda: self.rolling(window).series()["beta"].reindex(self.y.index)
+            )
+        if mode == "kalman":
+            return self.kalman()["beta"]
+        if mode == "ols":
+            return pd.Series(self.beta, index=self.y.index)
+        raise ValueError(f"Unknown hedge mode: {mode}")
+
+    def half_life(self):
+        return self._cached("half_life", lambda: half_life(self.spread))
+
+    def adf(self) -> dict:
+        # a historical range must not move the live pair's selected lag
+        key = (self.state.symbol_y, self.state.symbol_x, self.state.interval) if self.seq is not None else None
+        return self._cached("adf", lambda: adf_test(self.spread, cache_key=key))
+
+    def quality(self) -> dict:
+        return self._cached("quality", lambda: signal_quality(
+            spread=self.spread,
+            y=self.y,
+            x=self.x,
+            volume=self.volume,
+            hedge_ratio_series=self.hedge_series(QUALITY_WINDOW),
+            adf=self.adf() if len(self.spread.dropna()) >= MIN_POINTS else None
+        ))
+
+
+class PairState:
+    """
+    Shared per-pair state, rebuilt only when either leg closes a new bar.
+
+    Rolling engines are kept for the `max_engines` most recently used
+    windows; an evicted window is rebuilt from the bars on next use.
+    """
+
+    def __init__(self, bar_store, symbol_y: str, symbol_x: str,
+                 interval: str = "1s", history: int = DEFAULT_HISTORY,
+                 max_engines: int = ROLLING_ENGINES_PER_PAIR):
+        self.bar_store = bar_store
+        self.symbol_y = symbol_y
+        self.symbol_x = symbol_x
+        self.interval = interval
+        self.history = history
+        self.max_engines = max_engines
+        self._engines = OrderedDict()
+        self._engines_lock = threading.Lock()
+        self._kalman = KalmanHedge(history=history)
+        self._snapshot = None
+        self._lock = threading.Lock()
+
+    def seq(self):
+        return (
+            self.bar_store.seq(self.symbol_y, self.interval),
+            self.bar_store.seq(self.symbol_x, self.interval),
+        )
+
+    def rolling(self, window: int, y: pd.Series, x: pd.Series) -> RollingPairStats:
+        with self._engines_lock:
+            engine = self._engines.get(window)
+            if engine is None:
+                engine = self._engines[window] = RollingPairStats(window, self.history)
+                while len(self._engines) > self.max_engines:
+                    self._engines.popitem(last=False)
+            else:
+                self._engines.move_to_end(window)
+        engine.feed(y, x)
+        return engine
+
+    def kalman(self, y: pd.Series, x: pd.Series) -> pd.DataFrame:
+        self._kalman.feed(y, x)
+        return self._kalman.frame()
+
+    def _bars(self, symbol: str) -> pd.DataFrame:
+        # a leg without bars yet reads as empty rather than getting builders
+        builder = self.bar_store.find(symbol, self.interval)
+        if builder is None:
+            return pd.DataFrame({"close": [], "volume": []}, dtype=float,
+                                index=pd.DatetimeIndex([], tz="UTC", name="ts"))
+        return builder.frame()
+
+    def _build(self, seq) -> PairSnapshot:
+        with timed("snapshot"):
+            y_bars = self._bars(self.symbol_y)
+            x_bars = self._bars(self.symbol_x)
+
+            common = y_bars.index.intersection(x_bars.index)
+            return PairSnapshot(
+                self, seq,
+                y_bars["close"].loc[common],
+                x_bars["close"].loc[common],
+                y_bars["volume"].loc[common],
+            )
+
+    def snapshot(self, shared: bool = True) -> PairSnapshot:
+        """
+        The snapshot for the current bar sequence. With shared=False a
+        private one is built, so nothing memoized is reused (profiling).
+        """
+        seq = self.seq()
+        if not shared:
+            return self._build(seq)
+
+        snap = self._snapshot
+        if snap is not None and snap.seq == seq:
+            return snap
+
+        with self._lock:
+            snap = self._snapshot
+            if snap is not None and snap.seq == seq:
+                return snap
+            snap = self._snapshot = self._build(seq)
+            return snap
+
+
+def historical_snapshot(bars: pd.DataFrame, symbol_y: str, symbol_x: str,
+                        interval: str) -> PairSnapshot:
+    """
+    A one-off snapshot over stored bars (y, x, volume columns, e.g. from
+    query_pair_bars), detached from the live bar store. Its engines are
+    sized to hold the whole range.
+    """
+    state = PairState(None, symbol_y, symbol_x, interval, history=max(len(bars), 1))
+    return PairSnapshot(state, None, bars["y"], bars["x"], bars["volume"])
+
+
+class PairStateRegistry:
+    def __init__(self, bar_store, history: int = DEFAULT_HISTORY):
+        self.bar_store = bar_store
+        self.history = history
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def get(self, symbol_y: str, symbol_x: str, interval: str = "1s") -> PairState:
+        symbol_y, symbol_x = symbol_y.lower(), symbol_x.lower()
+        key = (symbol_y, symbol_x, interval)
+        state = self._states.get(key)
+        if state is None:
+            with self._lock:
+                state = self._states.setdefault(
+                    key, PairState(self.bar_store, symbol_y, symbol_x, interval, self.history)
+                )
+        return state
+
+    def snapshot(self, symbol_y: str, symbol_x: str, interval: str = "1s") -> PairSnapshot:
+        return self.get(symbol_y, symbol_x, interval).snapshot()
@@ -0,0 +1,204 @@
+import math
+import threading
+import numpy as np
+import pandas as pd
+from app.storage.tick_buffer import ColumnRing
+
+DEFAULT_HISTORY = 10_000
+
+HISTORY_COLUMNS = {
+    "ts": np.int64,
+    "y": np.float64,
+    "x": np.float64,
+    "mean_y": np.float64,
+    "mean_x": np.float64,
+    "var_y": np.float64,
+    "var_x": np.float64,
+    "cov": np.float64,
+}
+
+
+class RollingPairStats:
+    """
+    O(1) rolling moments of a (y, x) pair over a fixed window.
+
+    Keeps running sums, sums of squares and the cross-product of the last
+    `window` observations. Values are shifted by the first observation to
+    avoid cancellation at price levels, and the sums are rebuilt from the
+    window every time it wraps so rounding error cannot accumulate.
+
+    Variances and covariance use ddof=1, like pandas rolling windows, so
+    z-score, correlation and beta match `zscore`, `rolling_corr` and
+    `rolling_hedge_ratio`. The per-step moments are kept for the last
+    `history` updates, which is enough to rebuild any of those series.
+    """
+
+    def __init__(self, window: int = 50, history: int = DEFAULT_HISTORY):
+        if window < 2:
+            raise ValueError("window must be at least 2")
+
+        self.window = window
+        self.history = ColumnRing(HISTORY_COLUMNS, history)
+        self.last_ts = None
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self._ys = [0.0] * self.window
+        self._xs = [0.0] * self.window
+        self._pos = 0
+        self.n = 0
+        self._ref_y = None
+        self._ref_x = None
+        self._sy = self._sx = self._syy = self._sxx = self._sxy = 0.0
+
+    def _resync(self):
+        ys, xs = self._ys, self._xs
+        self._sy = math.fsum(ys)
+        self._sx = math.fsum(xs)
+        self._syy = math.fsum(v * v for v in ys)
+        self._sxx = math.fsum(v * v for v in xs)
+        self._sxy = math.fsum(a * b for a, b in zip(ys, xs))
+
+    def update(self, y: float, x: float = 0.0, ts: int = 0):
+        if self._ref_y is None:
+            self._ref_y, self._ref_x = y, x
+
+        dy = y - self._ref_y
+        dx = x - self._ref_x
+        i = self._pos
+
+        if self.n >= self.window:
+            oy, ox = self._ys[i], self._xs[i]
+            self._sy -= oy
+            self._sx -= ox
+            self._syy -= oy * oy
+            self._sxx -= ox * ox
+            self._sxy -= oy * ox
+        else:
+            self.n += 1
+
+        self._ys[i] = dy
+        self._xs[i] = dx
+        self._sy += dy
+        self._sx += dx
+        self._syy += dy * dy
+        self._sxx += dx * dx
+        self._sxy += dy * dx
+
+        self._pos = (i + 1) % self.window
+        if self._pos == 0:
+            self._resync()
+
+        self.last_ts = ts
+        if self.ready:
+            m = self.moments()
+            self.history.append_row(
+                ts, y, x, m["mean_y"], m["mean_x"], m["var_y"], m["var_x"], m["cov"]
+            )
+
+    @property
+    def ready(self) -> bool:
+        return self.n >= self.window
+
+    def moments(self) -> dict:
+        n = self.n
+        my = self._sy / n
+        mx = self._sx / n
+        d = n - 1
+        return {
+            "mean_y": my + self._ref_y,
+            "mean_x": mx + self._ref_x,
+            "var_y": max((self._syy - n * my * my) / d, 0.0),
+            "var_x": max((self._sxx - n * mx * mx) / d, 0.0),
+            "cov": (self._sxy - n * my * mx) / d,
+        }
+
+    def feed(self, y: pd.Series, x: pd.Series):
+        """
+        Pushes aligned observations newer than the last one seen, skipping
+        rows where either leg is NaN or infinite (one would poison the
+        running sums until the next resync). Starts over if the series
+        begins after the last one seen (a gap).
+        """
+        ts = y.index.as_unit("ns").asi8
+
+        with self._lock:
+            if self.last_ts is not None and len(ts) and ts[0] > self.last_ts:
+                self.reset()
+                self.history = ColumnRing(HISTORY_COLUMNS, self.history.capacity)
+                self.last_ts = None
+
+            start = 0 if self.last_ts is None else int(np.searchsorted(ts, self.last_ts, side="right"))
+            for t, yv, xv in zip(ts[start:].tolist(), y.values[start:].tolist(), x.values[start:].tolist()):
+                if math.isfinite(yv) and math.isfinite(xv):
+                    self.update(yv, xv, t)
+                else:
+                    self.last_ts = t
+
+    # ------------------------------
+    # Latest values
+    # ------------------------------
+    def zscore(self):
+        if not self.ready:
+            return None
+        m = self.moments()
+        std = math.sqrt(m["var_y"])
+        y_last = self._ys[self._pos - 1] + self._ref_y
+        return (y_last - m["mean_y"]) / std if std > 0 else None
+
+    def corr(self):
+        if not self.ready:
+            return None
+        m = self.moments()
+        denom = math.sqrt(m["var_y"] * m["var_x"])
+        return m["cov"] / denom if denom > 0 else None
+
+    def beta(self):
+        if not self.ready:
+            return None
+        m = self.moments()
+        return m["cov"] / m["var_x"] if m["var_x"] > 0 else None
+
+    def spread_zscore(self, beta: float):
+        """
+        Latest z-score of spread = y - beta * x, from the pair moments.
+        """
+        if not self.ready:
+            return None
+        m = self.moments()
+        var = m["var_y"] + beta * beta * m["var_x"] - 2 * beta * m["cov"]
+        if var <= 0:
+            return None
+        y_last = self._ys[self._pos - 1] + self._ref_y
+        x_last = self._xs[self._pos - 1] + self._ref_x
+        mean = m["mean_y"] - beta * m["mean_x"]
+        return (y_last - beta * x_last - mean) / math.sqrt(var)
+
+    # ------------------------------
+    # Last K values, for charts
+    # ------------------------------
+    def _history_frame(self, k: int | None) -> pd.DataFrame:
+        cols = self.history.snapshot(k)
+        index = pd.DatetimeIndex(pd.to_datetime(cols.pop("ts"), unit="ns", utc=True), name="ts")
+        return pd.DataFrame(cols, index=index)
+
+    def series(self, k: int | None = None) -> pd.DataFrame:
+        """
+        Rolling z-score of y, correlation and beta for the last `k` steps.
+        """
+        h = self._history_frame(k)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return pd.DataFrame({
+                "zscore": (h["y"] - h["mean_y"]) / np.sqrt(h["var_y"]),
+                "corr": h["cov"] / np.sqrt(h["var_y"] * h["var_x"]),
+                "beta": h["cov"] / h["var_x"],
+            }, index=h.index)
+
+    def spread_zscore_series(self, beta: float, k: int | None = None) -> pd.Series:
+        h = self._history_frame(k)
+        var = h["var_y"] + beta * beta * h["var_x"] - 2 * beta * h["cov"]
+        spread = h["y"] - beta * h["x"]
+        mean = h["mean_y"] - beta * h["mean_x"]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (spread - mean) / np.sqrt(var)
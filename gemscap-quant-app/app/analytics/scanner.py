@@ -0,0 +1,192 @@
+import threading
+from functools import reduce
+
+import numpy as np
+
+from app.analytics.stationarity import mackinnon_p
+from app.metrics import timed
+
+DEFAULT_LOOKBACK = 1000
+
+SCAN_FIELDS = ("beta", "corr", "zscore", "half_life", "df_stat", "coint_p")
+RANK_FIELDS = ("df_stat", "zscore", "half_life", "corr")
+
+
+def aligned_closes(bar_store, symbols: list[str], interval: str = "1s",
+                   lookback: int = DEFAULT_LOOKBACK, min_bars: int = 2):
+    """
+    (symbols, ts, closes) where closes is a T x N matrix of the newest
+    `lookback` bars every symbol has in common. Symbols with fewer than
+    `min_bars` bars are left out rather than truncating the whole universe.
+    """
+    cols = {}
+    for symbol in symbols:
+        bars = bar_store.get(symbol, interval).bars.snapshot(lookback)
+        if len(bars["ts"]) >= min_bars:
+            cols[symbol] = bars
+
+    if not cols:
+        return [], np.empty(0, dtype=np.int64), np.empty((0, 0))
+
+    ts = reduce(np.intersect1d, (c["ts"] for c in cols.values()))
+    closes = np.column_stack([
+        c["close"][np.searchsorted(c["ts"], ts)] for c in cols.values()
+    ]) if len(ts) else np.empty((0, len(cols)))
+
+    return list(cols), ts, closes
+
+
+def _cov(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Sample cross-covariance matrix: out[i, j] = cov(a[:, i], b[:, j]).
+    """
+    a = a - a.mean(axis=0)
+    b = b - b.mean(axis=0)
+    return a.T @ b / (len(a) - 1)
+
+
+def _pair_var(c: np.ndarray, beta: np.ndarray) -> np.ndarray:
+    """
+    var(y - beta * x) for every (y, x) given the covariance matrix `c`.
+    """
+    d = np.diag(c)
+    return d[:, None] - beta * (c + c.T) + beta ** 2 * d[None, :]
+
+
+def pair_matrices(closes: np.ndarray, window: int) -> dict:
+    """
+    Pair statistics for every ordered (y, x) of the columns of `closes`,
+    as N x N matrices with y on rows and x on columns.
+
+    Every spread y - beta * x is linear in the prices, so its variance,
+    lag/difference covariances and rolling-window moments all follow from
+    a handful of N x N covariance matrices; no spread is materialized.
+
+      beta      : OLS hedge ratio over the whole matrix (as `hedge_ratio`)
+      corr      : Pearson correlation
+      zscore    : z-score of the latest spread over the last `window` bars
+      half_life : -ln 2 / lambda for d(spread) ~ lambda * spread_lag, if lambda < 0
+      df_stat   : Dickey-Fuller t-statistic of lambda (more negative = stronger)
+      coint_p   : Engle-Granger MacKinnon p-value of df_stat
+    """
+    t, n = closes.shape
+    with np.errstate(divide="ignore", invalid="ignore"):
+        c = _cov(closes, closes)
+        var = np.diag(c)
+
+        # hedge_ratio divides a ddof=1 covariance by a ddof=0 variance
+        beta = c.T / (var[None, :] * (t - 1) / t)
+        corr = c / np.sqrt(np.outer(var, var))
+
+        w = closes[-window:]
+        mean_w = w.mean(axis=0)
+        spread_mean = mean_w[:, None] - beta * mean_w[None, :]
+        spread_last = closes[-1][:, None] - beta * closes[-1][None, :]
+        zscore = (spread_last - spread_mean) / np.sqrt(_pair_var(_cov(w, w), beta))
+
+        lag, diff = closes[:-1], np.diff(closes, axis=0)
+        k = _cov(lag, diff)
+        kd = np.diag(k)
+        cov_ld = kd[:, None] - beta * (k + k.T) + beta ** 2 * kd[None, :]
+        var_l = _pair_var(_cov(lag, lag), beta)
+        var_d = _pair_var(_cov(diff, diff), beta)
+
+        lam = cov_ld / var_l
+        m = t - 1
+        resid_var = (var_d - lam ** 2 * var_l) * (m - 1) / (m - 2)
+        df_stat = lam / np.sqrt(resid_var / ((m - 1) * var_l))
+        half_life = np.where(lam < 0, -np.log(2) / lam, np.nan)
+
+    out = {
+        "beta": beta, "corr": corr, "zscore": zscore,
+        "half_life": half_life, "df_stat": df_stat,
+        "coint_p": mackinnon_p(np.nan_to_num(df_stat, nan=0.0), "c", 2),
+    }
+    for v in out.values():
+        np.fill_diagonal(v, np.nan)
+    return out
+
+
+def _num(value):
+    value = float(value)
+    return round(value, 6) if np.isfinite(value) else None
+
+
+class UniverseScanner:
+    """
+    Pair statistics for the whole symbol universe from one aligned close
+    matrix, recomputed only when some symbol closes a new bar.
+    """
+
+    def __init__(self, bar_store, symbols: list[str], interval: str = "1s",
+                 lookback: int = DEFAULT_LOOKBACK):
+        self.bar_store = bar_store
+        self.symbols = list(symbols)
+        self.interval = interval
+        self.lookback = lookback
+        self._results = {}
+        self._seq = None
+        self._lock = threading.Lock()
+
+    def seq(self):
+        return tuple(self.bar_store.seq(s, self.interval) for s in self.symbols)
+
+    def scan(self, window: int = 50) -> dict:
+        """
+        {"symbols", "ts", "bars", and the N x N matrices of `pair_matrices`},
+        shared by every caller until the next bar closes.
+        """
+        seq = self.seq()
+        with self._lock:
+            if seq != self._seq:
+                self._results = {}
+                self._seq = seq
+
+            result = self._results.get(window)
+            if result is None:
+                with timed("scan"):
+                    symbols, ts, closes = aligned_closes(
+                        self.bar_store, self.symbols, self.interval,
+                        self.lookback, min_bars=2 * window
+                    )
+                    result = {"symbols": symbols, "ts": int(ts[-1]) if len(ts) else None, "bars": len(ts)}
+                    if len(symbols) >= 2 and len(ts) >= 2 * window:
+                        result.update(pair_matrices(closes, window))
+                self._results[window] = result
+
+            return result
+
+    def top(self, window: int = 50, top_k: int = 20, sort_by: str = "df_stat",
+            min_corr: float = 0.0) -> list[dict]:
+        """
+        The `top_k` ordered pairs ranked by `sort_by`: most negative df_stat
+        (equivalently lowest coint_p),
+        largest |zscore|, shortest half_life or highest corr.
+        """
+        if sort_by not in RANK_FIELDS:
+            raise ValueError(f"Cannot rank by {sort_by}")
+
+        result = self.scan(window)
+        if "beta" not in result:
+            return []
+
+        key = {
+            "df_stat": result["df_stat"],
+            "zscore": -np.abs(result["zscore"]),
+            "half_life": result["half_life"],
+            "corr": -result["corr"],
+        }[sort_by]
+
+        valid = np.isfinite(key) & (result["corr"] >= min_corr)
+        ys, xs = np.nonzero(valid)
+        order = np.argsort(key[ys, xs], kind="stable")[:top_k]
+
+        symbols = result["symbols"]
+        return [
+            {
+                "symbol_y": symbols[i],
+                "symbol_x": symbols[j],
+                **{f: _num(result[f][i, j]) for f in SCAN_FIELDS},
+            }
+            for i, j in zip(ys[order], xs[order])
+        ]
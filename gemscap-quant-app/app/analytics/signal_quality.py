@@ -5,13 +5,45 @@ from app.analytics.adf import adf_test
 logger = logging.getLogger(__name__)
 
 MIN_POINTS = 60
+CORR_WINDOW = 50
+CORR_MIN = 0.7
+HEDGE_STD_WINDOW = 20
+HEDGE_STABILITY_RATIO = 0.5
+LIQUIDITY_WINDOW = 50
+
+
+def latest_correlation(y: pd.Series, x: pd.Series, window: int = CORR_WINDOW):
+    corr = y.rolling(window).corr(x).dropna()
+    return float(corr.iloc[-1]) if len(corr) else None
+
+
+def hedge_ratio_dispersion(hedge_ratio_series: pd.Series, window: int = HEDGE_STD_WINDOW):
+    """
+    (recent rolling std, full-sample std) of the hedge ratio, or None
+    while there are fewer than `window` values.
+    """
+    hr_clean = hedge_ratio_series.dropna()
+    if len(hr_clean) < window:
+        return None
+    return hr_clean.rolling(window).std().iloc[-1], hr_clean.std()
+
+
+def liquidity_ratio(volume: pd.Series, window: int = LIQUIDITY_WINDOW):
+    """
+    Latest bar volume over its rolling mean; above 1 means liquidity is fine.
+    """
+    vol_clean = volume.dropna()
+    avg_vol = vol_clean.rolling(window).mean().iloc[-1]
+    return float(vol_clean.iloc[-1] / avg_vol) if avg_vol > 0 else None
+
 
 def signal_quality(
     spread: pd.Series,
     y: pd.Series,
     x: pd.Series,
     volume: pd.Series,
-    hedge_ratio_series: pd.Series
+    hedge_ratio_series: pd.Series,
+    adf: dict | None = None
 ):
     try:
         # ------------------------------
@@ -33,38 +65,36 @@ def signal_quality(
         # 1️⃣ Stationarity (ADF)
         # ------------------------------
         spread_clean = spread.dropna()
-        adf = adf_test(spread_clean)
+        if adf is None:
+            adf = adf_test(spread_clean)
         result["stationary"] = adf["p_value"] < 0.05
         result["adf_p_value"] = adf["p_value"]
 
         # ------------------------------
         # 2️⃣ Correlation
         # ------------------------------
-        corr_series = y.rolling(50).corr(x)
-        corr = corr_series.dropna().iloc[-1]
-        result["correlation"] = float(corr)
-        result["correlation_ok"] = corr > 0.7
+        corr = latest_correlation(y, x)
+        result["correlation"] = corr
+        result["correlation_ok"] = corr > CORR_MIN
 
         # ------------------------------
         # 3️⃣ Hedge ratio stability
         # ------------------------------
-        hr_clean = hedge_ratio_series.dropna()
-        if len(hr_clean) < 20:
+        dispersion = hedge_ratio_dispersion(hedge_ratio_series)
+        if dispersion is None:
             result["hedge_ratio_stable"] = False
             hr_std = None
         else:
-            hr_std = hr_clean.rolling(20).std().iloc[-1]
-            result["hedge_ratio_stable"] = hr_std < hr_clean.std() * 0.5
+            hr_std, hr_full_std = dispersion
+            result["hedge_ratio_stable"] = hr_std < hr_full_std * HEDGE_STABILITY_RATIO
 
         result["hedge_ratio_std"] = None if hr_std is None else float(hr_std)
 
         # ------------------------------
         # 4️⃣ Liquidity
         # ------------------------------
-        vol_clean = volume.dropna()
-        avg_vol = vol_clean.rolling(50).mean().iloc[-1]
-        curr_vol = vol_clean.iloc[-1]
-        result["liquidity_ok"] = curr_vol > avg_vol
+        liquidity = liquidity_ratio(volume)
+        result["liquidity_ok"] = liquidity is not None and liquidity > 1
 
         # ------------------------------
         # Final Quality
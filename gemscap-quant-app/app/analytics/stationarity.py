@@ -0,0 +1,244 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from statsmodels.tsa.adfvalues import mackinnoncrit, mackinnonp
+
+try:
+    # private response-surface tables, used to evaluate many statistics at once
+    from statsmodels.tsa.adfvalues import (
+        _tau_maxs, _tau_mins, _tau_stars, _tau_smallps, _tau_largeps
+    )
+except ImportError:
+    _tau_maxs = None
+
+
+# -------------------------------
+# MacKinnon p-values
+# -------------------------------
+def mackinnon_p(stat, regression: str = "c", n: int = 1):
+    """
+    MacKinnon (1994) approximate p-value for ADF (n=1) or Engle-Granger
+    with n variables. Same response-surface tables as `mackinnonp`, but
+    evaluated for a whole array of statistics at once.
+    """
+    stat = np.asarray(stat, dtype=np.float64)
+    if _tau_maxs is None:
+        # tables moved in this statsmodels: one public call per statistic
+        p = np.vectorize(lambda s: mackinnonp(s, regression, n), otypes=[np.float64])(stat)
+        return float(p) if p.ndim == 0 else p
+
+    small = np.polyval(_tau_smallps[regression][n - 1][::-1], stat)
+    large = np.polyval(_tau_largeps[regression][n - 1][::-1], stat)
+
+    p = ndtr(np.where(stat <= _tau_stars[regression][n - 1], small, large))
+    p = np.where(stat > _tau_maxs[regression][n - 1], 1.0, p)
+    p = np.where(stat < _tau_mins[regression][n - 1], 0.0, p)
+    return float(p) if p.ndim == 0 else p
+
+
+def critical_values(nobs: int, regression: str = "c", n: int = 1) -> dict:
+    crit = mackinnoncrit(N=n, regression=regression, nobs=nobs)
+    return {"1%": float(crit[0]), "5%": float(crit[1]), "10%": float(crit[2])}
+
+
+# -------------------------------
+# Batched ADF regression
+# -------------------------------
+def _as_matrix(series) -> np.ndarray:
+    """
+    M x T float matrix from one series / 1-D array or a 2-D array of rows.
+    """
+    if isinstance(series, (pd.Series, pd.DataFrame)):
+        series = series.to_numpy(dtype=np.float64).T
+    y = np.asarray(series, dtype=np.float64)
+    return y[None, :] if y.ndim == 1 else y
+
+
+def _design(y: np.ndarray, maxlag: int, regression: str):
+    """
+    ADF regressors for every row of `y` on the common sample that allows
+    `maxlag` lagged differences: (level, lagged diffs, trend, target).
+    """
+    t = y.shape[1]
+    n = t - 1 - maxlag
+    dy = np.diff(y, axis=1)
+
+    level = y[:, maxlag:t - 1, None]
+    lags = np.stack([dy[:, maxlag - i:t - 1 - i] for i in range(1, maxlag + 1)], axis=2) \
+        if maxlag else np.empty((len(y), n, 0))
+    target = dy[:, maxlag:]
+    trend = np.arange(1.0, n + 1)[None, :, None].repeat(len(y), 0) if regression == "ct" \
+        else np.empty((len(y), n, 0))
+
+    return level, lags, trend, target
+
+
+def _ols(x: np.ndarray, target: np.ndarray, constant: bool):
+    """
+    Batched least squares of `target` (M x n) on `x` (M x n x k), plus an
+    intercept when `constant`. Returns (coef of column 0, its std error, ssr).
+
+    With an intercept the columns are demeaned first (Frisch-Waugh), which
+    keeps the normal equations well conditioned for price-level inputs.
+    """
+    n, k = x.shape[1], x.shape[2] + constant
+    if constant:
+        x = x - x.mean(axis=1, keepdims=True)
+        target = target - target.mean(axis=1, keepdims=True)
+
+    xtx = np.einsum("mni,mnj->mij", x, x)
+    xty = np.einsum("mni,mn->mi", x, target)
+    coef = np.linalg.solve(xtx, xty[..., None])[..., 0]
+
+    resid = target - np.einsum("mni,mi->mn", x, coef)
+    ssr = np.einsum("mn,mn->m", resid, resid)
+    inv00 = np.linalg.solve(xtx, np.eye(x.shape[2])[None, :, :1].repeat(len(x), 0))[:, 0, 0]
+    se = np.sqrt(ssr / (n - k) * inv00)
+
+    return coef[:, 0], se, ssr
+
+
+def default_maxlag(nobs: int, regression: str = "c") -> int:
+    """
+    Schwert (1989) rule, capped as in `adfuller`.
+    """
+    ntrend = len(regression) if regression != "n" else 0
+    return max(min(nobs // 2 - ntrend - 1, int(np.ceil(12.0 * (nobs / 100.0) ** 0.25))), 0)
+
+
+def select_lag(series, maxlag: int | None = None, regression: str = "c") -> np.ndarray:
+    """
+    AIC-optimal number of lagged differences per row, chosen like
+    `adfuller(autolag="AIC")`: every candidate is fit on the sample that
+    `maxlag` leaves, so the criteria are comparable.
+    """
+    y = _as_matrix(series)
+    if maxlag is None:
+        maxlag = default_maxlag(y.shape[1], regression)
+
+    level, lags, trend, target = _design(y, maxlag, regression)
+    n = target.shape[1]
+    constant = regression != "n"
+
+    # candidates are nested column prefixes, so one Gram matrix serves all
+    x = np.concatenate([trend, level, lags], axis=2)
+    if constant:
+        x = x - x.mean(axis=1, keepdims=True)
+        target = target - target.mean(axis=1, keepdims=True)
+    xtx = np.einsum("mni,mnj->mij", x, x)
+    xty = np.einsum("mni,mn->mi", x, target)
+    yty = np.einsum("mn,mn->m", target, target)
+
+    aic = np.empty((maxlag + 1, len(y)))
+    for lag in range(maxlag + 1):
+        k = trend.shape[2] + 1 + lag
+        coef = np.linalg.solve(xtx[:, :k, :k], xty[:, :k, None])[..., 0]
+        ssr = yty - np.einsum("mi,mi->m", coef, xty[:, :k])
+        llf = -n / 2 * (np.log(2 * np.pi) + np.log(ssr / n) + 1)
+        aic[lag] = -2 * llf + 2 * (k + constant)
+
+    return np.argmin(aic, axis=0)
+
+
+def adf_stats(series, lag: int = 0, regression: str = "c") -> np.ndarray:
+    """
+    ADF t-statistics for every row of `series` (M x T) with a fixed number
+    of lagged differences, from one batched solve of M small normal
+    equations. Matches `adfuller(x, maxlag=lag, autolag=None)` exactly.
+    """
+    y = _as_matrix(series)
+    level, lags, trend, target = _design(y, lag, regression)
+    coef, se, _ = _ols(np.concatenate([level, lags, trend], axis=2), target, regression != "n")
+    return coef / se
+
+
+# -------------------------------
+# Lag cache
+# -------------------------------
+class LagCache:
+    """
+    Remembers the AIC-selected lag per key (e.g. a symbol pair) for `ttl`
+    seconds. Lag selection fits maxlag + 1 regressions; with a cached lag
+    a test is a single fit.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._lags = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, series, maxlag: int | None = None, regression: str = "c") -> int:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._lags.get(key)
+        if entry is not None and now - entry[1] < self.ttl:
+            return entry[0]
+
+        lag = int(select_lag(series, maxlag, regression)[0])
+        with self._lock:
+            self._lags[key] = (lag, now)
+        return lag
+
+    def clear(self):
+        with self._lock:
+            self._lags.clear()
+
+
+LAG_CACHE = LagCache()
+
+
+# -------------------------------
+# Tests
+# -------------------------------
+def adf(series, lag: int | None = None, regression: str = "c", cache_key=None) -> dict:
+    """
+    Augmented Dickey-Fuller test on one series.
+
+    `lag=None` selects the lag by AIC (cached under `cache_key` if given);
+    the final regression uses the full sample for that lag, as `adfuller`.
+    """
+    y = np.asarray(pd.Series(series).dropna(), dtype=np.float64)
+    if lag is None:
+        lag = LAG_CACHE.get(cache_key, y, regression=regression) if cache_key is not None \
+            else int(select_lag(y, regression=regression)[0])
+
+    stat = float(adf_stats(y, lag, regression)[0])
+    nobs = len(y) - lag - 1
+    return {
+        "adf_stat": stat,
+        "p_value": mackinnon_p(stat, regression, 1),
+        "lag": lag,
+        "nobs": nobs,
+        "critical_values": critical_values(nobs, regression, 1),
+    }
+
+
+def engle_granger(y, x, lag: int | None = None, cache_key=None) -> dict:
+    """
+    Engle-Granger cointegration test: ADF (no deterministic terms) on the
+    residuals of y ~ a + b * x, priced with the two-variable MacKinnon
+    distribution, as `statsmodels.tsa.stattools.coint`.
+    """
+    df = pd.concat([pd.Series(y), pd.Series(x)], axis=1).dropna()
+    yv, xv = df.iloc[:, 0].to_numpy(np.float64), df.iloc[:, 1].to_numpy(np.float64)
+
+    xc = xv - xv.mean()
+    beta = float(xc @ (yv - yv.mean()) / (xc @ xc))
+    resid = yv - yv.mean() - beta * xc
+
+    if lag is None:
+        lag = LAG_CACHE.get(("eg", cache_key), resid, regression="n") if cache_key is not None \
+            else int(select_lag(resid, regression="n")[0])
+
+    stat = float(adf_stats(resid, lag, "n")[0])
+    nobs = len(resid) - lag - 1
+    return {
+        "eg_stat": stat,
+        "p_value": mackinnon_p(stat, "c", 2),
+        "beta": beta,
+        "lag": lag,
+        "critical_values": critical_values(nobs, "c", 2),
+    }
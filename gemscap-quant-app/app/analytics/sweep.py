@@ -0,0 +1,153 @@
+import itertools
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.analytics.regression import hedge_ratio, rolling_hedge_ratio
+from app.analytics.spread import compute_spread
+from app.analytics.zscore import zscore
+from app.analytics.backtest import simulate_pairs_trade
+from app.analytics.kalman import kalman_frame
+from app.analytics.pair_state import HEDGE_MODES
+from app.metrics import timed
+
+# aligned legs, set once per worker process by _init_worker
+_SERIES = {}
+
+# result fields a sweep can be ranked by -> True when higher is better
+SORT_FIELDS = {
+    "sharpe": True,
+    "total_pnl": True,
+    "avg_trade_pnl": True,
+    "win_rate": True,
+    "num_trades": True,
+    "max_drawdown": False,
+}
+
+
+def parse_grid(value: str, cast=float, limit: int | None = None) -> list:
+    """
+    "20,50,100" -> [20, 50, 100]; "1.5:3:0.5" -> [1.5, 2.0, 2.5, 3.0] (inclusive).
+    Raises ValueError for a non-positive step or more than `limit` values.
+    """
+    if ":" in value:
+        start, stop, step = (cast(v) for v in value.split(":"))
+        if step <= 0:
+            raise ValueError(f"step must be positive: {value}")
+        count = max(int(round((stop - start) / step)) + 1, 0)
+        if limit is not None and count > limit:
+            raise ValueError(f"{value} gives {count} values (max {limit})")
+        return [cast(round(start + i * step, 10)) for i in range(count)]
+    values = [cast(v) for v in value.split(",") if v.strip()]
+    if limit is not None and len(values) > limit:
+        raise ValueError(f"{len(values)} values (max {limit})")
+    return values
+
+
+def hedged_spread(y: pd.Series, x: pd.Series, mode: str, window: int) -> pd.Series:
+    if mode == "ols":
+        return compute_spread(y, x, hedge_ratio(x, y))
+    if mode == "rolling":
+        return (y - rolling_hedge_ratio(x, y, window) * x).dropna()
+    if mode == "kalman":
+        return kalman_frame(y, x)["spread"]
+    raise ValueError(f"Unknown hedge mode: {mode}")
+
+
+def _mp_context():
+    # never fork the API process itself: it runs ingestion and writer threads
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def _init_worker(index, y_values, x_values):
+    _SERIES["y"] = pd.Series(y_values, index=index)
+    _SERIES["x"] = pd.Series(x_values, index=index)
+
+
+def _run_group(mode: str, window: int, thresholds: list, stop_z, cost) -> tuple:
+    """
+    Builds spread and z-score once for (mode, window) and backtests every
+    (entry_z, exit_z) combination on them.
+    """
+    start = time.perf_counter()
+    spread = hedged_spread(_SERIES["y"], _SERIES["x"], mode, window)
+    z = zscore(spread, window)
+
+    df = pd.DataFrame({"spread": spread, "zscore": z}).dropna()
+
+    rows = []
+    for entry_z, exit_z in thresholds:
+        result = simulate_pairs_trade(df, entry_z=entry_z, exit_z=exit_z, stop_z=stop_z, cost=cost)
+        result.update(hedge_mode=mode, window=window, entry_z=entry_z, exit_z=exit_z)
+        rows.append(result)
+
+    return rows, time.perf_counter() - start
+
+
+@timed("sweep")
+def run_sweep(y: pd.Series, x: pd.Series, windows, entry_zs, exit_zs,
+              hedge_modes=("ols",), stop_z: float | None = None, cost: float = 0.0,
+              max_workers: int | None = None, sort_by: str = "sharpe",
+              top_k: int | None = None) -> dict:
+    """
+    Grid-search backtests over rolling window, entry/exit z and hedge mode
+    (ols, rolling or kalman).
+
+    Work is grouped by (hedge_mode, window) so each spread and z-score is
+    built once, and groups are fanned out over a process pool. The aligned
+    legs are shipped to each worker once, through the pool initializer,
+    instead of with every task. Workers are capped at the core count; with
+    a single worker everything runs in-process. Results come back ranked
+    by `sort_by` (one of SORT_FIELDS), best first.
+    """
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"sort_by must be one of {list(SORT_FIELDS)}")
+
+    thresholds = [(e, x_) for e, x_ in itertools.product(entry_zs, exit_zs) if x_ < e]
+    groups = list(itertools.product(hedge_modes, windows))
+    max_workers = min(max_workers or os.cpu_count() or 1, os.cpu_count() or 1, len(groups)) or 1
+
+    start = time.perf_counter()
+    args = (y.index, y.to_numpy(dtype=np.float64), x.to_numpy(dtype=np.float64))
+
+    if max_workers == 1:
+        _init_worker(*args)
+        outputs = [_run_group(mode, window, thresholds, stop_z, cost) for mode, window in groups]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=_mp_context(),
+            initializer=_init_worker,
+            initargs=args,
+        ) as pool:
+            futures = [
+                pool.submit(_run_group, mode, window, thresholds, stop_z, cost)
+                for mode, window in groups
+            ]
+            outputs = [f.result() for f in futures]
+
+    rows = [row for group_rows, _ in outputs for row in group_rows]
+    # smallest drawdown first, largest everything else
+    rows.sort(key=lambda r: r[sort_by], reverse=SORT_FIELDS[sort_by])
+
+    elapsed = time.perf_counter() - start
+    group_times = [t for _, t in outputs]
+
+    return {
+        "results": rows[:top_k] if top_k else rows,
+        "stats": {
+            "combinations": len(rows),
+            "groups": len(groups),
+            "workers": max_workers,
+            "bars": len(y),
+            "elapsed_sec": round(elapsed, 4),
+            "group_sec_mean": round(float(np.mean(group_times)), 4) if group_times else 0,
+            "group_sec_max": round(float(np.max(group_times)), 4) if group_times else 0,
+            "combinations_per_sec": round(len(rows) / elapsed, 1) if elapsed > 0 else None,
+        },
+    }
@@ -0,0 +1,77 @@
+import logging
+from fastapi import APIRouter
+
+from app.ingestion.binance_ws import BAR_STORE
+from app.api.deps import PAIR_STATES
+from app.analytics.alert_engine import AlertEngine, LogSink, QueueSink, WebhookSink
+from app.config import ALERT_WEBHOOK_URL, ALERT_COOLDOWN_SEC, ALERT_EVENT_HISTORY
+
+logger = logging.getLogger("alerts")
+router = APIRouter()
+
+EVENTS = QueueSink(maxlen=ALERT_EVENT_HISTORY)
+WEBHOOK = WebhookSink(ALERT_WEBHOOK_URL) if ALERT_WEBHOOK_URL else None
+
+# rules are evaluated on every closed bar, not when someone polls
+ENGINE = AlertEngine(PAIR_STATES, [LogSink(), EVENTS] + ([WEBHOOK] if WEBHOOK else []))
+BAR_STORE.add_listener(ENGINE.on_bar)
+
+
+# -------------------------------
+# RULES
+# -------------------------------
+@router.post("/alerts/rules")
+def add_rule(
+    kind: str,
+    symbol_y: str,
+    symbol_x: str,
+    threshold: float | None = None,
+    clear: float | None = None,
+    window: int = 50,
+    hedge_mode: str | None = None,
+    cooldown_sec: float = ALERT_COOLDOWN_SEC
+):
+    """
+    Registers a rule. `kind` is zscore, correlation, hedge_instability or
+    liquidity; `threshold` / `clear` default to the signal-quality levels.
+    """
+    try:
+        rule = ENGINE.add_rule(
+            kind, symbol_y, symbol_x,
+            threshold=threshold, clear=clear, window=window,
+            hedge_mode=hedge_mode, cooldown_sec=cooldown_sec
+        )
+        return rule.to_dict()
+    except ValueError as e:
+        return {"error": str(e)}
+
+
+@router.get("/alerts/rules")
+def list_rules():
+    return ENGINE.rules()
+
+
+@router.delete("/alerts/rules/{rule_id}")
+def delete_rule(rule_id: int):
+    if not ENGINE.remove_rule(rule_id):
+        return {"error": f"Unknown rule {rule_id}"}
+    return {"deleted": rule_id}
+
+
+# -------------------------------
+# EVENTS
+# -------------------------------
+@router.get("/alerts/events")
+def alert_events(limit: int = 100):
+    """
+    Most recent triggered / resolved notifications, oldest first.
+    """
+    return EVENTS.recent(max(limit, 0))
+
+
+@router.get("/alerts/stats")
+def alert_stats():
+    stats = ENGINE.stats()
+    if WEBHOOK is not None:
+        stats["webhook"] = {"sent": WEBHOOK.sent, "failed": WEBHOOK.failed, "dropped": WEBHOOK.dropped}
+    return stats
@@ -0,0 +1,208 @@
+from typing import Annotated
+
+import pandas as pd
+from fastapi import Query
+
+from app.ingestion.binance_ws import BAR_STORE
+from app.analytics.pair_state import PairStateRegistry, HEDGE_MODES, historical_snapshot
+from app.storage.parquet_archive import query_pair_bars
+from app.config import (
+    SYMBOLS, BAR_CAPACITY, RESAMPLE_INTERVALS, HISTORY_MAX_BARS, HISTORY_SETTLE_SEC, MAX_WINDOW
+)
+from app.metrics import timed
+from app.profiling import ACTIVE_PROFILE
+
+# one shared analytics snapshot per pair, rebuilt when a new bar closes
+PAIR_STATES = PairStateRegistry(BAR_STORE, history=BAR_CAPACITY)
+
+# rolling window query parameter; each distinct value gets its own engine
+Window = Annotated[int, Query(ge=2, le=MAX_WINDOW)]
+
+
+def parse_time(value: str | None) -> pd.Timestamp | None:
+    """
+    UTC timestamp from epoch milliseconds ("1760000000000") or ISO-8601
+    ("2025-10-09T09:00:00Z"; naive values are taken as UTC).
+    """
+    if value is None or not value.strip():
+        return None
+    value = value.strip()
+    if value.lstrip("-").isdigit():
+        return pd.Timestamp(int(value), unit="ms", tz="UTC")
+    ts = pd.Timestamp(value)
+    return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+
+def range_seq(end: pd.Timestamp | None, live_seq):
+    """
+    Version of a historical range ending at `end`: a constant once it has
+    settled (nothing newer than HISTORY_SETTLE_SEC can land in it), else
+    `live_seq()`, so open-ended and recent ranges follow the live bars.
+    """
+    if end is not None and end < pd.Timestamp.now("UTC") - pd.Timedelta(seconds=HISTORY_SETTLE_SEC):
+        return "settled"
+    return live_seq()
+
+
+def resolve_pair(symbol_y: str, symbol_x: str):
+    """
+    (symbol_y, symbol_x, error): the symbols lowercased, and an error
+    unless both are configured (SYMBOLS), so client input never keys new
+    pair state or bar builders.
+    """
+    symbol_y, symbol_x = symbol_y.strip().lower(), symbol_x.strip().lower()
+    unknown = [s for s in (symbol_y, symbol_x) if s not in SYMBOLS]
+    if unknown:
+        return symbol_y, symbol_x, f"Unknown symbol(s) {unknown}; configured: {SYMBOLS}"
+    return symbol_y, symbol_x, None
+
+
+class PairData:
+    """
+    The pair a request is about. Resolving it is a dict lookup, safe on
+    the event loop; `load` builds or reuses the bar-aligned snapshot and
+    belongs in the analytics executor.
+
+    Without `start` the snapshot is the live one (the in-memory bars, at
+    `interval` if it is one of RESAMPLE_INTERVALS). With `start` it is
+    built from the persisted ticks between `start` and `end` (default:
+    now), aggregated to `interval` bars in DuckDB.
+
+    A request that failed validation carries `error` and no state.
+    """
+
+    def __init__(self, symbol_y: str, symbol_x: str, state=None, start=None, end=None,
+                 interval: str | None = None, error=None):
+        self.symbol_y = symbol_y
+        self.symbol_x = symbol_x
+        self.state = state
+        self.start = start
+        self.end = end
+        self.interval = interval
+        self.error = error
+
+    @property
+    def historical(self) -> bool:
+        return self.start is not None
+
+    def __str__(self):
+        # part of the response cache key
+        text = f"{self.symbol_y}/{self.symbol_x}"
+        if self.interval is not None:
+            text += f"@{self.interval}"
+        if self.historical:
+            text += f"[{self.start.isoformat()},{self.end.isoformat() if self.end is not None else ''})"
+        return text
+
+    def seq(self):
+        """
+        Version of the data behind this request: the live bar sequence, or
+        a constant once a historical range has settled.
+        """
+        if self.state is None:
+            return None
+        if self.historical:
+            return range_seq(self.end, self.state.seq)
+        return self.state.seq()
+
+    def _load_range(self):
+        interval = self.interval or "1s"
+        end = self.end if self.end is not None else pd.Timestamp.now("UTC")
+        bars = int((end - self.start) / pd.Timedelta(interval))
+        if bars > HISTORY_MAX_BARS:
+            return None, {
+                "error": f"Range spans {bars} {interval} bars (max {HISTORY_MAX_BARS}); "
+                         "use a coarser interval or a shorter range"
+            }
+
+        with timed("history_query"):
+            frame = query_pair_bars(self.symbol_y, self.symbol_x, self.start, self.end, interval)
+        return historical_snapshot(frame, self.symbol_y, self.symbol_x, interval), None
+
+    def load(self, min_bars: int = 1, hedge_mode: str | None = None):
+        """
+        (snapshot, None) once the pair has `min_bars` aligned bars,
+        otherwise (None, error payload).
+        """
+        if self.error:
+            return None, {"error": self.error}
+        if hedge_mode is not None and hedge_mode not in HEDGE_MODES:
+            return None, {"error": f"hedge_mode must be one of {list(HEDGE_MODES)}"}
+
+        if self.historical:
+            snap, error = self._load_range()
+            if error:
+                return None, error
+            if len(snap) < min_bars:
+                return None, {"error": f"Only {len(snap)} bars in range, need {min_bars}"}
+            return snap, None
+
+        # a profiled request recomputes everything rather than timing memo hits
+        snap = self.state.snapshot(shared=ACTIVE_PROFILE.get() is None)
+        if len(snap) == 0:
+            return None, {"error": "Not enough data yet"}
+        if len(snap) < min_bars:
+            return None, {"error": "Waiting for more data"}
+        return snap, None
+
+
+async def pair_data(
+    symbol_y: str,
+    symbol_x: str,
+    start: str | None = None,
+    end: str | None = None,
+    interval: str | None = None
+) -> PairData:
+    """
+    Symbols are case-insensitive and must be configured (SYMBOLS);
+    `start` / `end` are epoch milliseconds or ISO-8601 (UTC); `interval`
+    is a bar size such as "1s", "15s" or "1h".
+    """
+    symbol_y, symbol_x, error = resolve_pair(symbol_y, symbol_x)
+    if error:
+        return PairData(symbol_y, symbol_x, error=error)
+
+    try:
+        start, end = parse_time(start), parse_time(end)
+    except ValueError as e:
+        return PairData(symbol_y, symbol_x, error=f"Invalid start/end: {e}")
+
+    error = None
+    if interval is not None:
+        try:
+            if pd.Timedelta(interval) <= pd.Timedelta(0):
+                error = "interval must be positive"
+        except ValueError:
+            error = f"Invalid interval: {interval}"
+    if error is None:
+        if start is None and end is not None:
+            error = "end requires start"
+        elif start is not None and end is not None and end <= start:
+            error = "end must be after start"
+        elif start is None and interval is not None and interval not in RESAMPLE_INTERVALS:
+            error = f"Live interval must be one of {RESAMPLE_INTERVALS}; pass start for others"
+
+    if error:
+        return PairData(symbol_y, symbol_x, start=start, end=end, interval=interval, error=error)
+
+    # historical requests follow the live 1s sequence until their range settles
+    live = interval if start is None and interval is not None else "1s"
+    return PairData(symbol_y, symbol_x, PAIR_STATES.get(symbol_y, symbol_x, live),
+                    start, end, interval)
+
+
+def pair_seq(pair: PairData, **_):
+    return pair.seq()
+
+
+def bars_seq(symbol: str, end: str | None = None, **_):
+    """
+    Cache version of one symbol's historical bars: the live 1s bar
+    sequence until the range settles.
+    """
+    try:
+        end = parse_time(end)
+    except ValueError:
+        return None
+    symbol = symbol.lower()
+    return range_seq(end, lambda: BAR_STORE.seq(symbol))
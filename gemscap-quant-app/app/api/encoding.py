@@ -0,0 +1,142 @@
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON = "application/json"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
+# Accept type for the columnar JSON layout (served as application/json)
+COLUMNAR_JSON = "application/vnd.gemscap.columnar+json"
+
+# records: the original list of {"ts": "...", ...} rows
+# columnar: one array per column, ts as epoch milliseconds
+# arrow: Arrow IPC stream, ts as timestamp[ns, UTC]
+FORMATS = ("records", "columnar", "arrow")
+
+
+# -------------------------------
+# JSON
+# -------------------------------
+def _default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload) -> bytes:
+    return json.dumps(payload, default=_default, separators=(",", ":")).encode()
+
+
+def _dumps_columns(payload) -> bytes:
+    """
+    JSON for payloads holding NumPy arrays; NaN is written as null.
+    """
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    def plain(value):
+        if isinstance(value, dict):
+            return {k: plain(v) for k, v in value.items()}
+        if isinstance(value, np.ndarray):
+            if value.dtype.kind == "f":
+                return [None if v != v else v for v in value.tolist()]
+            return value.tolist()
+        return value
+    return dumps(plain(payload))
+
+
+# -------------------------------
+# Columnar payloads
+# -------------------------------
+class Table:
+    """
+    A route payload made of a UTC DatetimeIndex, equal-length value
+    columns and scalar `meta` fields, encoded per request:
+
+        records   {key: [{"ts": "2025-01-01 00:00:00+00:00", col: v}, ...], **meta}
+        columnar  {key: {"ts": [epoch ms, ...], col: [...]}, **meta}
+        arrow     one record batch; meta as JSON in the schema metadata
+
+    With key=None and no meta, records is the bare list of rows.
+    """
+
+    def __init__(self, ts: pd.DatetimeIndex, columns: dict, meta: dict | None = None,
+                 key: str | None = "data"):
+        self.ts = ts
+        self.columns = {name: np.asarray(values) for name, values in columns.items()}
+        self.meta = meta or {}
+        self.key = key
+
+    def select(self, rows) -> "Table":
+        """
+        The rows at `rows` (a slice or an array of positions).
+        """
+        return Table(self.ts[rows], {
+            name: values[rows] for name, values in self.columns.items()
+        }, self.meta, self.key)
+
+    def __len__(self):
+        return len(self.ts)
+
+    def _wrap(self, data):
+        if self.key is None and not self.meta:
+            return data
+        return {self.key or "data": data, **self.meta}
+
+    def records(self) -> bytes:
+        rows = pd.DataFrame({"ts": self.ts.astype(str), **self.columns}).to_dict("records")
+        return dumps(self._wrap(rows))
+
+    def columnar(self) -> bytes:
+        ts_ms = self.ts.as_unit("ns").asi8 // 1_000_000
+        columns = {name: np.ascontiguousarray(values) for name, values in self.columns.items()}
+        return _dumps_columns(self._wrap({"ts": ts_ms, **columns}))
+
+    def arrow(self) -> bytes:
+        ts = pa.array(self.ts.as_unit("ns").asi8, type=pa.int64()).cast(pa.timestamp("ns", tz="UTC"))
+        batch = pa.record_batch(
+            [ts] + [pa.array(values) for values in self.columns.values()],
+            names=["ts"] + list(self.columns),
+        )
+        if self.meta:
+            batch = batch.replace_schema_metadata({"meta": dumps(self.meta)})
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as writer:
+            writer.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+
+
+def negotiate(accept: str, fmt: str | None) -> str | None:
+    """
+    The response format: `fmt` (the `format` query parameter) if given,
+    else from the Accept header, else records. None if `fmt` is unknown.
+    """
+    if fmt:
+        return fmt if fmt in FORMATS else None
+    if ARROW_STREAM in accept:
+        return "arrow"
+    if COLUMNAR_JSON in accept:
+        return "columnar"
+    return "records"
+
+
+def encode(payload, fmt: str = "records") -> tuple[bytes, str]:
+    """
+    (body, media type) of a route payload. Only Tables change with the
+    format; everything else (including error dicts) stays JSON.
+    """
+    if not isinstance(payload, Table):
+        return dumps(payload), JSON
+    if fmt == "arrow":
+        return payload.arrow(), ARROW_STREAM
+    if fmt == "columnar":
+        return payload.columnar(), JSON
+    return payload.records(), JSON
@@ -0,0 +1,100 @@
+import asyncio
+import contextvars
+import functools
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import ANALYTICS_WORKERS, ENDPOINT_CONCURRENCY
+from app.metrics import REGISTRY
+from app.profiling import attached
+
+# endpoints that need a tighter limit than ENDPOINT_CONCURRENCY
+ENDPOINT_LIMITS = {
+    "backtest_sweep": 1,  # run_sweep already fans out over processes
+    "scan": 2,
+}
+
+EXECUTOR = ThreadPoolExecutor(max_workers=ANALYTICS_WORKERS, thread_name_prefix="analytics")
+
+QUEUE_SECONDS = REGISTRY.histogram(
+    "gq_executor_wait_seconds", "Time a computation waited for its endpoint's slot", ("endpoint",)
+)
+RUN_SECONDS = REGISTRY.histogram(
+    "gq_executor_run_seconds", "Time from slot acquired to result, including pool queueing", ("endpoint",)
+)
+
+
+class EndpointLimiter:
+    """
+    One semaphore per endpoint, so a burst of heavy requests (sweeps,
+    backtests) queues behind its own limit instead of taking every
+    executor thread from cheap endpoints.
+    """
+
+    def __init__(self, default: int, overrides: dict):
+        self.default = default
+        self.overrides = dict(overrides)
+        self._sems = {}
+        self.waiting = {}
+        self.running = {}
+        self.completed = {}
+
+    def limit(self, endpoint: str) -> int:
+        return self.overrides.get(endpoint, self.default)
+
+    def semaphore(self, endpoint: str) -> asyncio.Semaphore:
+        sem = self._sems.get(endpoint)
+        if sem is None:
+            sem = self._sems[endpoint] = asyncio.Semaphore(self.limit(endpoint))
+        return sem
+
+    def stats(self) -> dict:
+        return {
+            endpoint: {
+                "limit": self.limit(endpoint),
+                "running": self.running.get(endpoint, 0),
+                "waiting": self.waiting.get(endpoint, 0),
+                "completed": self.completed.get(endpoint, 0),
+            }
+            for endpoint in self._sems
+        }
+
+
+LIMITER = EndpointLimiter(ENDPOINT_CONCURRENCY, ENDPOINT_LIMITS)
+
+
+def _call(fn, args, kwargs):
+    # joins the request's profile, if it asked for one
+    with attached():
+        return fn(*args, **kwargs)
+
+
+async def run_blocking(endpoint: str, fn, *args, **kwargs):
+    """
+    Runs `fn` on the analytics pool under the endpoint's concurrency
+    limit, with the caller's contextvars, and awaits the result.
+    """
+    sem = LIMITER.semaphore(endpoint)
+    LIMITER.waiting[endpoint] = LIMITER.waiting.get(endpoint, 0) + 1
+    start = time.perf_counter()
+    try:
+        await sem.acquire()
+    finally:
+        LIMITER.waiting[endpoint] -= 1
+
+    acquired = time.perf_counter()
+    QUEUE_SECONDS.labels(endpoint).observe(acquired - start)
+    LIMITER.running[endpoint] = LIMITER.running.get(endpoint, 0) + 1
+    try:
+        ctx = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(EXECUTOR, functools.partial(ctx.run, _call, fn, args, kwargs))
+    finally:
+        RUN_SECONDS.labels(endpoint).observe(time.perf_counter() - acquired)
+        LIMITER.running[endpoint] -= 1
+        LIMITER.completed[endpoint] = LIMITER.completed.get(endpoint, 0) + 1
+        sem.release()
+
+
+def executor_stats() -> dict:
+    return {"workers": ANALYTICS_WORKERS, "endpoints": LIMITER.stats()}
@@ -0,0 +1,240 @@
+import asyncio
+import logging
+import math
+
+import pandas as pd
+
+logger = logging.getLogger("hub")
+
+SNAPSHOT_POINTS = 300
+CLIENT_QUEUE_SIZE = 256
+
+
+def _points(df) -> dict:
+    """
+    Columnar points with epoch-ms timestamps; NaN becomes null.
+    """
+    return {
+        "ts": (df.index.as_unit("ns").asi8 // 1_000_000).tolist(),
+        **{
+            col: [None if math.isnan(v) else v for v in df[col].tolist()]
+            for col in df.columns
+        },
+    }
+
+
+class Channel:
+    """
+    One subscription key (pair, window, hedge mode, alert threshold).
+
+    Updates are computed once per closed bar and fanned out to every
+    subscriber, so cost follows the bar rate rather than the viewer count.
+    `last_ts` marks the newest point already sent; each update carries
+    only the points after it.
+
+    With hedge_mode=ols every point depends on the full-sample beta, which
+    moves as bars arrive. Points sent earlier would then mix betas, so a
+    beta change resends the whole tail as a "snapshot" instead of a delta.
+    """
+
+    def __init__(self, key: tuple):
+        self.key = key
+        self.symbol_y, self.symbol_x, self.window, self.hedge_mode, self.threshold = key
+        self.clients = set()
+        self.last_ts = None
+        self.tail = None
+        self.beta = None
+        self.triggered = None
+        self.pending = False
+        self.dirty = False
+        self.ready = asyncio.Event()
+
+    def describe(self) -> dict:
+        return {
+            "symbol_y": self.symbol_y, "symbol_x": self.symbol_x, "window": self.window,
+            "hedge_mode": self.hedge_mode, "threshold": self.threshold,
+        }
+
+    def compute(self, pair_states):
+        """
+        Runs off the event loop. Returns (points, (alert state, alert
+        transitions), full, beta) without touching the channel, where
+        `full` means the points replace the tail; `apply` commits on the
+        loop.
+        """
+        snap = pair_states.snapshot(self.symbol_y, self.symbol_x)
+        if len(snap) < self.window:
+            return None, None, False, None
+
+        z = snap.zscore(self.window, self.hedge_mode)
+        if len(z) == 0:
+            return None, None, False, None
+
+        spread = snap.spread_series(self.window, self.hedge_mode)
+        beta = snap.hedge_series(self.window, self.hedge_mode)
+        df = spread.to_frame("spread").join(z.rename("zscore"), how="inner")
+        df["beta"] = beta.reindex(df.index)
+
+        if self.last_ts is None:
+            # first fill: current state only, history is not replayed as alerts
+            return df.tail(SNAPSHOT_POINTS), (abs(float(z.iloc[-1])) > self.threshold, []), True, snap.beta
+
+        new = df[df.index.as_unit("ns").asi8 > self.last_ts]
+
+        # every threshold crossing among the new points, not just the last one
+        alerts = []
+        triggered = self.triggered
+        for ts, zv in zip(new.index.as_unit("ns").asi8.tolist(), new["zscore"].tolist()):
+            state = abs(zv) > self.threshold
+            if state != triggered:
+                if triggered is not None:
+                    alerts.append({"type": "alert", "ts": ts // 1_000_000, "triggered": state, "zscore": zv})
+                triggered = state
+
+        if self.hedge_mode == "ols" and len(new) and snap.beta != self.beta:
+            return df.tail(SNAPSHOT_POINTS), (triggered, alerts), True, snap.beta
+        return new, (triggered, alerts), False, snap.beta
+
+    def apply(self, df, alerts, full: bool = False, beta=None) -> list:
+        """
+        Commits a computed update and returns the messages to fan out.
+        """
+        if df is None or len(df) == 0:
+            return []
+
+        self.last_ts = int(df.index.as_unit("ns").asi8[-1])
+        self.beta = beta
+        self.triggered, transitions = alerts
+        if full or self.tail is None:
+            self.tail = df
+            return [self.snapshot_message()] + transitions
+        self.tail = pd.concat([self.tail, df]).iloc[-SNAPSHOT_POINTS:]
+        return [{"type": "update", "points": _points(df)}] + transitions
+
+    def snapshot_message(self) -> dict:
+        return {
+            "type": "snapshot",
+            "subscription": self.describe(),
+            "points": _points(self.tail) if self.tail is not None else None,
+            "alert": {"triggered": bool(self.triggered)},
+        }
+
+
+class AnalyticsHub:
+    """
+    Pushes spread / z-score / beta deltas and alert transitions to
+    WebSocket and SSE subscribers as bars close.
+
+    BarStore calls `on_bar` inside ingestion, which runs on the event
+    loop (MarketStream, or the shared-memory follower). The hub only
+    schedules the refresh with call_soon_threadsafe, so the ingest batch
+    is not held up, and bars closed off the loop are safe too. It
+    coalesces notifications per channel while a refresh is in flight,
+    and computes each refresh in a worker thread so the loop never blocks
+    on analytics.
+    """
+
+    def __init__(self, pair_states, interval: str = "1s"):
+        self.pair_states = pair_states
+        self.interval = interval
+        self.loop = None
+        self._channels = {}
+        self._by_symbol = {}
+
+    def on_bar(self, symbol: str, interval: str, seq: int):
+        if interval != self.interval or symbol not in self._by_symbol or self.loop is None:
+            return
+        try:
+            self.loop.call_soon_threadsafe(self._schedule, symbol)
+        except RuntimeError:
+            # loop closed during shutdown
+            pass
+
+    def _schedule(self, symbol: str):
+        for key in self._by_symbol.get(symbol, ()):
+            channel = self._channels[key]
+            channel.dirty = True
+            if not channel.pending:
+                channel.pending = True
+                self.loop.create_task(self._refresh(channel))
+
+    async def _refresh(self, channel: Channel):
+        try:
+            while channel.dirty:
+                channel.dirty = False
+                update = await asyncio.to_thread(channel.compute, self.pair_states)
+                self._publish(channel, channel.apply(*update))
+        except Exception:
+            logger.exception(f"Stream refresh failed for {channel.key}")
+        finally:
+            channel.pending = False
+
+    def _publish(self, channel: Channel, messages: list):
+        for queue in list(channel.clients):
+            for msg in messages:
+                try:
+                    queue.put_nowait(msg)
+                except asyncio.QueueFull:
+                    # slow consumer: drop its backlog and resend the full state
+                    while not queue.empty():
+                        queue.get_nowait()
+                    queue.put_nowait(channel.snapshot_message())
+                    break
+
+    async def subscribe(self, key: tuple) -> asyncio.Queue:
+        """
+        Registers a subscriber; the returned queue starts with a snapshot
+        of the last SNAPSHOT_POINTS points, followed by deltas.
+        """
+        self.loop = asyncio.get_running_loop()
+        while True:
+            channel = self._channels.get(key)
+            if channel is None:
+                channel = self._channels[key] = Channel(key)
+                for symbol in (channel.symbol_y, channel.symbol_x):
+                    self._by_symbol.setdefault(symbol, set()).add(key)
+
+            if channel.ready.is_set():
+                break
+            if not channel.pending:
+                channel.dirty = channel.pending = True
+                try:
+                    await self._refresh(channel)
+                finally:
+                    # waiters must not hang if this subscriber goes away
+                    channel.ready.set()
+                break
+            await channel.ready.wait()
+            if self._channels.get(key) is channel:
+                break
+            # whoever built it left and the channel was dropped: start over
+
+        queue = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        queue.put_nowait(channel.snapshot_message())
+        channel.clients.add(queue)
+        return queue
+
+    def unsubscribe(self, key: tuple, queue: asyncio.Queue | None):
+        """
+        Removes a subscriber (`queue` is None if `subscribe` never
+        returned); the channel goes with its last one unless it is still
+        being built for a subscriber that is waiting.
+        """
+        channel = self._channels.get(key)
+        if channel is None:
+            return
+        channel.clients.discard(queue)
+        if not channel.clients and channel.ready.is_set():
+            del self._channels[key]
+            for symbol in (channel.symbol_y, channel.symbol_x):
+                keys = self._by_symbol.get(symbol)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._by_symbol[symbol]
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": sum(len(c.clients) for c in self._channels.values()),
+        }
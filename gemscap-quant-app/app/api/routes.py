@@ -1,58 +1,66 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Response
+from fastapi.responses import FileResponse
 import pandas as pd
 import logging
 
-from app.ingestion.binance_ws import TICK_BUFFER
-from app.analytics.resample import resample_ticks
-from app.analytics.regression import hedge_ratio
-from app.analytics.spread import compute_spread
-from app.analytics.zscore import zscore
+from app.ingestion.binance_ws import BAR_STORE, TICK_WRITER, MARKET_STREAM
 from app.analytics.alerts import check_zscore_alert
-from app.analytics.adf import adf_test
-from app.analytics.regression import rolling_hedge_ratio
-from app.analytics.half_life import half_life
-from app.cache.redis_client import get_cache, set_cache
-from app.analytics.signal_quality import signal_quality
+from app.cache.response_cache import CACHE, cached_response
 from app.analytics.trade_guard import trade_allowed
-from app.analytics.signal_quality import signal_quality
 from app.analytics.backtest import simulate_pairs_trade
+from app.analytics.pair_state import HEDGE_MODES
+from app.analytics.signal_quality import MIN_POINTS
+from app.analytics.sweep import parse_grid, run_sweep, SORT_FIELDS
+from app.analytics.scanner import UniverseScanner, RANK_FIELDS
+from app.analytics.downsample import downsample as downsample_points, DOWNSAMPLE_METHODS
+from app.api.deps import PairData, Window, pair_data, pair_seq, bars_seq, parse_time
+from app.api.encoding import Table
+from app.storage.parquet_archive import query_bars
+from app.api.executor import executor_stats
+from app.metrics import REGISTRY, CONTENT_TYPE
+from app.profiling import SLOW_LOG, PROFILES, profile_path
+from app.ingestion.shm_follower import SHM_FOLLOWER
+from app.config import (
+    SYMBOLS, SCAN_LOOKBACK, INGEST_MODE, HISTORY_MAX_BARS, MAX_WINDOW, SWEEP_MAX_RUNS
+)
 
 logger = logging.getLogger("routes")
 router = APIRouter()
 
+# all-pairs statistics over the configured symbol universe
+SCANNER = UniverseScanner(BAR_STORE, SYMBOLS, lookback=SCAN_LOOKBACK)
+
+# rows returned by the live chart endpoints
+LIVE_TAIL = 300
+
+
+def chart_rows(series: pd.Series, historical: bool, max_points: int, method: str):
+    """
+    Positional selector for chart output: the latest LIVE_TAIL rows live,
+    or at most `max_points` picked by `method` over a historical range.
+    """
+    if not historical:
+        return slice(-LIVE_TAIL, None)
+    return downsample_points(series.index.as_unit("ns").asi8, series.to_numpy(), max_points, method)
+
 
 # -------------------------------
 # Z-SCORE ALERT ENDPOINT
 # -------------------------------
 @router.get("/alert/zscore")
+@cached_response("zscore", pair_seq)
 def zscore_alert(
-    symbol_y: str,
-    symbol_x: str,
-    window: int = 50,
-    threshold: float = 2.0
+    pair: PairData = Depends(pair_data),
+    window: Window = 50,
+    threshold: float = 2.0,
+    hedge_mode: str = "ols"
 ):
     try:
-        y_raw = pd.DataFrame(list(TICK_BUFFER[symbol_y]))
-        x_raw = pd.DataFrame(list(TICK_BUFFER[symbol_x]))
-
-        if y_raw.empty or x_raw.empty:
-            return {"error": "Not enough data yet"}
-
-        y = resample_ticks(y_raw, "1s")
-        x = resample_ticks(x_raw, "1s")
+        snap, error = pair.load(window, hedge_mode)
+        if error:
+            return error
 
-        common_index = y.index.intersection(x.index)
-        y = y.loc[common_index]
-        x = x.loc[common_index]
-
-        if len(y) < window:
-            return {"error": "Waiting for more data"}
-
-        beta = hedge_ratio(x, y)
-        spread = compute_spread(y, x, beta)
-        z = zscore(spread, window)
-
-        return check_zscore_alert(z, threshold)
+        return check_zscore_alert(snap.zscore(window, hedge_mode), threshold)
     except Exception as e:
         logger.error(f"Error in zscore_alert: {str(e)}", exc_info=True)
         return {"error": str(e)}
@@ -62,58 +70,36 @@ def zscore_alert(
 # SPREAD + Z-SCORE ANALYTICS
 # -------------------------------
 @router.get("/analytics/spread")
+@cached_response("spread", pair_seq, tabular=True)
 def spread_analytics(
-    symbol_y: str,
-    symbol_x: str,
-    window: int = 50
+    pair: PairData = Depends(pair_data),
+    window: Window = 50,
+    hedge_mode: str = "ols",
+    max_points: int = 1000,
+    downsample: str = "lttb"
 ):
+    if downsample not in DOWNSAMPLE_METHODS:
+        return {"error": f"downsample must be one of {list(DOWNSAMPLE_METHODS)}"}
     try:
-        cache_key = f"{symbol_y}:{symbol_x}:{window}"
-        cached = get_cache(cache_key)
-        
-        if cached:
-            return cached
-        
-        y_raw = pd.DataFrame(list(TICK_BUFFER[symbol_y]))
-        x_raw = pd.DataFrame(list(TICK_BUFFER[symbol_x]))
-
-        if y_raw.empty or x_raw.empty:
-            return {"error": "Not enough data yet"}
-
-        y = resample_ticks(y_raw, "1s")
-        x = resample_ticks(x_raw, "1s")
+        snap, error = pair.load(window, hedge_mode)
+        if error:
+            return error
 
-        common_index = y.index.intersection(x.index)
-        y = y.loc[common_index]
-        x = x.loc[common_index]
-
-        if len(y) < window:
-            return {"error": "Waiting for more data"}
-
-        beta = hedge_ratio(x, y)
-        spread = compute_spread(y, x, beta)
-        z = zscore(spread, window)
+        spread = snap.spread_series(window, hedge_mode)
+        z = snap.zscore(window, hedge_mode)
 
         # Align spread and zscore by their common index
         common_idx = spread.index.intersection(z.index)
         spread_aligned = spread.loc[common_idx]
         z_aligned = z.loc[common_idx]
 
-        result = pd.DataFrame({
-            "ts": spread_aligned.index.astype(str),
+        hl = snap.half_life()
+        rows = chart_rows(spread_aligned, pair.historical, max_points, downsample)
+
+        return Table(common_idx, {
             "spread": spread_aligned.values,
             "zscore": z_aligned.values
-        })
-
-        hl = half_life(spread)
-
-        response = {
-            "data": result.tail(300).to_dict("records"),
-            "half_life": float(hl) if hl is not None else None
-        }
-        
-        set_cache(cache_key, response)
-        return response
+        }, meta={"half_life": float(hl) if hl is not None else None}).select(rows)
     except Exception as e:
         logger.error(f"Error in spread_analytics: {str(e)}", exc_info=True)
         return {"error": str(e)}
@@ -123,73 +109,97 @@ def spread_analytics(
 # ADF TEST ENDPOINT
 # -------------------------------
 @router.get("/analytics/adf")
-def adf(symbol_y: str, symbol_x: str):
+@cached_response("adf", pair_seq)
+def adf(pair: PairData = Depends(pair_data)):
     try:
-        y_raw = pd.DataFrame(list(TICK_BUFFER[symbol_y]))
-        x_raw = pd.DataFrame(list(TICK_BUFFER[symbol_x]))
-
-        if y_raw.empty or x_raw.empty:
-            return {"error": "Not enough data yet"}
-
-        y = resample_ticks(y_raw, "1s")
-        x = resample_ticks(x_raw, "1s")
-
-        common_index = y.index.intersection(x.index)
-        y = y.loc[common_index]
-        x = x.loc[common_index]
-
-        if len(y) < 50:
-            return {"error": "Waiting for more data"}
-
-        beta = hedge_ratio(x, y)
-        spread = compute_spread(y, x, beta)
+        snap, error = pair.load(50)
+        if error:
+            return error
 
-        return adf_test(spread)
+        return snap.adf()
     except Exception as e:
         logger.error(f"Error in adf: {str(e)}", exc_info=True)
         return {"error": str(e)}
 
 
 @router.get("/analytics/hedge_ratio")
-def hedge_ratio_rolling(symbol_y: str, symbol_x: str, window: int = 50):
+@cached_response("hedge_ratio", pair_seq, tabular=True)
+def hedge_ratio_rolling(
+    pair: PairData = Depends(pair_data),
+    window: Window = 50,
+    hedge_mode: str = "rolling",
+    max_points: int = 1000,
+    downsample: str = "lttb"
+):
+    if downsample not in DOWNSAMPLE_METHODS:
+        return {"error": f"downsample must be one of {list(DOWNSAMPLE_METHODS)}"}
     try:
-        y_raw = pd.DataFrame(list(TICK_BUFFER[symbol_y]))
-        x_raw = pd.DataFrame(list(TICK_BUFFER[symbol_x]))
-
-        y = resample_ticks(y_raw, "1s")
-        x = resample_ticks(x_raw, "1s")
-
-        common = y.index.intersection(x.index)
-        y, x = y.loc[common], x.loc[common]
+        snap, error = pair.load(1, hedge_mode)
+        if error:
+            return error
 
-        hr = rolling_hedge_ratio(x, y, window)
+        hr = snap.hedge_series(window, hedge_mode).dropna()
+        rows = chart_rows(hr, pair.historical, max_points, downsample)
 
-        return pd.DataFrame({
-            "ts": hr.index.astype(str),
-            "hedge_ratio": hr.values
-        }).dropna().tail(300).to_dict("records")
+        return Table(hr.index, {"hedge_ratio": hr.values}, key=None).select(rows)
     except Exception as e:
         logger.error(f"Error in hedge_ratio_rolling: {str(e)}", exc_info=True)
         return {"error": str(e)}
-    
-@router.get("/analytics/signal-quality")
-def get_signal_quality(symbol_y: str, symbol_x: str):
+
+
+# -------------------------------
+# HISTORICAL BARS
+# -------------------------------
+@router.get("/history/bars")
+@cached_response("history_bars", bars_seq, tabular=True)
+def history_bars(
+    symbol: str,
+    start: str,
+    end: str | None = None,
+    interval: str = "1min",
+    max_points: int = 1000,
+    downsample: str = "lttb"
+):
+    """
+    OHLCV / VWAP bars of one symbol from the persisted ticks, aggregated in
+    DuckDB. Ranges with more than `max_points` bars are downsampled on the
+    close (minmax keeps each bucket's extremes).
+    """
+    if downsample not in DOWNSAMPLE_METHODS:
+        return {"error": f"downsample must be one of {list(DOWNSAMPLE_METHODS)}"}
     try:
-        y_raw = pd.DataFrame(list(TICK_BUFFER[symbol_y]))
-        x_raw = pd.DataFrame(list(TICK_BUFFER[symbol_x]))
+        start_ts, end_ts = parse_time(start), parse_time(end)
+        step = pd.Timedelta(interval)
+    except ValueError as e:
+        return {"error": f"Invalid range or interval: {e}"}
 
-        if y_raw.empty or x_raw.empty:
-            return {"error": "Not enough data"}
+    span = (end_ts if end_ts is not None else pd.Timestamp.now("UTC")) - start_ts
+    if step <= pd.Timedelta(0) or span / step > HISTORY_MAX_BARS:
+        return {"error": f"interval must be positive and give at most {HISTORY_MAX_BARS} bars"}
+
+    try:
+        bars = query_bars(symbol.lower(), start_ts, end_ts, interval)
+        rows = chart_rows(bars["close"], True, max_points, downsample)
+        return Table(bars.index, {
+            name: bars[name].to_numpy() for name in bars.columns
+        }, meta={"bars": len(bars)}).select(rows)
+    except Exception as e:
+        logger.error(f"Error in history_bars: {str(e)}", exc_info=True)
+        return {"error": str(e)}
 
-        # ✅ ALWAYS resample (critical)
-        y = resample_ticks(y_raw, "1s")
-        x = resample_ticks(x_raw, "1s")
 
-        common_index = y.index.intersection(x.index)
-        y = y.loc[common_index]
-        x = x.loc[common_index]
+# -------------------------------
+# SIGNAL QUALITY + TRADE GUARD
+# -------------------------------
+@router.get("/analytics/signal-quality")
+@cached_response("signal_quality", pair_seq)
+def get_signal_quality(pair: PairData = Depends(pair_data)):
+    try:
+        snap, error = pair.load()
+        if error:
+            return error
 
-        if len(y) < 60:
+        if len(snap) < MIN_POINTS:
             return {
                 "quality": "LOW",
                 "reason": "Insufficient data",
@@ -199,28 +209,7 @@ def get_signal_quality(symbol_y: str, symbol_x: str):
                 "liquidity_ok": False
             }
 
-        # Volume handling (robust)
-        if "size" in y_raw.columns:
-            volume = y_raw.set_index("ts")["size"].reindex(common_index).fillna(1)
-        elif "qty" in y_raw.columns:
-            volume = y_raw.set_index("ts")["qty"].reindex(common_index).fillna(1)
-        else:
-            volume = pd.Series(1, index=common_index)
-
-        beta = hedge_ratio(x, y)
-        spread = compute_spread(y, x, beta)
-
-        hedge_series = (
-            y.rolling(50).cov(x) / x.rolling(50).var()
-        )
-
-        return signal_quality(
-            spread=spread,
-            y=y,
-            x=x,
-            volume=volume,
-            hedge_ratio_series=hedge_series
-        )
+        return snap.quality()
 
     except Exception as e:
         logger.error(f"Error in signal-quality: {str(e)}", exc_info=True)
@@ -231,9 +220,11 @@ def get_signal_quality(symbol_y: str, symbol_x: str):
 
 
 @router.get("/analytics/trade-allowed")
-def trade_guard(symbol_y: str, symbol_x: str):
-    sq = get_signal_quality(symbol_y, symbol_x)
-    
+@cached_response("trade_allowed", pair_seq)
+def trade_guard(pair: PairData = Depends(pair_data)):
+    snap, error = pair.load()
+    sq = error or snap.quality()
+
     if "error" in sq:
         return {
             "allowed": False,
@@ -242,61 +233,172 @@ def trade_guard(symbol_y: str, symbol_x: str):
 
     return trade_allowed(sq)
 
-@router.get("/analytics/signal-quality")
-def get_signal_quality(symbol_y: str, symbol_x: str):
-    try:
-        y_df = pd.DataFrame(list(TICK_BUFFER[symbol_y]))
-        x_df = pd.DataFrame(list(TICK_BUFFER[symbol_x]))
 
-        if y_df.empty or x_df.empty:
-            return {"error": "Not enough data"}
+# -------------------------------
+# BACKTEST
+# -------------------------------
+@router.get("/analytics/backtest")
+@cached_response("backtest", pair_seq)
+def backtest(
+    pair: PairData = Depends(pair_data),
+    window: Window = 50,
+    entry_z: float = 2.0,
+    exit_z: float = 0.0,
+    stop_z: float | None = None,
+    cost: float = 0.0,
+    hedge_mode: str = "ols"
+):
+    snap, error = pair.load(1, hedge_mode)
+    if error:
+        return error
+
+    df = pd.DataFrame({
+        "spread": snap.spread_series(window, hedge_mode),
+        "zscore": snap.zscore(window, hedge_mode)
+    }).dropna()
+
+    if len(df) < window:
+        return {"error": "Not enough data for backtest"}
 
-        y = y_df.set_index("ts")["price"]
-        x = x_df.set_index("ts")["price"]
+    return simulate_pairs_trade(
+        df, entry_z=entry_z, exit_z=exit_z, stop_z=stop_z, cost=cost
+    )
 
-        volume = y_df.set_index("ts").get("size", None)
 
-        hedge_series = y.rolling(50).cov(x) / x.rolling(50).var()
+# -------------------------------
+# BACKTEST PARAMETER SWEEP
+# -------------------------------
+@router.get("/analytics/backtest/sweep")
+@cached_response("backtest_sweep", pair_seq)
+def backtest_sweep(
+    pair: PairData = Depends(pair_data),
+    windows: str = "20,50,100",
+    entry_z: str = "1.5:2.5:0.5",
+    exit_z: str = "0,0.5",
+    hedge_modes: str = "ols",
+    stop_z: float | None = None,
+    cost: float = 0.0,
+    sort_by: str = "sharpe",
+    top_k: int = 20,
+    workers: int | None = None
+):
+    """
+    Grid of backtests. Each of windows / entry_z / exit_z is either a
+    comma list ("20,50,100") or an inclusive range ("1.5:2.5:0.5").
+    """
+    if sort_by not in SORT_FIELDS:
+        return {"error": f"sort_by must be one of {list(SORT_FIELDS)}"}
 
-        spread = compute_spread(y, x, hedge_ratio(x, y))
+    try:
+        window_grid = parse_grid(windows, int, SWEEP_MAX_RUNS)
+        entry_grid = parse_grid(entry_z, limit=SWEEP_MAX_RUNS)
+        exit_grid = parse_grid(exit_z, limit=SWEEP_MAX_RUNS)
+        modes = [m.strip() for m in hedge_modes.split(",") if m.strip()]
+    except ValueError as e:
+        return {"error": f"Invalid grid: {e}"}
+
+    unknown = [m for m in modes if m not in HEDGE_MODES]
+    if unknown:
+        return {"error": f"Unknown hedge mode(s): {unknown}"}
+
+    if not window_grid or not entry_grid or not exit_grid or not modes:
+        return {"error": "Empty parameter grid"}
+    if min(window_grid) < 2 or max(window_grid) > MAX_WINDOW:
+        return {"error": f"windows must be between 2 and {MAX_WINDOW}"}
+
+    runs = len(window_grid) * len(entry_grid) * len(exit_grid) * len(modes)
+    if runs > SWEEP_MAX_RUNS:
+        return {"error": f"Grid has {runs} combinations (max {SWEEP_MAX_RUNS})"}
+
+    snap, error = pair.load(2 * max(window_grid))
+    if error:
+        return {"error": "Not enough data for sweep"}
 
-        return signal_quality(
-            spread=spread,
-            y=y,
-            x=x,
-            volume=volume,
-            hedge_ratio_series=hedge_series
+    try:
+        return run_sweep(
+            snap.y, snap.x, window_grid, entry_grid, exit_grid,
+            hedge_modes=modes, stop_z=stop_z, cost=cost,
+            max_workers=workers, sort_by=sort_by, top_k=top_k
         )
+    except Exception as e:
+        logger.error(f"Error in backtest_sweep: {str(e)}", exc_info=True)
+        return {"error": str(e)}
+
 
+# -------------------------------
+# UNIVERSE PAIR SCANNER
+# -------------------------------
+@router.get("/analytics/scan")
+@cached_response("scan", lambda **_: SCANNER.seq())
+def scan_pairs(
+    window: Window = 50,
+    top_k: int = 20,
+    sort_by: str = "df_stat",
+    min_corr: float = 0.0
+):
+    """
+    Ranks every ordered pair of the configured symbols by cointegration
+    strength (df_stat), current |zscore|, half_life or corr.
+    """
+    if sort_by not in RANK_FIELDS:
+        return {"error": f"sort_by must be one of {list(RANK_FIELDS)}"}
+
+    try:
+        result = SCANNER.scan(window)
+        if "beta" not in result:
+            return {"error": "Not enough aligned bars for scan"}
+
+        return {
+            "symbols": len(result["symbols"]),
+            "bars": result["bars"],
+            "ts": result["ts"],
+            "pairs": SCANNER.top(window, top_k, sort_by, min_corr),
+        }
     except Exception as e:
-        logger.error("Signal quality failed", exc_info=True)
+        logger.error(f"Error in scan_pairs: {str(e)}", exc_info=True)
         return {"error": str(e)}
-    
 
-@router.get("/analytics/backtest")
-def backtest(symbol_y: str, symbol_x: str, window: int = 50):
-    y_raw = pd.DataFrame(list(TICK_BUFFER[symbol_y]))
-    x_raw = pd.DataFrame(list(TICK_BUFFER[symbol_x]))
 
-    if y_raw.empty or x_raw.empty:
-        return {"error": "Not enough data"}
+@router.get("/cache/stats")
+async def cache_stats():
+    return CACHE.stats()
 
-    y = resample_ticks(y_raw, "1s")
-    x = resample_ticks(x_raw, "1s")
 
-    common = y.index.intersection(x.index)
-    y, x = y.loc[common], x.loc[common]
+@router.get("/storage/stats")
+async def storage_stats():
+    return TICK_WRITER.stats()
 
-    beta = hedge_ratio(x, y)
-    spread = compute_spread(y, x, beta)
-    z = zscore(spread, window)
 
-    df = pd.DataFrame({
-        "spread": spread,
-        "zscore": z
-    }).dropna()
+@router.get("/ingestion/stats")
+async def ingestion_stats():
+    if INGEST_MODE == "shm":
+        return SHM_FOLLOWER.stats()
+    return MARKET_STREAM.stats()
+
+
+@router.get("/executor/stats")
+async def executor_status():
+    return executor_stats()
+
+
+@router.get("/metrics")
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/profiling/slowest")
+async def slowest_requests():
+    return SLOW_LOG.entries()
+
+
+@router.get("/profiling/profiles")
+async def list_profiles():
+    return list(PROFILES)
 
-    if len(df) < window:
-        return {"error": "Not enough data for backtest"}
 
-    return simulate_pairs_trade(df)    
\ No newline at end of file
+@router.get("/profiling/profiles/{name}")
+async def get_profile(name: str):
+    path = profile_path(name)
+    if path is None:
+        return {"error": "Profile not found"}
+    return FileResponse(path, media_type="text/plain")
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from fastapi import APIRouter, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from app.ingestion.binance_ws import BAR_STORE
+from app.api.deps import PAIR_STATES, Window, resolve_pair
+from app.api.hub import AnalyticsHub
+from app.analytics.pair_state import HEDGE_MODES
+from app.api.encoding import dumps
+
+logger = logging.getLogger("stream")
+router = APIRouter()
+
+SSE_HEARTBEAT_SEC = 15.0
+
+# one hub for every streaming client, woken by bar closes
+HUB = AnalyticsHub(PAIR_STATES)
+BAR_STORE.add_listener(HUB.on_bar)
+
+
+def _key(symbol_y, symbol_x, window, hedge_mode, threshold):
+    return (symbol_y, symbol_x, window, hedge_mode, threshold)
+
+
+# -------------------------------
+# WEBSOCKET: /ws/analytics
+# -------------------------------
+@router.websocket("/ws/analytics")
+async def analytics_ws(
+    websocket: WebSocket,
+    symbol_y: str,
+    symbol_x: str,
+    window: Window = 50,
+    hedge_mode: str = "ols",
+    threshold: float = 2.0
+):
+    """
+    Sends a "snapshot" message, then an "update" with only the new
+    spread / zscore / beta points each time a bar closes, plus "alert"
+    messages when |zscore| crosses `threshold` in either direction.
+    """
+    await websocket.accept()
+
+    symbol_y, symbol_x, error = resolve_pair(symbol_y, symbol_x)
+    if error is None and hedge_mode not in HEDGE_MODES:
+        error = f"hedge_mode must be one of {list(HEDGE_MODES)}"
+    if error:
+        await websocket.send_json({"type": "error", "error": error})
+        await websocket.close()
+        return
+
+    key = _key(symbol_y, symbol_x, window, hedge_mode, threshold)
+    queue = receiver = None
+    try:
+        queue = await HUB.subscribe(key)
+        # the client never sends anything we need; reading just surfaces disconnects
+        receiver = asyncio.create_task(websocket.receive_text())
+        while True:
+            getter = asyncio.create_task(queue.get())
+            done, _ = await asyncio.wait({getter, receiver}, return_when=asyncio.FIRST_COMPLETED)
+
+            if getter in done:
+                await websocket.send_text(dumps(getter.result()).decode())
+            else:
+                getter.cancel()
+
+            if receiver in done:
+                receiver.result()
+                receiver = asyncio.create_task(websocket.receive_text())
+    except WebSocketDisconnect:
+        pass
+    except Exception:
+        logger.exception("Analytics websocket failed")
+    finally:
+        if receiver is not None:
+            receiver.cancel()
+        HUB.unsubscribe(key, queue)
+
+
+# -------------------------------
+# SERVER-SENT EVENTS: /stream/analytics
+# -------------------------------
+@router.get("/stream/analytics")
+async def analytics_sse(
+    request: Request,
+    symbol_y: str,
+    symbol_x: str,
+    window: Window = 50,
+    hedge_mode: str = "ols",
+    threshold: float = 2.0
+):
+    """
+    Same messages as /ws/analytics as an SSE stream; the event name is
+    the message type.
+    """
+    symbol_y, symbol_x, error = resolve_pair(symbol_y, symbol_x)
+    if error:
+        return {"error": error}
+    if hedge_mode not in HEDGE_MODES:
+        return {"error": f"hedge_mode must be one of {list(HEDGE_MODES)}"}
+
+    key = _key(symbol_y, symbol_x, window, hedge_mode, threshold)
+
+    async def events():
+        queue = None
+        try:
+            queue = await HUB.subscribe(key)
+            while not await request.is_disconnected():
+                try:
+                    msg = await asyncio.wait_for(queue.get(), SSE_HEARTBEAT_SEC)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {msg['type']}\ndata: {dumps(msg).decode()}\n\n"
+        finally:
+            HUB.unsubscribe(key, queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/stream/stats")
+def stream_stats():
+    return HUB.stats()
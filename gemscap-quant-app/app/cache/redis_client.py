@@ -0,0 +1,68 @@
+import logging
+import redis
+
+logger = logging.getLogger("cache")
+
+
+class RedisCache:
+    """
+    Cache backend on Redis. Entries expire server-side after `ttl` seconds
+    and eviction is left to the server's maxmemory policy.
+    """
+
+    def __init__(self, client, ttl: float = 30.0, prefix: str = "gemscap:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    def get(self, key: str):
+        try:
+            value = self.client.get(self.prefix + key)
+        except redis.RedisError:
+            logger.warning("Redis get failed", exc_info=True)
+            self.errors += 1
+            value = None
+
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl: float | None = None):
+        ex = max(int(self.ttl if ttl is None else ttl), 1)
+        try:
+            self.client.set(self.prefix + key, value, ex=ex)
+        except redis.RedisError:
+            logger.warning("Redis set failed", exc_info=True)
+            self.errors += 1
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(self.prefix + key)
+        except redis.RedisError:
+            self.errors += 1
+
+    def stats(self) -> dict:
+        try:
+            entries = self.client.dbsize()
+            evictions = self.client.info("stats").get("evicted_keys", 0)
+        except redis.RedisError:
+            entries = evictions = None
+        return {
+            "backend": "redis",
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": evictions,
+            "errors": self.errors,
+        }
+
+
+def connect(host: str, port: int, ttl: float = 30.0) -> RedisCache:
+    client = redis.Redis(host=host, port=port, socket_timeout=0.5)
+    client.ping()
+    return RedisCache(client, ttl=ttl)
@@ -0,0 +1,131 @@
+import asyncio
+import functools
+import gzip
+import inspect
+import logging
+from fastapi import Request, Response
+
+from app.config import (
+    CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL_SEC, REDIS_HOST, REDIS_PORT,
+    RESPONSE_GZIP, RESPONSE_GZIP_LEVEL
+)
+from app.cache.memory import LRUCache
+from app.api.encoding import FORMATS, JSON, ARROW_STREAM, dumps, encode, negotiate
+from app.api.executor import run_blocking
+from app.metrics import REGISTRY
+from app.profiling import ACTIVE_PROFILE
+
+logger = logging.getLogger("cache")
+
+
+def build_cache():
+    if CACHE_BACKEND == "redis":
+        from app.cache import redis_client
+        try:
+            return redis_client.connect(REDIS_HOST, REDIS_PORT, ttl=CACHE_TTL_SEC)
+        except Exception:
+            logger.warning("Redis unavailable, falling back to in-process cache", exc_info=True)
+    return LRUCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL_SEC)
+
+
+CACHE = build_cache()
+
+# in-process lookups are cheap enough to do on the event loop; Redis is network I/O
+LOCAL_CACHE = isinstance(CACHE, LRUCache)
+
+# cache key -> task computing it, for coalescing concurrent misses
+_INFLIGHT = {}
+
+# result: hit | miss (computed here) | coalesced (joined an in-flight miss)
+LOOKUPS = REGISTRY.counter("gq_cache_lookups_total", "Response cache lookups", ("endpoint", "result"))
+
+
+def _wants_gzip(request: Request) -> bool:
+    return RESPONSE_GZIP and "gzip" in request.headers.get("accept-encoding", "")
+
+
+def cached_response(endpoint: str, version, tabular: bool = False):
+    """
+    Caches a route's JSON payload as bytes under the endpoint name, its
+    query parameters and `version(**params)` - the bar sequence of the
+    data it reads - so entries go stale exactly when new bars land.
+    Error payloads are returned but never cached.
+
+    The route becomes async: hits are served from the event loop, while
+    misses run the handler and serialization on the analytics executor
+    under the endpoint's concurrency limit. Concurrent misses on the same
+    key share one computation. Profiled requests always compute.
+
+    A `tabular` route returns an encoding.Table, and gains a `format`
+    query parameter (records | columnar | arrow, also negotiated from
+    Accept) and gzip when the client accepts it. Each variant is cached
+    encoded and compressed, so hits cost no serialization.
+    """
+    def decorator(fn):
+        hits = LOOKUPS.labels(endpoint, "hit")
+        misses = LOOKUPS.labels(endpoint, "miss")
+        coalesced = LOOKUPS.labels(endpoint, "coalesced")
+
+        def compute(key, params, fmt, gz):
+            payload = fn(**params)
+            body, media_type = encode(payload, fmt)
+            if isinstance(payload, dict) and "error" in payload:
+                return body, media_type, False
+            if gz:
+                body = gzip.compress(body, RESPONSE_GZIP_LEVEL)
+            CACHE.set(key, body)
+            return body, media_type, gz
+
+        def respond(body, media_type, gz):
+            if not tabular:
+                return Response(content=body, media_type=media_type)
+            headers = {"Vary": "Accept, Accept-Encoding"}
+            if gz:
+                headers["Content-Encoding"] = "gzip"
+            return Response(content=body, media_type=media_type, headers=headers)
+
+        @functools.wraps(fn)
+        async def wrapper(**params):
+            fmt, gz = "records", False
+            if tabular:
+                request = params.pop("request")
+                fmt = negotiate(request.headers.get("accept", ""), params.pop("format"))
+                if fmt is None:
+                    return Response(content=dumps({"error": f"format must be one of {list(FORMATS)}"}),
+                                    media_type=JSON)
+                gz = _wants_gzip(request)
+
+            key = ":".join(
+                [endpoint] + [f"{k}={v}" for k, v in sorted(params.items())]
+                + [str(version(**params))]
+                + ([fmt, "gzip" if gz else "identity"] if tabular else [])
+            )
+
+            if ACTIVE_PROFILE.get() is not None:
+                return respond(*await run_blocking(endpoint, compute, key, params, fmt, gz))
+
+            body = CACHE.get(key) if LOCAL_CACHE else await asyncio.to_thread(CACHE.get, key)
+            if body is None:
+                task = _INFLIGHT.get(key)
+                if task is None:
+                    misses.inc()
+                    task = _INFLIGHT[key] = asyncio.ensure_future(
+                        run_blocking(endpoint, compute, key, params, fmt, gz)
+                    )
+                    task.add_done_callback(lambda _: _INFLIGHT.pop(key, None))
+                else:
+                    coalesced.inc()
+                return respond(*await asyncio.shield(task))
+
+            hits.inc()
+            return respond(body, ARROW_STREAM if fmt == "arrow" else JSON, gz)
+
+        if tabular:
+            # FastAPI reads the route's parameters from this signature
+            sig = inspect.signature(fn)
+            wrapper.__signature__ = sig.replace(parameters=list(sig.parameters.values()) + [
+                inspect.Parameter("format", inspect.Parameter.KEYWORD_ONLY, default=None, annotation=str | None),
+                inspect.Parameter("request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            ])
+        return wrapper
+    return decorator
@@ -1,9 +1,108 @@
-SYMBOLS = ["btcusdt", "ethusdt"]
+import os
+
+# comma-separated, e.g. SYMBOLS=btcusdt,ethusdt,solusdt
+SYMBOLS = [
+    s.strip().lower()
+    for s in os.getenv("SYMBOLS", "btcusdt,ethusdt").split(",")
+    if s.strip()
+]
 
 BINANCE_WS_URL = "wss://fstream.binance.com/ws"
 
+# combined-stream endpoint; point at app.ingestion.fake_server for local runs
+BINANCE_STREAM_URL = os.getenv("BINANCE_STREAM_URL", "wss://fstream.binance.com/stream")
+# Binance allows up to 200 streams per combined connection
+STREAMS_PER_CONNECTION = int(os.getenv("STREAMS_PER_CONNECTION", "200"))
+RECONNECT_BASE_SEC = float(os.getenv("RECONNECT_BASE_SEC", "0.5"))
+RECONNECT_MAX_SEC = float(os.getenv("RECONNECT_MAX_SEC", "30"))
+# "msgspec" | "orjson" | "json"; empty picks the fastest installed
+INGEST_DECODER = os.getenv("INGEST_DECODER", "")
+# decoded trades are applied in batches of at most this many
+INGEST_BATCH_MAX = int(os.getenv("INGEST_BATCH_MAX", "1024"))
+
 RESAMPLE_INTERVALS = ["1s", "1min", "5min"]
 
 DATA_DIR = "data"
 
 DUCKDB_PATH = "data/market.duckdb"
+
+PARQUET_DIR = os.path.join(DATA_DIR, "parquet")
+
+# recorded websocket traffic for app.replay
+REPLAY_DIR = os.path.join(DATA_DIR, "replays")
+
+TICK_BUFFER_CAPACITY = int(os.getenv("TICK_BUFFER_CAPACITY", "10000"))
+BAR_CAPACITY = int(os.getenv("BAR_CAPACITY", "10000"))
+
+# largest rolling window the API accepts, and the rolling engines kept per
+# pair (one per window, least recently used evicted)
+MAX_WINDOW = int(os.getenv("MAX_WINDOW", "2000"))
+ROLLING_ENGINES_PER_PAIR = int(os.getenv("ROLLING_ENGINES_PER_PAIR", "8"))
+
+# backtests one sweep request may run (windows x entry_z x exit_z x modes)
+SWEEP_MAX_RUNS = int(os.getenv("SWEEP_MAX_RUNS", "2000"))
+
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # "memory" | "redis"
+CACHE_TTL_SEC = float(os.getenv("CACHE_TTL_SEC", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "1024"))
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+
+PERSIST_TICKS = os.getenv("PERSIST_TICKS", "true").lower() == "true"
+WRITER_QUEUE_SIZE = int(os.getenv("WRITER_QUEUE_SIZE", "100000"))
+WRITER_BATCH_SIZE = int(os.getenv("WRITER_BATCH_SIZE", "5000"))
+WRITER_FLUSH_SEC = float(os.getenv("WRITER_FLUSH_SEC", "1.0"))
+
+# ticks older than this move from DuckDB into the Parquet archive
+HOT_RETENTION_SEC = int(os.getenv("HOT_RETENTION_SEC", "3600"))
+ARCHIVE_INTERVAL_SEC = int(os.getenv("ARCHIVE_INTERVAL_SEC", "600"))
+
+# bars per symbol used by the universe scanner
+SCAN_LOOKBACK = int(os.getenv("SCAN_LOOKBACK", "1000"))
+
+# Kalman hedge ratio: relative per-bar state drift and observation noise
+KALMAN_DELTA = float(os.getenv("KALMAN_DELTA", "1e-7"))
+KALMAN_OBS_VAR = float(os.getenv("KALMAN_OBS_VAR", "1e-8"))
+
+# preload recent persisted ticks into the hot buffers on boot
+WARM_START = os.getenv("WARM_START", "true").lower() == "true"
+WARM_START_LOOKBACK_SEC = int(os.getenv("WARM_START_LOOKBACK_SEC", "21600"))
+WARM_START_BUDGET_SEC = float(os.getenv("WARM_START_BUDGET_SEC", "10"))
+
+# alert engine: optional webhook sink and default per-rule cooldown
+ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+ALERT_COOLDOWN_SEC = float(os.getenv("ALERT_COOLDOWN_SEC", "60"))
+ALERT_EVENT_HISTORY = int(os.getenv("ALERT_EVENT_HISTORY", "1000"))
+
+# bounded thread pool for route analytics, and in-flight computations per endpoint
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", "4"))
+ENDPOINT_CONCURRENCY = int(os.getenv("ENDPOINT_CONCURRENCY", "4"))
+
+# "inline": this process ingests; "shm": a separate `python -m app.ingestion.worker`
+# ingests into shared-memory rings and API workers follow them
+INGEST_MODE = os.getenv("INGEST_MODE", "inline")
+SHM_PREFIX = os.getenv("SHM_PREFIX", "gemscap_ticks_")
+SHM_RING_CAPACITY = int(os.getenv("SHM_RING_CAPACITY", "100000"))
+SHM_POLL_SEC = float(os.getenv("SHM_POLL_SEC", "0.02"))
+
+# port on which the ingestion worker serves Prometheus metrics (0 = off);
+# API processes serve them at /metrics
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# per-request sampling profiles, requested with `X-Profile: 1` or `?profile=1`
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+PROFILE_DIR = os.path.join(DATA_DIR, "profiles")
+PROFILE_SAMPLE_SEC = float(os.getenv("PROFILE_SAMPLE_SEC", "0.002"))
+# slowest requests (with per-stage timings) kept over a rolling window; 0 = off
+SLOW_LOG_SIZE = int(os.getenv("SLOW_LOG_SIZE", "20"))
+SLOW_LOG_WINDOW_SEC = float(os.getenv("SLOW_LOG_WINDOW_SEC", "3600"))
+
+# historical range queries (`start`/`end` on the analytics routes): largest
+# bar count one request may aggregate, and how long after `end` a range is
+# treated as final (writer flush lag) so its responses stay cached
+HISTORY_MAX_BARS = int(os.getenv("HISTORY_MAX_BARS", "500000"))
+HISTORY_SETTLE_SEC = float(os.getenv("HISTORY_SETTLE_SEC", "60"))
+
+# gzip for tabular analytics responses when the client sends Accept-Encoding: gzip
+RESPONSE_GZIP = os.getenv("RESPONSE_GZIP", "true").lower() == "true"
+RESPONSE_GZIP_LEVEL = int(os.getenv("RESPONSE_GZIP_LEVEL", "5"))
@@ -1,34 +1,295 @@
 import asyncio
-import json
-import websockets
-from datetime import datetime
-from collections import defaultdict, deque
 import logging
+import random
+import time
+from websockets.asyncio.client import connect
+from app.config import (
+    SYMBOLS, TICK_BUFFER_CAPACITY, BAR_CAPACITY, RESAMPLE_INTERVALS, PERSIST_TICKS,
+    WRITER_QUEUE_SIZE, WRITER_BATCH_SIZE, WRITER_FLUSH_SEC,
+    BINANCE_STREAM_URL, STREAMS_PER_CONNECTION, RECONNECT_BASE_SEC, RECONNECT_MAX_SEC,
+    INGEST_BATCH_MAX
+)
+from app.ingestion.decode import decode_trade
+from app.storage.tick_buffer import TickStore
+from app.storage.writer import TickWriter
+from app.analytics.bars import BarStore
+from app.metrics import REGISTRY, LAG_BUCKETS
 
 logger = logging.getLogger("binance_ws")
 
 # in-memory hot buffer
-TICK_BUFFER = defaultdict(lambda: deque(maxlen=10000))
-
-def normalize_trade(msg: dict):
-    return {
-        "symbol": msg["s"].lower(),
-        "ts": datetime.fromtimestamp(msg["T"] / 1000),
-        "price": float(msg["p"]),
-        "size": float(msg["q"])
-    }
-
-async def stream_symbol(symbol: str):
-    url = f"wss://fstream.binance.com/ws/{symbol}@trade"
-    logger.info(f"Connecting to {url}")
-
-    async with websockets.connect(url) as ws:
-        async for message in ws:
-            data = json.loads(message)
-            if data.get("e") == "trade":
-                tick = normalize_trade(data)
-                TICK_BUFFER[symbol].append(tick)
-
-async def start_stream(symbols: list[str]):
-    tasks = [stream_symbol(sym) for sym in symbols]
-    await asyncio.gather(*tasks)
+TICK_BUFFER = TickStore(capacity=TICK_BUFFER_CAPACITY)
+
+# streaming OHLCV bars, kept up to date tick by tick
+BAR_STORE = BarStore(RESAMPLE_INTERVALS, capacity=BAR_CAPACITY)
+
+# batched background persistence to DuckDB
+TICK_WRITER = TickWriter(
+    max_queue=WRITER_QUEUE_SIZE,
+    batch_size=WRITER_BATCH_SIZE,
+    flush_interval=WRITER_FLUSH_SEC
+)
+
+INGEST_LAG = REGISTRY.histogram(
+    "gq_ingest_lag_seconds",
+    "Exchange trade time to ingest, for the oldest trade of each applied batch",
+    buckets=LAG_BUCKETS
+)
+
+
+class LocalSink:
+    """
+    Applies accepted ticks to this process's tick buffers, bar builders
+    and (with `persist`) the DuckDB writer.
+    """
+
+    def __init__(self, persist: bool = PERSIST_TICKS):
+        self.persist = persist
+
+    def last_trade_id(self, symbol: str):
+        return TICK_BUFFER[symbol].last_trade_id() if symbol in TICK_BUFFER else None
+
+    def apply(self, symbol: str, rows: list):
+        if len(rows) == 1:
+            _, ts, price, size, trade_id = rows[0]
+            TICK_BUFFER[symbol].append(ts, price, size, trade_id)
+            BAR_STORE.on_tick(symbol, ts, price, size)
+        else:
+            _, ts, price, size, trade_id = zip(*rows)
+            TICK_BUFFER[symbol].extend(ts, price, size, trade_id)
+            BAR_STORE.on_ticks(symbol, ts, price, size)
+        if self.persist:
+            TICK_WRITER.submit_many(rows)
+
+
+def combined_url(base_url: str, symbols: list[str]) -> str:
+    return f"{base_url}?streams=" + "/".join(f"{s}@trade" for s in symbols)
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Full-jitter exponential backoff: uniform in [0, min(cap, base * 2^attempt)],
+    so many sockets dropped at once do not reconnect in lockstep.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class MarketStream:
+    """
+    Trade ingestion for many symbols over Binance combined streams.
+
+    Symbols are split into groups of `streams_per_connection`; each group
+    shares one socket (`/stream?streams=a@trade/b@trade/...`) run as a task
+    on the caller's event loop. A socket that drops or fails to open is
+    retried forever with jittered backoff.
+
+    Messages are decoded straight to tuples (app.ingestion.decode) and
+    applied in batches: whatever the socket has already buffered is
+    drained without yielding, then flushed in one pass per symbol.
+
+    Trade ids are sequential per symbol, so a jump means trades were lost
+    (typically while reconnecting) and is counted per symbol; a repeated
+    or older id is a duplicate and is dropped. Accepted ticks go to
+    `sink.apply(symbol, rows)`, by default this process's stores.
+    """
+
+    def __init__(self, base_url: str = BINANCE_STREAM_URL,
+                 streams_per_connection: int = STREAMS_PER_CONNECTION,
+                 backoff_base: float = RECONNECT_BASE_SEC,
+                 backoff_max: float = RECONNECT_MAX_SEC,
+                 batch_max: int = INGEST_BATCH_MAX, sink=None):
+        self.sink = sink or LocalSink()
+        self.base_url = base_url
+        self.streams_per_connection = streams_per_connection
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.batch_max = batch_max
+        self.symbols = []
+        self._tasks = []
+        self._connected = set()
+        self.last_trade_id = {}
+        self.missed_trades = {}
+        self.accepted = {}
+        self.last_ts = {}
+        self._pending = []
+        self._flush_scheduled = False
+
+        self.messages = 0
+        self.batches = 0
+        self.connects = 0
+        self.disconnects = 0
+        self.gaps = 0
+        self.duplicates = 0
+
+    # ------------------------------
+    # Trade handling
+    # ------------------------------
+    def ingest(self, ticks: list) -> int:
+        """
+        Passes decoded (symbol, ts, price, size, trade_id) ticks to the
+        sink, one batch call per symbol. Returns the number accepted.
+        """
+        by_symbol = {}
+        last_ids = self.last_trade_id
+
+        for tick in ticks:
+            symbol, trade_id = tick[0], tick[4]
+            if trade_id >= 0:
+                last = last_ids.get(symbol)
+                if last is None:
+                    # continue from warm-started ticks
+                    last = self.sink.last_trade_id(symbol)
+                if last is not None and last >= 0:
+                    if trade_id <= last:
+                        self.duplicates += 1
+                        continue
+                    if trade_id > last + 1:
+                        missed = trade_id - last - 1
+                        self.gaps += 1
+                        self.missed_trades[symbol] = self.missed_trades.get(symbol, 0) + missed
+                        logger.warning(f"{symbol}: trade id gap {last} -> {trade_id} ({missed} missed)")
+                last_ids[symbol] = trade_id
+
+            rows = by_symbol.get(symbol)
+            if rows is None:
+                rows = by_symbol[symbol] = []
+            rows.append(tick)
+
+        accepted = 0
+        for symbol, rows in by_symbol.items():
+            self.sink.apply(symbol, rows)
+            accepted += len(rows)
+            self.accepted[symbol] = self.accepted.get(symbol, 0) + len(rows)
+            self.last_ts[symbol] = rows[-1][1]
+        return accepted
+
+    def flush(self):
+        self._flush_scheduled = False
+        ticks, self._pending = self._pending, []
+        if ticks:
+            self.batches += 1
+            INGEST_LAG.observe((time.time_ns() - ticks[0][1]) / 1e9)
+            self.ingest(ticks)
+
+    # ------------------------------
+    # Connections
+    # ------------------------------
+    async def _run_connection(self, idx: int, symbols: list[str]):
+        url = combined_url(self.base_url, symbols)
+        loop = asyncio.get_running_loop()
+        attempt = 0
+
+        while True:
+            try:
+                logger.info(f"Connecting stream {idx} ({len(symbols)} symbols)")
+                async with connect(url, open_timeout=10, max_size=2 ** 20) as ws:
+                    self.connects += 1
+                    self._connected.add(idx)
+                    async for message in ws:
+                        attempt = 0
+                        self.messages += 1
+                        tick = decode_trade(message)
+                        if tick is None:
+                            continue
+
+                        # messages already buffered by the socket arrive without
+                        # yielding; they are applied together once it runs dry
+                        pending = self._pending
+                        pending.append(tick)
+                        if len(pending) >= self.batch_max:
+                            self.flush()
+                        elif not self._flush_scheduled:
+                            self._flush_scheduled = True
+                            loop.call_soon(self.flush)
+                logger.warning(f"Stream {idx} closed by server")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Stream {idx} failed: {e!r}")
+            finally:
+                self._connected.discard(idx)
+
+            self.disconnects += 1
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+            attempt += 1
+            logger.info(f"Stream {idx} reconnecting in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def start(self, symbols: list[str]):
+        """
+        Starts one task per connection group on the running loop.
+        """
+        if self._tasks:
+            return
+        self.symbols = list(symbols)
+        n = self.streams_per_connection
+        groups = [self.symbols[i:i + n] for i in range(0, len(self.symbols), n)]
+        self._tasks = [
+            asyncio.create_task(self._run_connection(i, group), name=f"market-stream-{i}")
+            for i, group in enumerate(groups)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self.flush()
+
+    def stats(self) -> dict:
+        return {
+            "symbols": len(self.symbols),
+            "connections": len(self._tasks),
+            "connected": len(self._connected),
+            "messages": self.messages,
+            "batches": self.batches,
+            "connects": self.connects,
+            "disconnects": self.disconnects,
+            "gaps": self.gaps,
+            "accepted": dict(self.accepted),
+            "missed_trades": dict(self.missed_trades),
+            "duplicates": self.duplicates,
+        }
+
+
+MARKET_STREAM = MarketStream()
+
+
+# ------------------------------
+# Scrape-time metrics
+# ------------------------------
+REGISTRY.callback(
+    "gq_ingest_trades_total", "Trades accepted per symbol",
+    lambda: dict(MARKET_STREAM.accepted), ("symbol",), kind="counter"
+)
+REGISTRY.callback(
+    "gq_ingest_missed_trades_total", "Trades lost to trade-id gaps",
+    lambda: dict(MARKET_STREAM.missed_trades), ("symbol",), kind="counter"
+)
+REGISTRY.callback(
+    "gq_ingest_last_trade_timestamp_seconds", "Exchange time of the newest accepted trade",
+    lambda: {s: ts / 1e9 for s, ts in list(MARKET_STREAM.last_ts.items())}, ("symbol",)
+)
+REGISTRY.callback(
+    "gq_ingest_messages_total", "Websocket messages received", lambda: MARKET_STREAM.messages, kind="counter"
+)
+REGISTRY.callback(
+    "gq_ingest_reconnects_total", "Stream disconnects", lambda: MARKET_STREAM.disconnects, kind="counter"
+)
+REGISTRY.callback("gq_ingest_connected", "Open stream connections", lambda: len(MARKET_STREAM._connected))
+REGISTRY.callback(
+    "gq_tick_buffer_rows", "Ticks held in the hot buffer",
+    lambda: {s: len(TICK_BUFFER[s]) for s in TICK_BUFFER.symbols()}, ("symbol",)
+)
+REGISTRY.callback("gq_tick_buffer_capacity", "Hot buffer capacity per symbol", lambda: TICK_BUFFER.capacity)
+REGISTRY.callback(
+    "gq_bars_closed_total", "Closed bars per symbol and interval",
+    # configured symbols only, so nothing a client sends can add series
+    lambda: {(s, i): BAR_STORE.seq(s, i) for s in SYMBOLS for i in BAR_STORE.intervals},
+    ("symbol", "interval"), kind="counter"
+)
+REGISTRY.callback("gq_writer_queue_depth", "Ticks waiting for DuckDB", lambda: TICK_WRITER.queue_depth)
+REGISTRY.callback(
+    "gq_writer_dropped_total", "Ticks dropped because the writer queue was full",
+    lambda: TICK_WRITER.dropped, kind="counter"
+)
@@ -0,0 +1,114 @@
+import json
+
+from app.config import INGEST_DECODER
+from app.metrics import REGISTRY
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# -------------------------------
+# Trade message decoding
+# -------------------------------
+# A decoder turns one raw websocket message (combined `{"stream", "data"}`
+# or a bare trade event) into a (symbol, ts_ns, price, size, trade_id)
+# tuple, or None for anything that is not a trade. No dict per trade is
+# built downstream and timestamps stay integer epoch nanoseconds.
+# A frame that is not valid JSON or is missing / mistyping a trade field
+# is counted and decodes to None too, so it never takes the socket down.
+
+DECODE_ERRORS = REGISTRY.counter("gq_ingest_decode_errors_total", "Frames that could not be decoded")
+
+# what a malformed frame can raise from any backend
+_BAD_FRAME = (ValueError, KeyError, TypeError, AttributeError) + \
+    ((msgspec.DecodeError,) if msgspec is not None else ())
+
+# "BTCUSDT" -> "btcusdt", so the hot loop does not allocate a new string per trade
+_SYMBOLS = {}
+
+
+def _symbol(raw: str) -> str:
+    symbol = _SYMBOLS.get(raw)
+    if symbol is None:
+        symbol = _SYMBOLS[raw] = raw.lower()
+    return symbol
+
+
+def _dict_decoder(loads):
+    def decode(message):
+        try:
+            msg = loads(message)
+            data = msg.get("data", msg)
+            if data.get("e") != "trade":
+                return None
+            return (
+                _symbol(data["s"]),
+                data["T"] * 1_000_000,
+                float(data["p"]),
+                float(data["q"]),
+                data.get("t", -1),
+            )
+        except _BAD_FRAME:
+            DECODE_ERRORS.inc()
+            return None
+    return decode
+
+
+if msgspec is not None:
+    class TradeEvent(msgspec.Struct):
+        e: str
+        s: str
+        T: int
+        p: float
+        q: float
+        t: int = -1
+
+    class CombinedTrade(msgspec.Struct):
+        data: TradeEvent
+
+
+def _msgspec_decoder():
+    # strict=False lets msgspec parse Binance's quoted prices straight to float
+    typed = msgspec.json.Decoder(CombinedTrade, strict=False)
+    fallback = _dict_decoder(msgspec.json.decode)
+
+    def decode(message):
+        try:
+            data = typed.decode(message).data
+        except msgspec.DecodeError:
+            # bare (non-combined) events, other message shapes or bad frames;
+            # the fallback decodes or counts them
+            return fallback(message)
+        if data.e != "trade":
+            return None
+        return (_symbol(data.s), data.T * 1_000_000, data.p, data.q, data.t)
+    return decode
+
+
+DECODERS = {"json": lambda: _dict_decoder(json.loads)}
+if orjson is not None:
+    DECODERS["orjson"] = lambda: _dict_decoder(orjson.loads)
+if msgspec is not None:
+    DECODERS["msgspec"] = _msgspec_decoder
+
+
+def make_decoder(backend: str | None = None):
+    """
+    Trade decoder for `backend`, or the fastest installed one
+    (msgspec, then orjson, then the standard library).
+    """
+    if backend is None:
+        backend = next(b for b in ("msgspec", "orjson", "json") if b in DECODERS)
+    if backend not in DECODERS:
+        raise ValueError(f"Decoder {backend!r} unavailable, installed: {list(DECODERS)}")
+    return DECODERS[backend]()
+
+
+decode_trade = make_decoder(INGEST_DECODER or None)
@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import random
+import time
+from urllib.parse import urlparse, parse_qs
+
+from websockets.asyncio.server import serve
+
+logger = logging.getLogger("fake_server")
+
+
+class FakeBinanceServer:
+    """
+    Local stand-in for the Binance futures combined trade stream.
+
+    Serves `/stream?streams=btcusdt@trade/...` and pushes messages in the
+    Binance combined format. Trades are generated on a shared clock whether
+    or not anyone is connected, with sequential ids per symbol, so a client
+    that reconnects sees the same trade-id gap it would see live.
+
+    Prices share a random-walk factor plus a mean-reverting residual per
+    symbol, so pairs are cointegrated. `disconnect_after` closes each
+    connection after that many messages and `drop_every` silently skips
+    every n-th trade, to exercise reconnects and gap detection.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9001, rate: float = 20.0,
+                 symbols=("btcusdt", "ethusdt"), disconnect_after: int | None = None,
+                 drop_every: int | None = None, seed: int = 0):
+        self.host = host
+        self.port = port
+        self.rate = rate
+        self.disconnect_after = disconnect_after
+        self.drop_every = drop_every
+        self._rng = random.Random(seed)
+        self._subs = {}
+        self._server = None
+        self._producer = None
+
+        self._factor = 0.0
+        self._symbols = {}
+        for s in symbols:
+            self._add_symbol(s)
+
+        self.connections = 0
+        self.sent = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/stream"
+
+    def _add_symbol(self, symbol: str):
+        if symbol not in self._symbols:
+            base = 60000.0 / (len(self._symbols) + 1) ** 2
+            self._symbols[symbol] = {"base": base, "resid": 0.0, "id": 1}
+
+    def _next_trade(self, symbol: str, now_ms: int) -> dict:
+        st = self._symbols[symbol]
+        st["resid"] = 0.95 * st["resid"] + self._rng.gauss(0, 2e-4)
+        price = st["base"] * math.exp(self._factor + st["resid"])
+        trade = {
+            "e": "trade", "E": now_ms, "T": now_ms, "s": symbol.upper(),
+            "t": st["id"], "p": f"{price:.2f}", "q": f"{self._rng.expovariate(20):.3f}",
+            "X": "MARKET", "m": self._rng.random() < 0.5,
+        }
+        st["id"] += 1
+        return trade
+
+    async def _produce(self):
+        interval = 1.0 / self.rate
+        while True:
+            await asyncio.sleep(interval)
+            self._factor += self._rng.gauss(0, 1e-4)
+            now_ms = int(time.time() * 1000)
+
+            for symbol in list(self._symbols):
+                trade = self._next_trade(symbol, now_ms)
+                if self.drop_every and trade["t"] % self.drop_every == 0:
+                    continue
+
+                msg = json.dumps({"stream": f"{symbol}@trade", "data": trade})
+                for ws, streams in list(self._subs.items()):
+                    if symbol in streams:
+                        await self._send(ws, msg)
+
+    async def _send(self, ws, msg: str):
+        try:
+            await ws.send(msg)
+            self.sent += 1
+            ws.sent += 1
+            if self.disconnect_after and ws.sent >= self.disconnect_after:
+                self._subs.pop(ws, None)
+                await ws.close(1001, "fake server drop")
+        except Exception:
+            self._subs.pop(ws, None)
+
+    async def _handler(self, ws):
+        query = parse_qs(urlparse(ws.request.path).query)
+        streams = {
+            s.split("@")[0]
+            for s in query.get("streams", [""])[0].split("/")
+            if s.endswith("@trade")
+        }
+        for symbol in streams:
+            self._add_symbol(symbol)
+
+        ws.sent = 0
+        self.connections += 1
+        self._subs[ws] = streams
+        try:
+            await ws.wait_closed()
+        finally:
+            self._subs.pop(ws, None)
+
+    async def start(self):
+        self._server = await serve(self._handler, self.host, self.port)
+        self._producer = asyncio.create_task(self._produce())
+        logger.info(f"Fake Binance stream on {self.url}")
+
+    async def stop(self):
+        if self._producer is not None:
+            self._producer.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+async def _main(args):
+    server = FakeBinanceServer(
+        args.host, args.port, args.rate, args.symbols.split(","),
+        disconnect_after=args.disconnect_after, drop_every=args.drop_every
+    )
+    await server.start()
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Binance combined trade stream")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--rate", type=float, default=20.0, help="trades per second per symbol")
+    parser.add_argument("--symbols", default="btcusdt,ethusdt")
+    parser.add_argument("--disconnect-after", type=int, default=None)
+    parser.add_argument("--drop-every", type=int, default=None)
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+
+from app.config import SHM_PREFIX, SHM_POLL_SEC
+from app.ingestion.binance_ws import TICK_BUFFER, BAR_STORE, INGEST_LAG
+from app.metrics import REGISTRY
+from app.storage.shm_ring import ShmTickRing, ring_name
+
+logger = logging.getLogger("shm_follower")
+
+REATTACH_SEC = 1.0
+
+
+class RingCursor:
+    """
+    One symbol's ring as seen by this process: the mapping, the next row
+    to read and the newest trade id applied.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.ring = None
+        self.cursor = None
+        self.last_trade_id = -1
+        self.last_check = 0.0
+
+
+class ShmFollower:
+    """
+    API-process side of INGEST_MODE=shm: polls the ingestion worker's
+    shared-memory rings and applies new ticks to this process's tick
+    buffers and bar builders, so routes, streams and alerts run unchanged.
+
+    Reading is a copy out of shared memory - no pickling, pipes or locks
+    shared with the writer. The first read of a symbol bulk-loads its
+    bars. A ring that is missing, closed, or idle with a newer epoch
+    under the same name (the worker restarted) is re-attached; ticks at
+    or below the last applied trade id are skipped so a re-seeded ring
+    does not replay history.
+    """
+
+    def __init__(self, tick_store, bar_store, prefix: str = SHM_PREFIX,
+                 poll_sec: float = SHM_POLL_SEC):
+        self.tick_store = tick_store
+        self.bar_store = bar_store
+        self.prefix = prefix
+        self.poll_sec = poll_sec
+        self._cursors = {}
+        self._task = None
+
+        self.polls = 0
+        self.ticks = 0
+        self.missed = 0
+        self.attaches = 0
+
+    def _attach(self, rc: RingCursor, now: float):
+        rc.last_check = now
+        try:
+            ring = ShmTickRing.attach(ring_name(self.prefix, rc.symbol))
+        except FileNotFoundError:
+            return
+
+        if rc.ring is not None:
+            if ring.epoch == rc.ring.epoch:
+                ring.close()
+                return
+            rc.ring.close()
+
+        logger.info(f"Attached {rc.symbol} ring ({ring.total} rows)")
+        rc.ring = ring
+        rc.cursor = None
+        self.attaches += 1
+
+    def poll_symbol(self, rc: RingCursor, now: float) -> int:
+        if rc.ring is None or rc.ring.closed:
+            if now - rc.last_check >= REATTACH_SEC:
+                self._attach(rc, now)
+            if rc.ring is None or rc.ring.closed:
+                return 0
+
+        cols, rc.cursor, missed = rc.ring.read(rc.cursor)
+        self.missed += missed
+
+        if rc.last_trade_id >= 0 and len(cols["ts"]):
+            keep = (cols["trade_id"] > rc.last_trade_id) | (cols["trade_id"] < 0)
+            if not keep.all():
+                cols = {k: v[keep] for k, v in cols.items()}
+
+        n = len(cols["ts"])
+        if n == 0:
+            # idle: check now and then whether the worker was restarted
+            if now - rc.last_check >= REATTACH_SEC:
+                self._attach(rc, now)
+            return 0
+
+        ids = cols["trade_id"]
+        rc.last_trade_id = max(rc.last_trade_id, int(ids.max()))
+        INGEST_LAG.observe((time.time_ns() - int(cols["ts"][0])) / 1e9)
+
+        buf = self.tick_store[rc.symbol]
+        fresh = len(buf) == 0
+        buf.extend(cols["ts"], cols["price"], cols["size"], ids)
+        if fresh:
+            self.bar_store.load(rc.symbol, cols["ts"], cols["price"], cols["size"])
+        else:
+            self.bar_store.on_ticks(rc.symbol, cols["ts"].tolist(), cols["price"].tolist(),
+                                    cols["size"].tolist())
+        return n
+
+    def poll(self) -> int:
+        now = time.monotonic()
+        self.polls += 1
+        n = 0
+        for rc in self._cursors.values():
+            try:
+                n += self.poll_symbol(rc, now)
+            except Exception:
+                logger.exception(f"Following {rc.symbol} ring failed")
+        self.ticks += n
+        return n
+
+    async def _run(self):
+        while True:
+            self.poll()
+            await asyncio.sleep(self.poll_sec)
+
+    def start(self, symbols: list[str]):
+        if self._task is not None:
+            return
+        self._cursors = {s: RingCursor(s) for s in symbols}
+        self._task = asyncio.create_task(self._run(), name="shm-follower")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        for rc in self._cursors.values():
+            if rc.ring is not None:
+                rc.ring.close()
+                rc.ring = None
+
+    def stats(self) -> dict:
+        return {
+            "mode": "shm",
+            "symbols": len(self._cursors),
+            "attached": sum(rc.ring is not None and not rc.ring.closed for rc in self._cursors.values()),
+            "polls": self.polls,
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "attaches": self.attaches,
+            "lag_rows": {
+                rc.symbol: rc.ring.total - rc.cursor
+                for rc in self._cursors.values()
+                if rc.ring is not None and rc.cursor is not None
+            },
+        }
+
+
+SHM_FOLLOWER = ShmFollower(TICK_BUFFER, BAR_STORE)
+
+REGISTRY.callback(
+    "gq_shm_follower_ticks_total", "Ticks applied from the shared-memory rings",
+    lambda: SHM_FOLLOWER.ticks, kind="counter"
+)
+REGISTRY.callback(
+    "gq_shm_follower_missed_total", "Ring rows overwritten before this process read them",
+    lambda: SHM_FOLLOWER.missed, kind="counter"
+)
+REGISTRY.callback(
+    "gq_shm_follower_lag_rows", "Published ring rows not yet applied",
+    lambda: SHM_FOLLOWER.stats()["lag_rows"], ("symbol",)
+)
@@ -0,0 +1,56 @@
+import itertools
+import logging
+import time
+
+from app.storage.duckdb_store import init_db
+from app.storage.parquet_archive import recent_ticks
+from app.metrics import timed
+
+logger = logging.getLogger("warm_start")
+
+
+@timed("warm_start")
+def warm_start(symbols: list[str], tick_store, bar_store, pair_states=None,
+               max_ticks: int = 10_000, lookback_sec: float = 6 * 3600,
+               budget_sec: float = 10.0, windows=(50,)):
+    """
+    Bulk-loads the newest persisted ticks per symbol into the tick buffers
+    and bar builders, then primes the rolling engines of every configured
+    pair. Stops early once `budget_sec` is spent so startup stays bounded.
+    """
+    start = time.monotonic()
+    deadline = start + budget_sec
+    init_db()
+
+    loaded = 0
+    for symbol in symbols:
+        if time.monotonic() > deadline:
+            logger.warning(f"Warm start budget spent, skipping {symbol} and later symbols")
+            break
+
+        try:
+            cols = recent_ticks(symbol, max_ticks, lookback_sec)
+        except Exception:
+            logger.exception(f"Warm start query failed for {symbol}")
+            continue
+
+        if len(cols["ts"]) == 0:
+            continue
+
+        tick_store[symbol].extend(cols["ts"], cols["price"], cols["size"], cols["trade_id"])
+        bar_store.load(symbol, cols["ts"], cols["price"], cols["size"])
+        loaded += len(cols["ts"])
+
+    if pair_states is not None:
+        for symbol_y, symbol_x in itertools.permutations(symbols, 2):
+            if time.monotonic() > deadline:
+                break
+            snap = pair_states.snapshot(symbol_y, symbol_x)
+            if len(snap) == 0:
+                continue
+            for window in windows:
+                snap.zscore(window)
+                snap.hedge_series(window)
+
+    logger.info(f"Warm start loaded {loaded} ticks in {time.monotonic() - start:.2f}s")
+    return loaded
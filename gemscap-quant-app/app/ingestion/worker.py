@@ -0,0 +1,119 @@
+"""
+Standalone ingestion process for INGEST_MODE=shm.
+
+    python -m app.ingestion.worker
+    INGEST_MODE=shm uvicorn app.main:app --workers 4
+
+Owns the exchange connections, DuckDB persistence and the Parquet
+archive, and publishes every accepted tick into one shared-memory ring
+per symbol. API processes follow the rings (app.ingestion.shm_follower),
+so analytics load in any of them never delays tick processing here.
+"""
+import asyncio
+import logging
+import signal
+
+from app.config import (
+    SYMBOLS, PERSIST_TICKS, WARM_START, WARM_START_LOOKBACK_SEC,
+    SHM_PREFIX, SHM_RING_CAPACITY, METRICS_PORT
+)
+from app.ingestion.binance_ws import MARKET_STREAM, TICK_WRITER
+from app.logger import setup_logger
+from app.metrics import serve_metrics
+from app.storage.duckdb_store import init_db
+from app.storage.parquet_archive import ArchiveWorker, recent_ticks
+from app.storage.shm_ring import ShmTickRing, ring_name
+
+logger = logging.getLogger("ingest_worker")
+
+STATS_INTERVAL_SEC = 60
+
+
+class ShmSink:
+    """
+    MarketStream sink that publishes ticks to the shared-memory rings and,
+    optionally, the DuckDB writer.
+    """
+
+    def __init__(self, rings: dict, writer=None):
+        self.rings = rings
+        self.writer = writer
+
+    def last_trade_id(self, symbol: str):
+        ring = self.rings.get(symbol)
+        return ring.last_trade_id() if ring is not None else None
+
+    def apply(self, symbol: str, rows: list):
+        ring = self.rings.get(symbol)
+        if ring is None:
+            return
+        if len(rows) == 1:
+            ring.append(*rows[0][1:])
+        else:
+            _, ts, price, size, trade_id = zip(*rows)
+            ring.extend(ts, price, size, trade_id)
+        if self.writer is not None:
+            self.writer.submit_many(rows)
+
+
+def seed_rings(rings: dict, lookback_sec: float):
+    """
+    Fills each ring with the newest persisted ticks, so API workers start
+    with history (the in-process warm start, done once for all of them).
+    """
+    init_db()
+    for symbol, ring in rings.items():
+        try:
+            cols = recent_ticks(symbol, ring.capacity, lookback_sec)
+        except Exception:
+            logger.exception(f"Seeding ring for {symbol} failed")
+            continue
+        ring.extend(cols["ts"], cols["price"], cols["size"], cols["trade_id"])
+        logger.info(f"Seeded {symbol} ring with {len(cols['ts'])} ticks")
+
+
+async def run(symbols: list[str]):
+    rings = {s: ShmTickRing.create(ring_name(SHM_PREFIX, s), SHM_RING_CAPACITY) for s in symbols}
+    archiver = None
+    metrics_server = serve_metrics(METRICS_PORT) if METRICS_PORT else None
+
+    try:
+        if WARM_START:
+            seed_rings(rings, WARM_START_LOOKBACK_SEC)
+
+        if PERSIST_TICKS:
+            TICK_WRITER.start()
+            archiver = ArchiveWorker()
+            archiver.start()
+
+        # the module stream, so its scrape-time metrics describe this process
+        stream = MARKET_STREAM
+        stream.sink = ShmSink(rings, TICK_WRITER if PERSIST_TICKS else None)
+        stream.start(symbols)
+
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+
+        logger.info(f"Ingesting {len(symbols)} symbols into shared memory ({SHM_PREFIX}*)")
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), STATS_INTERVAL_SEC)
+            except asyncio.TimeoutError:
+                logger.info(f"Ingestion stats: {stream.stats()}")
+
+        await stream.stop()
+    finally:
+        if archiver is not None:
+            archiver.stop()
+        TICK_WRITER.stop()
+        if metrics_server is not None:
+            metrics_server.shutdown()
+        for ring in rings.values():
+            ring.unlink()
+
+
+if __name__ == "__main__":
+    setup_logger()
+    asyncio.run(run(SYMBOLS))
@@ -1,20 +1,68 @@
-import asyncio
-import threading
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.ingestion.binance_ws import start_stream
-from app.config import SYMBOLS
+from app.ingestion.binance_ws import MARKET_STREAM, TICK_BUFFER, BAR_STORE, TICK_WRITER
+from app.ingestion.warm_start import warm_start
+from app.ingestion.shm_follower import SHM_FOLLOWER
+from app.config import (
+    SYMBOLS, PERSIST_TICKS, TICK_BUFFER_CAPACITY,
+    WARM_START, WARM_START_LOOKBACK_SEC, WARM_START_BUDGET_SEC, INGEST_MODE
+)
 from app.logger import setup_logger
+from app.metrics import MetricsMiddleware
+from app.profiling import ProfilingMiddleware
+from app.storage.parquet_archive import ArchiveWorker
 from app.api.routes import router
+from app.api.deps import PAIR_STATES
+from app.api.stream import router as stream_router
+from app.api.alerts import router as alerts_router, ENGINE as ALERT_ENGINE
 
 setup_logger()
 
-app = FastAPI()
-app.include_router(router)
+archiver = ArchiveWorker()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if INGEST_MODE == "shm":
+        # the ingestion worker owns the feed, persistence and warm start;
+        # this process only follows its shared-memory rings
+        SHM_FOLLOWER.start(SYMBOLS)
+        ALERT_ENGINE.start()
+        try:
+            yield
+        finally:
+            await SHM_FOLLOWER.stop()
+            ALERT_ENGINE.stop()
+        return
+
+    if WARM_START:
+        warm_start(
+            SYMBOLS, TICK_BUFFER, BAR_STORE, PAIR_STATES,
+            max_ticks=TICK_BUFFER_CAPACITY,
+            lookback_sec=WARM_START_LOOKBACK_SEC,
+            budget_sec=WARM_START_BUDGET_SEC
+        )
 
-def start_ws():
-    asyncio.run(start_stream(SYMBOLS))
+    if PERSIST_TICKS:
+        TICK_WRITER.start()
+        archiver.start()
 
-@app.on_event("startup")
-def startup():
-    thread = threading.Thread(target=start_ws, daemon=True)
-    thread.start()
+    ALERT_ENGINE.start()
+
+    # ingestion runs as tasks on the server's own event loop
+    MARKET_STREAM.start(SYMBOLS)
+    try:
+        yield
+    finally:
+        await MARKET_STREAM.stop()
+        ALERT_ENGINE.stop()
+        archiver.stop()
+        TICK_WRITER.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.include_router(router)
+app.include_router(stream_router)
+app.include_router(alerts_router)
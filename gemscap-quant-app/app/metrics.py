@@ -0,0 +1,332 @@
+import bisect
+import contextvars
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# -------------------------------
+# Prometheus text-format metrics
+# -------------------------------
+# Counters and histograms are plain Python numbers behind a per-series
+# lock: an update is a dict lookup, a bisect and an add, cheap enough for
+# the ingestion loop. Values that already live somewhere (buffer sizes,
+# queue depths, stream counters) are read by callbacks at scrape time
+# instead of being mirrored on the hot path.
+#
+# Each process has its own registry: with several uvicorn workers every
+# scrape sees one worker, the ingestion worker serves its own (METRICS_PORT).
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _fmt(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    # label values may not hold a raw backslash, double quote or newline
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class _GaugeChild(_CounterChild):
+    def set(self, value: float):
+        self.value = value
+
+
+class _HistogramChild:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+
+class Metric:
+    """
+    A metric family: one child per combination of label values, created
+    on first use. `labels(...)` children can be kept and reused.
+    """
+
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        self._default = None if self.labelnames else self.labels()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            yield self.name, _labels(self.labelnames, values), child.value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_fmt(value)}" for name, labels, value in self.samples()]
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def samples(self):
+        for values, child in list(self._children.items()):
+            with child._lock:
+                counts, total = list(child.counts), child.sum
+            cumulative = 0
+            for bound, count in zip(self.bounds + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", _labels(self.labelnames, values, f'le="{_fmt(bound)}"'), cumulative
+            yield f"{self.name}_sum", _labels(self.labelnames, values), total
+            yield f"{self.name}_count", _labels(self.labelnames, values), cumulative
+
+
+class CallbackMetric(Metric):
+    """
+    Values read at scrape time from `fn()`: a number, or a dict of
+    label-value tuples (or a single label value) to numbers.
+    """
+
+    def __init__(self, name: str, help: str, fn, labelnames=(), kind: str = "gauge"):
+        self.fn = fn
+        self.kind = kind
+        super().__init__(name, help, labelnames)
+
+    def _new_child(self):
+        return None
+
+    def samples(self):
+        values = self.fn()
+        if not isinstance(values, dict):
+            yield self.name, "", values
+            return
+        for key, value in values.items():
+            key = key if isinstance(key, tuple) else (key,)
+            yield self.name, _labels(self.labelnames, key), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def callback(self, name: str, help: str, fn, labelnames=(), kind: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, fn, labelnames, kind))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            try:
+                lines += metric.render()
+            except Exception as e:
+                # a failing callback must not take the whole scrape down
+                lines.append(f"# {metric.name} unavailable: {e!r}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# -------------------------------
+# Shared metrics
+# -------------------------------
+STAGE_SECONDS = REGISTRY.histogram(
+    "gq_analytics_stage_seconds", "Time spent in an analytics stage", ("stage",)
+)
+HTTP_SECONDS = REGISTRY.histogram(
+    "gq_http_request_seconds", "HTTP request latency until the response starts",
+    ("method", "route", "status")
+)
+
+
+# stage -> seconds for the request being handled, when one is collecting
+# (see app.profiling); executor threads share it through the copied context
+REQUEST_STAGES = contextvars.ContextVar("request_stages", default=None)
+
+
+def _add_stage(stage: str, elapsed: float):
+    stages = REQUEST_STAGES.get()
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + elapsed
+
+
+class timed:
+    """
+    Records the duration of a block or function call in a histogram
+    (by default gq_analytics_stage_seconds{stage=...}) and in the current
+    request's stage breakdown.
+
+        with timed("adf"):
+            ...
+
+        @timed("backtest")
+        def simulate(...):
+    """
+
+    def __init__(self, stage: str, histogram: Histogram = STAGE_SECONDS):
+        self.stage = stage
+        self.child = histogram.labels(stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self._start
+        self.child.observe(elapsed)
+        _add_stage(self.stage, elapsed)
+
+    def __call__(self, fn):
+        stage, child = self.stage, self.child
+
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                child.observe(elapsed)
+                _add_stage(stage, elapsed)
+
+        wrapper.__name__ = fn.__name__
+        wrapper.__qualname__ = fn.__qualname__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.__wrapped__ = fn
+        return wrapper
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware timing HTTP requests by route template (so
+    /analytics/spread?... is one series), from receipt until the response
+    headers are sent. Long-lived streams are only timed to their start.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                route = scope.get("route")
+                path = getattr(route, "path", None) or "unmatched"
+                HTTP_SECONDS.labels(scope["method"], path, status[0]).observe(time.perf_counter() - start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve_metrics(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serves the registry on its own port from a daemon thread, for
+    processes without an API (the ingestion worker).
+    """
+    server = ThreadingHTTPServer((host, port), _Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
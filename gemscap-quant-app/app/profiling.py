@@ -0,0 +1,316 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from urllib.parse import parse_qs
+
+from app.config import (
+    PROFILING_ENABLED, PROFILE_DIR, PROFILE_SAMPLE_SEC, SLOW_LOG_SIZE, SLOW_LOG_WINDOW_SEC
+)
+from app.metrics import REQUEST_STAGES
+
+logger = logging.getLogger("profiling")
+
+# the Profile of the request being handled, if it asked for one
+ACTIVE_PROFILE = contextvars.ContextVar("active_profile", default=None)
+
+# inclusive time is reported per function defined under these paths
+BREAKDOWN_PATHS = (os.path.join("app", "analytics") + os.sep,)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+# -------------------------------
+# Sampling profiler
+# -------------------------------
+def _label(code) -> str:
+    path = code.co_filename
+    if path.startswith(_ROOT):
+        path = path[len(_ROOT):]
+    else:
+        path = os.path.basename(path)
+    return f"{code.co_name} ({path}:{code.co_firstlineno})"
+
+
+class Profile:
+    """
+    Stack samples of the threads working on one request.
+
+    Threads join with `attach()` (run_blocking does this for offloaded
+    route work), and the sampler records their Python stacks every
+    `interval` seconds while attached. Output is folded stacks - one
+    `frame;frame;... count` line per distinct stack - as read by
+    flamegraph.pl, speedscope or inferno.
+    """
+
+    def __init__(self, name: str, interval: float = PROFILE_SAMPLE_SEC):
+        self.name = name
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._threads = set()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def attach(self):
+        tid = threading.get_ident()
+        with self._lock:
+            self._threads.add(tid)
+        SAMPLER.add(self)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads.discard(tid)
+            if not self._threads:
+                SAMPLER.remove(self)
+
+    def sample(self, frames: dict):
+        with self._lock:
+            threads = list(self._threads)
+        for tid in threads:
+            frame = frames.get(tid)
+            stack = []
+            while frame is not None:
+                stack.append(_label(frame.f_code))
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+                self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def breakdown(self, top: int = 15) -> list[dict]:
+        """
+        Estimated inclusive seconds per analytics function, most expensive
+        first.
+        """
+        totals = Counter()
+        for stack, count in self.stacks.items():
+            seen = {f for f in stack.split(";") if any(p in f for p in BREAKDOWN_PATHS)}
+            for f in seen:
+                totals[f] += count
+        return [
+            {"function": f, "samples": n, "est_ms": round(n * self.interval * 1000, 1),
+             "share": round(n / self.samples, 3)}
+            for f, n in totals.most_common(top)
+        ]
+
+    def save(self, directory: str = PROFILE_DIR) -> str:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.name}.folded")
+        with open(path, "w") as f:
+            f.write(self.folded())
+        return path
+
+
+class Sampler:
+    """
+    One daemon thread sampling every active Profile; it only runs while
+    at least one profiled request is executing.
+    """
+
+    def __init__(self):
+        self._profiles = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, profile: Profile):
+        with self._lock:
+            self._profiles.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+
+    def remove(self, profile: Profile):
+        with self._lock:
+            self._profiles.discard(profile)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                profiles = list(self._profiles)
+                if not profiles:
+                    self._thread = None
+                    return
+            frames = sys._current_frames()
+            for profile in profiles:
+                profile.sample(frames)
+            del frames
+            time.sleep(min(p.interval for p in profiles))
+
+
+SAMPLER = Sampler()
+
+
+@contextmanager
+def attached():
+    """
+    Joins the current thread to the request's profile, if it has one.
+    """
+    profile = ACTIVE_PROFILE.get()
+    if profile is None:
+        yield
+        return
+    with profile.attach():
+        yield
+
+
+# -------------------------------
+# Slowest requests
+# -------------------------------
+class SlowLog:
+    """
+    The `size` slowest requests seen within the last `window_sec`, with
+    their per-stage timings. A bounded min-heap, so recording costs
+    O(log size) and only requests slower than the current N-th are kept;
+    entries age out of the window as it rolls.
+    """
+
+    def __init__(self, size: int = SLOW_LOG_SIZE, window_sec: float = SLOW_LOG_WINDOW_SEC):
+        self.size = size
+        self.window_sec = window_sec
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        cutoff = now - self.window_sec
+        if any(entry["at"] < cutoff for _, _, entry in self._heap):
+            self._heap = [item for item in self._heap if item[2]["at"] >= cutoff]
+            heapq.heapify(self._heap)
+
+    def record(self, duration: float, entry: dict):
+        if self.size <= 0:
+            return
+        item = (duration, next(self._seq), entry)
+        with self._lock:
+            self._expire(entry["at"])
+            if len(self._heap) < self.size:
+                heapq.heappush(self._heap, item)
+            elif duration > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+
+    def entries(self) -> list[dict]:
+        with self._lock:
+            self._expire(time.time())
+            items = sorted(self._heap, reverse=True)
+        return [entry for _, _, entry in items]
+
+    def clear(self):
+        with self._lock:
+            self._heap = []
+
+
+SLOW_LOG = SlowLog()
+
+
+# -------------------------------
+# ASGI middleware
+# -------------------------------
+def _wants_profile(scope) -> bool:
+    for name, value in scope.get("headers", ()):
+        if name == b"x-profile":
+            return value not in (b"", b"0", b"false")
+    query = parse_qs(scope.get("query_string", b"").decode())
+    return query.get("profile", ["0"])[-1] not in ("", "0", "false")
+
+
+class ProfilingMiddleware:
+    """
+    Collects per-stage timings for every HTTP request (for the slow log)
+    and, when PROFILING_ENABLED and the request carries `X-Profile: 1` or
+    `?profile=1`, a sampling profile of its offloaded work. A profiled
+    request bypasses the response cache and the shared pair snapshot, so
+    it shows the full computation; the profile is written to PROFILE_DIR
+    and named in the `X-Profile-File` response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        stages = {}
+        stages_token = REQUEST_STAGES.set(stages)
+
+        profile = None
+        if PROFILING_ENABLED and _wants_profile(scope):
+            route = scope["path"].strip("/").replace("/", "_") or "root"
+            profile = Profile(
+                f"{time.strftime('%Y%m%d_%H%M%S')}_{route}_{os.getpid()}_{next(_PROFILE_SEQ)}"
+            )
+        profile_token = ACTIVE_PROFILE.set(profile)
+        started = [False]
+
+        def record(status: int):
+            # up to the response start, so long-lived streams count their setup only
+            started[0] = True
+            duration = time.perf_counter() - start
+            SLOW_LOG.record(duration, {
+                "at": time.time(),
+                "method": scope["method"],
+                "route": getattr(scope.get("route"), "path", None) or scope["path"],
+                "query": scope.get("query_string", b"").decode(),
+                "status": status,
+                "duration_ms": round(duration * 1000, 2),
+                "stages_ms": {k: round(v * 1000, 2) for k, v in sorted(stages.items(), key=lambda kv: -kv[1])},
+                "profile": profile.name if profile is not None else None,
+            })
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                if profile is not None:
+                    message = dict(message)
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"x-profile-file", os.path.basename(self._finish(profile)).encode())
+                    ]
+                record(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            ACTIVE_PROFILE.reset(profile_token)
+            REQUEST_STAGES.reset(stages_token)
+            if not started[0]:
+                record(500)
+
+    @staticmethod
+    def _finish(profile: Profile) -> str:
+        path = profile.save()
+        PROFILES.append({
+            "name": profile.name,
+            "samples": profile.samples,
+            "interval_ms": profile.interval * 1000,
+            "breakdown": profile.breakdown(),
+        })
+        logger.info(f"Saved profile {path} ({profile.samples} samples)")
+        return path
+
+
+# summaries of recent profiles, newest last
+PROFILES = deque(maxlen=50)
+_PROFILE_SEQ = itertools.count()
+
+
+def profile_path(name: str) -> str | None:
+    """
+    Path of a saved profile by name, refusing anything outside PROFILE_DIR.
+    """
+    base = os.path.basename(name)
+    if base != name or not base:
+        return None
+    path = os.path.join(PROFILE_DIR, base if base.endswith(".folded") else f"{base}.folded")
+    return path if os.path.isfile(path) else None
@@ -0,0 +1,220 @@
+"""
+Replays a recording through the real ingestion pipeline.
+
+    python -m app.replay.player data/replays/trades.jsonl.gz --speed 10 --port 9001
+    BINANCE_STREAM_URL=ws://127.0.0.1:9001/stream uvicorn app.main:app
+
+serves the frames as a local Binance combined stream, so MarketStream,
+the stores, the routes and the streaming endpoints all run unchanged.
+`--speed 1` keeps the recorded timing, `--speed N` plays N times faster
+and `--speed 0` as fast as the client reads.
+
+    python -m app.replay.player data/replays/trades.jsonl.gz --inline
+
+skips the socket and feeds the frames straight into a MarketStream in
+this process, as fast as possible (deterministic, for comparing outputs).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import urlparse, parse_qs
+
+from websockets.asyncio.server import serve
+
+from app.config import INGEST_BATCH_MAX
+from app.ingestion.decode import decode_trade
+from app.replay.recorder import read_frames
+
+logger = logging.getLogger("replay")
+
+
+def frame_symbol(raw: str) -> str | None:
+    """
+    Lower-case symbol of a combined or bare trade frame, without parsing
+    the JSON.
+    """
+    i = raw.find('"stream":"')
+    if i >= 0:
+        i += 10
+        return raw[i:raw.find("@", i)]
+    i = raw.find('"s":"')
+    if i >= 0:
+        i += 5
+        return raw[i:raw.find('"', i)].lower()
+    return None
+
+
+def rebase_frame(raw: str, offset_ms: int, t0_ms: int, speed: float) -> str:
+    """
+    Moves a frame's event and trade times so the replay looks live:
+    t' = t0' + (t - t0) / speed, with t0' = t0 + offset.
+    """
+    msg = json.loads(raw)
+    data = msg.get("data", msg)
+    scale = speed if speed > 0 else 1.0
+    for key in ("E", "T"):
+        if key in data:
+            data[key] = t0_ms + offset_ms + int((data[key] - t0_ms) / scale)
+    return json.dumps(msg, separators=(",", ":"))
+
+
+class ReplayServer:
+    """
+    Local Binance combined-stream stand-in that plays back a recording.
+
+    Clients subscribe with `/stream?streams=a@trade/b@trade` as they do
+    against Binance and receive only their symbols' frames. Playback starts
+    `start_delay` seconds after the first subscriber connects, and the
+    recorded inter-arrival times are kept, divided by `speed`. With
+    `rebase`, trade times are shifted so the replay starts now (and
+    compressed by `speed`; at speed 0 they keep the recorded spacing).
+    """
+
+    def __init__(self, frames, host: str = "127.0.0.1", port: int = 9001,
+                 speed: float = 1.0, rebase: bool = False, start_delay: float = 0.5):
+        self.frames = frames
+        self.host = host
+        self.port = port
+        self.speed = speed
+        self.rebase = rebase
+        self.start_delay = start_delay
+        self._subs = {}
+        self._server = None
+        self._player = None
+        self.done = asyncio.Event()
+
+        self.connections = 0
+        self.played = 0
+        self.sent = 0
+
+    @property
+    def url(self) -> str:
+        return f"ws://{self.host}:{self.port}/stream"
+
+    async def _play(self):
+        await asyncio.sleep(self.start_delay)
+        start = time.monotonic()
+        offset_ms = t0_ns = t0_ms = None
+
+        for recv_ns, raw in self.frames:
+            if t0_ns is None:
+                t0_ns = recv_ns
+                t0_ms = recv_ns // 1_000_000
+                offset_ms = int(time.time() * 1000) - t0_ms
+
+            if self.speed > 0:
+                delay = start + (recv_ns - t0_ns) / 1e9 / self.speed - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            elif self.played % 256 == 0:
+                await asyncio.sleep(0)
+
+            symbol = frame_symbol(raw)
+            if self.rebase:
+                raw = rebase_frame(raw, offset_ms, t0_ms, self.speed)
+            self.played += 1
+            for ws, streams in list(self._subs.items()):
+                if symbol in streams:
+                    await self._send(ws, raw)
+
+        logger.info(f"Replay finished: {self.played} frames in {time.monotonic() - start:.1f}s")
+        self.done.set()
+
+    async def _send(self, ws, msg: str):
+        try:
+            await ws.send(msg)
+            self.sent += 1
+        except Exception:
+            self._subs.pop(ws, None)
+
+    async def _handler(self, ws):
+        query = parse_qs(urlparse(ws.request.path).query)
+        streams = {
+            s.split("@")[0]
+            for s in query.get("streams", [""])[0].split("/")
+            if s.endswith("@trade")
+        }
+        self.connections += 1
+        self._subs[ws] = streams
+        if self._player is None:
+            self._player = asyncio.create_task(self._play())
+        try:
+            await ws.wait_closed()
+        finally:
+            self._subs.pop(ws, None)
+
+    async def start(self):
+        self._server = await serve(self._handler, self.host, self.port, max_queue=None)
+        logger.info(f"Replay stream on {self.url} (speed {self.speed or 'max'})")
+
+    async def stop(self):
+        if self._player is not None:
+            self._player.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+
+def replay_into(stream, frames, batch: int = INGEST_BATCH_MAX) -> dict:
+    """
+    Decodes frames and ingests them into `stream` (a MarketStream) in
+    batches, as fast as possible. Returns frame/tick counts and timing.
+    """
+    start = time.perf_counter()
+    frames_read = accepted = 0
+    pending = []
+    for _, raw in frames:
+        frames_read += 1
+        tick = decode_trade(raw)
+        if tick is None:
+            continue
+        pending.append(tick)
+        if len(pending) >= batch:
+            accepted += stream.ingest(pending)
+            pending = []
+    if pending:
+        accepted += stream.ingest(pending)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "frames": frames_read,
+        "accepted": accepted,
+        "elapsed_sec": elapsed,
+        "frames_per_sec": frames_read / elapsed if elapsed > 0 else None,
+    }
+
+
+async def _serve(args):
+    server = ReplayServer(read_frames(args.path), args.host, args.port, args.speed,
+                          rebase=args.rebase)
+    await server.start()
+    await server.done.wait()
+    await asyncio.sleep(args.linger)
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded Binance trade frames")
+    parser.add_argument("path")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--speed", type=float, default=1.0, help="0 = as fast as possible")
+    parser.add_argument("--rebase", action="store_true", help="shift trade times to now")
+    parser.add_argument("--linger", type=float, default=5.0, help="seconds to keep serving after the end")
+    parser.add_argument("--inline", action="store_true", help="ingest in this process, no socket")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.inline:
+        from app.ingestion.binance_ws import MarketStream, LocalSink, BAR_STORE
+
+        stream = MarketStream(sink=LocalSink(persist=False))
+        result = replay_into(stream, read_frames(args.path))
+        result["gaps"] = stream.gaps
+        result["duplicates"] = stream.duplicates
+        result["bars_1s"] = {s: BAR_STORE.seq(s) for s in BAR_STORE.symbols()}
+        print(json.dumps(result, indent=2))
+    else:
+        asyncio.run(_serve(args))
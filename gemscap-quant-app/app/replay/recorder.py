@@ -0,0 +1,106 @@
+"""
+Records raw combined-stream websocket frames to a gzip file.
+
+    python -m app.replay.recorder --symbols btcusdt,ethusdt --duration 600
+
+Each line of a recording is `<receive time ns>\\t<raw frame>`, exactly as
+the socket delivered it, so a replay goes through the same decoding and
+ingestion code as live traffic.
+"""
+import argparse
+import asyncio
+import gzip
+import logging
+import os
+import time
+
+from websockets.asyncio.client import connect
+
+from app.config import BINANCE_STREAM_URL, REPLAY_DIR, SYMBOLS
+from app.ingestion.binance_ws import combined_url
+
+logger = logging.getLogger("replay")
+
+
+class FrameWriter:
+    """
+    Appends frames to a gzip recording.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.frames = 0
+        self._f = gzip.open(path, "wt", encoding="utf-8", compresslevel=6)
+
+    def write(self, raw, recv_ns: int | None = None):
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        if recv_ns is None:
+            recv_ns = time.time_ns()
+        self._f.write(f"{recv_ns}\t{raw}\n")
+        self.frames += 1
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_frames(path: str):
+    """
+    Yields (receive time ns, raw frame) from a recording.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            recv_ns, _, raw = line.rstrip("\n").partition("\t")
+            if raw:
+                yield int(recv_ns), raw
+
+
+async def record(url: str, path: str, duration: float | None = None,
+                 max_frames: int | None = None) -> int:
+    """
+    Records frames from `url` until `duration` seconds or `max_frames`
+    frames, reconnecting if the socket drops. Returns the frame count.
+    """
+    deadline = None if duration is None else time.monotonic() + duration
+    with FrameWriter(path) as writer:
+        while deadline is None or time.monotonic() < deadline:
+            try:
+                async with connect(url, open_timeout=10, max_size=2 ** 20) as ws:
+                    logger.info(f"Recording {url} to {path}")
+                    while True:
+                        timeout = None if deadline is None else deadline - time.monotonic()
+                        if timeout is not None and timeout <= 0:
+                            return writer.frames
+                        message = await asyncio.wait_for(ws.recv(), timeout)
+                        writer.write(message)
+                        if max_frames and writer.frames >= max_frames:
+                            return writer.frames
+            except asyncio.TimeoutError:
+                break
+            except Exception as e:
+                logger.warning(f"Recording connection failed: {e!r}")
+                await asyncio.sleep(1)
+        return writer.frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record Binance combined trade stream frames")
+    parser.add_argument("--symbols", default=",".join(SYMBOLS))
+    parser.add_argument("--url", default=BINANCE_STREAM_URL)
+    parser.add_argument("--duration", type=float, default=None, help="seconds")
+    parser.add_argument("--max-frames", type=int, default=None)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    out = args.out or os.path.join(REPLAY_DIR, time.strftime("trades_%Y%m%d_%H%M%S.jsonl.gz"))
+    url = combined_url(args.url, args.symbols.split(","))
+    n = asyncio.run(record(url, out, args.duration, args.max_frames))
+    logger.info(f"Recorded {n} frames to {out}")
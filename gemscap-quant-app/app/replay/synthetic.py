@@ -0,0 +1,84 @@
+"""
+Synthetic cointegrated pair, written as a replayable recording.
+
+    python -m app.replay.synthetic --out data/replays/synth.jsonl.gz --trades 200000
+
+log(x) is a random walk and log(y) = alpha + beta * log(x) + u, where u
+is an Ornstein-Uhlenbeck residual with the given half-life. Since beta
+and the half-life are known, analytics run on a replay can be checked
+against the true values.
+"""
+import argparse
+import json
+import math
+import os
+import random
+
+from app.config import REPLAY_DIR
+from app.replay.recorder import FrameWriter
+
+
+def _frame(symbol: str, t_ms: int, trade_id: int, price: float, size: float, buyer_maker: bool) -> str:
+    return json.dumps({"stream": f"{symbol}@trade", "data": {
+        "e": "trade", "E": t_ms, "T": t_ms, "s": symbol.upper(), "t": trade_id,
+        "p": f"{price:.4f}", "q": f"{size:.3f}", "X": "MARKET", "m": buyer_maker,
+    }}, separators=(",", ":"))
+
+
+def cointegrated_frames(symbol_y: str = "ethusdt", symbol_x: str = "btcusdt",
+                        trades: int = 100_000, rate: float = 20.0,
+                        beta: float = 1.2, alpha: float = -4.6,
+                        half_life_sec: float = 30.0, resid_vol: float = 5e-4,
+                        x_vol: float = 1e-4, x0: float = 60000.0,
+                        start_ms: int = 1_700_000_000_000, seed: int = 0):
+    """
+    Yields (receive time ns, raw frame) for `trades` trades alternating
+    between the two symbols at about `rate` trades per second each, with
+    exponential inter-arrival times and sequential trade ids.
+    """
+    rng = random.Random(seed)
+    log_x = math.log(x0)
+    resid = 0.0
+    t = float(start_ms)
+    ids = {symbol_y: 1, symbol_x: 1}
+
+    for k in range(trades):
+        dt = rng.expovariate(2 * rate)
+        t += dt * 1000
+        # exact OU step over dt
+        decay = 0.5 ** (dt / half_life_sec)
+        resid = resid * decay + rng.gauss(0, resid_vol * math.sqrt(1 - decay * decay))
+        log_x += rng.gauss(0, x_vol * math.sqrt(dt * rate))
+
+        symbol = symbol_x if k % 2 == 0 else symbol_y
+        price = math.exp(log_x) if symbol == symbol_x else math.exp(alpha + beta * log_x + resid)
+        t_ms = int(t)
+        raw = _frame(symbol, t_ms, ids[symbol], price, rng.expovariate(20), rng.random() < 0.5)
+        ids[symbol] += 1
+        yield t_ms * 1_000_000, raw
+
+
+def write_synthetic(path: str, **kwargs) -> int:
+    with FrameWriter(path) as writer:
+        for recv_ns, raw in cointegrated_frames(**kwargs):
+            writer.write(raw, recv_ns)
+        return writer.frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic cointegrated-pair recording")
+    parser.add_argument("--out", default=os.path.join(REPLAY_DIR, "synthetic.jsonl.gz"))
+    parser.add_argument("--symbol-y", default="ethusdt")
+    parser.add_argument("--symbol-x", default="btcusdt")
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--rate", type=float, default=20.0, help="trades per second per symbol")
+    parser.add_argument("--beta", type=float, default=1.2)
+    parser.add_argument("--half-life", type=float, default=30.0, help="residual half-life, seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    n = write_synthetic(
+        args.out, symbol_y=args.symbol_y, symbol_x=args.symbol_x, trades=args.trades,
+        rate=args.rate, beta=args.beta, half_life_sec=args.half_life, seed=args.seed
+    )
+    print(f"Wrote {n} frames to {args.out}")
@@ -1,21 +1,63 @@
+import os
+import threading
 import duckdb
-import pandas as pd
-from app.config import DUCKDB_PATH
+import pyarrow as pa
+from app.config import DATA_DIR, DUCKDB_PATH
+
+_conn = None
+_lock = threading.Lock()
+
+
+def get_conn():
+    """
+    Shared DuckDB connection, opened on first use. Threads should work on
+    their own `get_conn().cursor()`.
+    """
+    global _conn
+    if _conn is None:
+        with _lock:
+            if _conn is None:
+                os.makedirs(DATA_DIR, exist_ok=True)
+                _conn = duckdb.connect(DUCKDB_PATH)
+    return _conn
 
-conn = duckdb.connect(DUCKDB_PATH)
 
 def init_db():
+    conn = get_conn()
     conn.execute("""
         CREATE TABLE IF NOT EXISTS ticks (
             symbol VARCHAR,
             ts TIMESTAMP,
             price DOUBLE,
-            size DOUBLE
+            size DOUBLE,
+            trade_id BIGINT
         )
     """)
+    conn.execute("ALTER TABLE ticks ADD COLUMN IF NOT EXISTS trade_id BIGINT")
+
+
+def ticks_table(symbol, ts, price, size, trade_id) -> pa.Table:
+    """
+    Arrow table in `ticks` column order; `ts` is epoch nanoseconds.
+    """
+    return pa.table({
+        "symbol": pa.array(symbol, type=pa.string()),
+        "ts": pa.array(ts, type=pa.int64()).cast(pa.timestamp("ns")),
+        "price": pa.array(price, type=pa.float64()),
+        "size": pa.array(size, type=pa.float64()),
+        "trade_id": pa.array(trade_id, type=pa.int64()),
+    })
+
 
-def insert_ticks(ticks: list[dict]):
-    if not ticks:
+def insert_ticks(batch: pa.Table, conn=None):
+    """
+    Bulk insert through DuckDB's Arrow scan, no per-row conversion.
+    """
+    if batch.num_rows == 0:
         return
-    df = pd.DataFrame(ticks)
-    conn.execute("INSERT INTO ticks SELECT * FROM df")
+    conn = conn or get_conn().cursor()
+    conn.register("tick_batch", batch)
+    try:
+        conn.execute("INSERT INTO ticks SELECT symbol, ts, price, size, trade_id FROM tick_batch")
+    finally:
+        conn.unregister("tick_batch")
@@ -0,0 +1,296 @@
+import glob
+import logging
+import os
+import threading
+import time
+import uuid
+import pandas as pd
+
+from app.config import PARQUET_DIR, HOT_RETENTION_SEC, ARCHIVE_INTERVAL_SEC
+from app.storage.duckdb_store import get_conn
+
+logger = logging.getLogger("parquet_archive")
+
+# Layout: PARQUET_DIR/symbol=<symbol>/date=<YYYY-MM-DD>/part-*.parquet
+
+
+def _to_ts(value):
+    """
+    Naive UTC timestamp (what DuckDB stores) from ns ints, strings or datetimes.
+    """
+    if value is None:
+        return None
+    ts = pd.Timestamp(value, unit="ns") if isinstance(value, int) else pd.Timestamp(value)
+    if ts.tzinfo is not None:
+        ts = ts.tz_convert("UTC").tz_localize(None)
+    return ts.floor("us").to_pydatetime()
+
+
+def _archive_glob() -> str:
+    return os.path.join(PARQUET_DIR, "*", "*", "*.parquet")
+
+
+def _has_archive() -> bool:
+    return bool(glob.glob(_archive_glob()))
+
+
+def archive_ticks(cutoff=None, conn=None) -> int:
+    """
+    Moves ticks older than `cutoff` (default: now - HOT_RETENTION_SEC) from
+    the DuckDB `ticks` table into the Parquet archive. Returns rows moved.
+    """
+    conn = conn or get_conn().cursor()
+    if cutoff is None:
+        cutoff = pd.Timestamp.now("UTC") - pd.Timedelta(seconds=HOT_RETENTION_SEC)
+    cutoff = _to_ts(cutoff)
+
+    rows = conn.execute("SELECT count(*) FROM ticks WHERE ts < ?", [cutoff]).fetchone()[0]
+    if rows == 0:
+        return 0
+
+    os.makedirs(PARQUET_DIR, exist_ok=True)
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        conn.execute(f"""
+            COPY (
+                SELECT symbol, CAST(ts AS DATE) AS date, ts, price, size, trade_id
+                FROM ticks
+                WHERE ts < ?
+                ORDER BY symbol, ts
+            ) TO '{PARQUET_DIR}' (
+                FORMAT PARQUET,
+                PARTITION_BY (symbol, date),
+                FILENAME_PATTERN 'part-{{uuid}}',
+                OVERWRITE_OR_IGNORE
+            )
+        """, [cutoff])
+        conn.execute("DELETE FROM ticks WHERE ts < ?", [cutoff])
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+
+    logger.info(f"Archived {rows} ticks older than {cutoff}")
+    return rows
+
+
+def compact_partitions(min_files: int = 4, conn=None) -> int:
+    """
+    Rewrites every partition holding `min_files` or more part files into a
+    single ts-sorted file. The new file is in place before the old ones are
+    removed, so a crash can leave duplicates but never loses ticks.
+    """
+    conn = conn or get_conn().cursor()
+    compacted = 0
+
+    for part_dir in glob.glob(os.path.join(PARQUET_DIR, "*", "*")):
+        files = sorted(glob.glob(os.path.join(part_dir, "*.parquet")))
+        if len(files) < min_files:
+            continue
+
+        tmp = os.path.join(part_dir, f".compact-{uuid.uuid4().hex}.tmp")
+        conn.execute(f"""
+            COPY (
+                SELECT ts, price, size, trade_id
+                FROM read_parquet({files!r})
+                ORDER BY ts
+            ) TO '{tmp}' (FORMAT PARQUET)
+        """)
+        os.replace(tmp, os.path.join(part_dir, f"part-{uuid.uuid4().hex}.parquet"))
+        for f in files:
+            os.remove(f)
+        compacted += 1
+
+    return compacted
+
+
+def _tick_sources(columns: str, symbol: str, start, end, symbol_param: str = "symbol"):
+    """
+    UNION ALL of the archive and the hot table restricted to one symbol and
+    time range. The date bound lets DuckDB skip whole partitions; the ts
+    bounds are pushed down to the Parquet row-group statistics.
+    """
+    params = {symbol_param: symbol}
+    ts_filter = f"symbol = ${symbol_param}"
+    date_filter = ""
+
+    if start is not None:
+        params["start"] = start
+        ts_filter += " AND ts >= $start"
+        date_filter += " AND date >= CAST($start AS DATE)"
+    if end is not None:
+        params["end"] = end
+        ts_filter += " AND ts < $end"
+        date_filter += " AND date <= CAST($end AS DATE)"
+
+    sources = [f"SELECT {columns} FROM ticks WHERE {ts_filter}"]
+    if _has_archive():
+        sources.insert(0, f"""
+            SELECT {columns}
+            FROM read_parquet('{_archive_glob()}', hive_partitioning = true)
+            WHERE {ts_filter}{date_filter}
+        """)
+
+    return " UNION ALL ".join(sources), params
+
+
+def query_ticks(symbol: str, start=None, end=None, conn=None) -> pd.DataFrame:
+    """
+    Ticks for `symbol` with start <= ts < end, from the archive and the hot table.
+    """
+    conn = conn or get_conn().cursor()
+    sql, params = _tick_sources("ts, price, size, trade_id", symbol, _to_ts(start), _to_ts(end))
+    return conn.execute(sql + " ORDER BY ts", params).df()
+
+
+def recent_ticks(symbol: str, limit: int, lookback_sec: float, conn=None) -> dict:
+    """
+    The newest `limit` ticks within `lookback_sec`, oldest first, as NumPy
+    columns with `ts` in epoch nanoseconds.
+    """
+    conn = conn or get_conn().cursor()
+    start = _to_ts(pd.Timestamp.now("UTC") - pd.Timedelta(seconds=lookback_sec))
+    sql, params = _tick_sources("ts, price, size, trade_id", symbol, start, None)
+    params["limit"] = limit
+
+    cols = conn.execute(f"""
+        SELECT * FROM (
+            SELECT * FROM ({sql}) ORDER BY ts DESC LIMIT $limit
+        ) ORDER BY ts
+    """, params).fetchnumpy()
+
+    return {
+        "ts": cols["ts"].astype("datetime64[ns]").view("int64"),
+        "price": cols["price"],
+        "size": cols["size"],
+        "trade_id": cols["trade_id"],
+    }
+
+
+def query_bars(symbol: str, start=None, end=None, interval: str = "1s", conn=None) -> pd.DataFrame:
+    """
+    OHLCV / VWAP / count bars aggregated inside DuckDB, indexed by UTC bar start.
+    """
+    conn = conn or get_conn().cursor()
+    sql, params = _tick_sources("ts, price, size", symbol, _to_ts(start), _to_ts(end))
+    params["step"] = int(pd.Timedelta(interval).value // 1000)
+
+    df = conn.execute(f"""
+        SELECT
+            time_bucket(to_microseconds($step), ts) AS ts,
+            arg_min(price, ts) AS open,
+            max(price) AS high,
+            min(price) AS low,
+            arg_max(price, ts) AS close,
+            sum(size) AS volume,
+            sum(price * size) / nullif(sum(size), 0) AS vwap,
+            count(*) AS count
+        FROM ({sql})
+        GROUP BY 1
+        ORDER BY 1
+    """, params).df()
+
+    df["ts"] = pd.to_datetime(df["ts"]).dt.tz_localize("UTC")
+    return df.set_index("ts")
+
+
+def query_pair_bars(symbol_y: str, symbol_x: str, start=None, end=None,
+                    interval: str = "1s", conn=None) -> pd.DataFrame:
+    """
+    Aligned close bars of both legs (y, x) and y's volume, indexed by UTC
+    bar start, as the live BarBuilders would have produced them: buckets
+    without trades repeat the previous close with zero volume, and the
+    series starts at the first bucket where both legs have traded. Bucketing,
+    the bucket grid and the forward-fill all run inside DuckDB.
+
+    With no `end` the newest bucket may still be filling and is dropped.
+    """
+    conn = conn or get_conn().cursor()
+    start, end = _to_ts(start), _to_ts(end)
+    y_sql, params = _tick_sources("ts, price, size", symbol_y, start, end, "symbol_y")
+    x_sql, x_params = _tick_sources("ts, price, size", symbol_x, start, end, "symbol_x")
+    params.update(x_params)
+    params["step"] = int(pd.Timedelta(interval).value // 1000)
+
+    df = conn.execute(f"""
+        WITH
+        y AS (
+            SELECT time_bucket(to_microseconds($step), ts) AS b,
+                   arg_max(price, ts) AS close, sum(size) AS volume
+            FROM ({y_sql}) GROUP BY 1
+        ),
+        x AS (
+            SELECT time_bucket(to_microseconds($step), ts) AS b,
+                   arg_max(price, ts) AS close
+            FROM ({x_sql}) GROUP BY 1
+        ),
+        grid AS (
+            -- from the first bucket of either leg, so the leg that traded
+            -- first has a close to carry into the common range
+            SELECT unnest(generate_series(
+                least((SELECT min(b) FROM y), (SELECT min(b) FROM x)),
+                least((SELECT max(b) FROM y), (SELECT max(b) FROM x)),
+                to_microseconds($step)
+            )) AS b
+        ),
+        filled AS (
+            SELECT
+                grid.b AS ts,
+                last_value(y.close IGNORE NULLS) OVER w AS y,
+                last_value(x.close IGNORE NULLS) OVER w AS x,
+                coalesce(y.volume, 0) AS volume
+            FROM grid
+            LEFT JOIN y ON y.b = grid.b
+            LEFT JOIN x ON x.b = grid.b
+            WINDOW w AS (ORDER BY grid.b ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW)
+        )
+        SELECT * FROM filled
+        WHERE y IS NOT NULL AND x IS NOT NULL
+        ORDER BY 1
+    """, params).df()
+
+    df["ts"] = pd.to_datetime(df["ts"]).dt.tz_localize("UTC")
+    df = df.set_index("ts")
+    if end is None and len(df):
+        df = df.iloc[:-1]
+    return df
+
+
+class ArchiveWorker:
+    """
+    Background thread that periodically rolls old ticks into Parquet and
+    compacts partitions.
+    """
+
+    def __init__(self, interval: float = ARCHIVE_INTERVAL_SEC):
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self.last_run_sec = 0.0
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="parquet-archive", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_once(self):
+        conn = get_conn().cursor()
+        start = time.perf_counter()
+        archive_ticks(conn=conn)
+        compact_partitions(conn=conn)
+        self.last_run_sec = time.perf_counter() - start
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Parquet archive run failed")
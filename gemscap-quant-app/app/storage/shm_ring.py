@@ -0,0 +1,190 @@
+import time
+from multiprocessing import resource_tracker
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from app.storage.tick_buffer import TICK_COLUMNS
+
+MAGIC = 0x47515452494E4731  # "GQTRING1"
+
+# int64 header slots
+_MAGIC, _CAPACITY, _EPOCH, _RESERVED, _TOTAL, _CLOSED = range(6)
+HEADER_SLOTS = 8
+HEADER_BYTES = HEADER_SLOTS * 8
+
+
+def _attach(name: str) -> SharedMemory:
+    """
+    Maps an existing segment without letting this process's resource
+    tracker unlink it at exit (it belongs to the writer).
+    """
+    try:
+        return SharedMemory(name=name, track=False)
+    except TypeError:
+        # Python < 3.13 has no `track`; attaching registers the segment
+        shm = SharedMemory(name=name)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class ShmTickRing:
+    """
+    Single-writer / multi-reader tick ring in POSIX shared memory.
+
+    Layout: an int64 header, then one fixed array per tick column. Row `r`
+    (counted from the first row ever written) lives in slot r % capacity.
+
+    The writer publishes a batch seqlock-style: it first raises `reserved`
+    to the end of the batch, writes the rows, then raises `total` to the
+    same value. Readers copy rows below `total`, then re-read `reserved`:
+    any copied row older than reserved - capacity may have been
+    overwritten during the copy and is discarded. Readers never block the
+    writer and never see a torn row. This relies on stores becoming
+    visible in program order (x86-64 total store order).
+
+    `epoch` changes every time the segment is created, so readers can
+    notice that the writer restarted and re-attach.
+    """
+
+    def __init__(self, shm: SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self.header[_CAPACITY])
+
+        self._cols = {}
+        offset = HEADER_BYTES
+        for name, dtype in TICK_COLUMNS.items():
+            self._cols[name] = np.ndarray((self.capacity,), dtype=dtype, buffer=shm.buf, offset=offset)
+            offset += self.capacity * np.dtype(dtype).itemsize
+
+    @classmethod
+    def create(cls, name: str, capacity: int):
+        row_bytes = sum(np.dtype(d).itemsize for d in TICK_COLUMNS.values())
+        try:
+            # a segment left over from a writer that died without cleanup
+            stale = _attach(name)
+            stale.close()
+            stale.unlink()
+        except FileNotFoundError:
+            pass
+
+        shm = SharedMemory(name=name, create=True, size=HEADER_BYTES + capacity * row_bytes)
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_EPOCH] = time.time_ns()
+        header[_MAGIC] = MAGIC
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str):
+        shm = _attach(name)
+        if shm.size < HEADER_BYTES or \
+                int(np.ndarray((1,), dtype=np.int64, buffer=shm.buf)[0]) != MAGIC:
+            shm.close()
+            raise FileNotFoundError(f"Shared memory {name} is not an initialized tick ring")
+        return cls(shm, owner=False)
+
+    # ------------------------------
+    # Header
+    # ------------------------------
+    @property
+    def total(self) -> int:
+        return int(self.header[_TOTAL])
+
+    @property
+    def epoch(self) -> int:
+        return int(self.header[_EPOCH])
+
+    @property
+    def closed(self) -> bool:
+        return bool(self.header[_CLOSED])
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    # ------------------------------
+    # Writer
+    # ------------------------------
+    def extend(self, ts, price, size, trade_id):
+        values = {"ts": ts, "price": price, "size": size, "trade_id": trade_id}
+        n = len(ts)
+        if n == 0:
+            return
+        skip = max(n - self.capacity, 0)
+
+        start = self.total + skip
+        end = self.total + n
+        self.header[_RESERVED] = end
+
+        lo = start % self.capacity
+        first = min(n - skip, self.capacity - lo)
+        for name, col in self._cols.items():
+            src = np.asarray(values[name])[skip:]
+            col[lo:lo + first] = src[:first]
+            col[:len(src) - first] = src[first:]
+
+        self.header[_TOTAL] = end
+
+    def append(self, ts: int, price: float, size: float, trade_id: int = -1):
+        end = self.total + 1
+        self.header[_RESERVED] = end
+        i = (end - 1) % self.capacity
+        self._cols["ts"][i] = ts
+        self._cols["price"][i] = price
+        self._cols["size"][i] = size
+        self._cols["trade_id"][i] = trade_id
+        self.header[_TOTAL] = end
+
+    # ------------------------------
+    # Readers
+    # ------------------------------
+    def read(self, cursor: int | None = None):
+        """
+        Rows from row number `cursor` (None: the oldest retained) up to the
+        newest published one. Returns (columns, next cursor, rows missed
+        because the writer lapped this reader).
+        """
+        total = self.total
+        oldest = max(total - self.capacity, 0)
+        lo = oldest if cursor is None else max(cursor, oldest)
+
+        idx = np.arange(lo, total) % self.capacity
+        cols = {name: col[idx] for name, col in self._cols.items()}
+
+        valid_from = int(self.header[_RESERVED]) - self.capacity
+        if valid_from > lo:
+            drop = min(valid_from - lo, total - lo)
+            cols = {name: c[drop:] for name, c in cols.items()}
+            lo += drop
+
+        missed = 0 if cursor is None else lo - cursor
+        return cols, total, missed
+
+    def snapshot(self, n: int | None = None) -> dict:
+        total = self.total
+        start = None if n is None else max(total - n, 0)
+        return self.read(start)[0]
+
+    def last_trade_id(self):
+        total = self.total
+        return int(self._cols["trade_id"][(total - 1) % self.capacity]) if total else None
+
+    def close(self):
+        self._cols = {}
+        self.header = None
+        self.shm.close()
+
+    def unlink(self):
+        """
+        Writer shutdown: flags the ring closed for readers and removes it.
+        """
+        self.header[_CLOSED] = 1
+        self.close()
+        self.shm.unlink()
+
+
+def ring_name(prefix: str, symbol: str) -> str:
+    return f"{prefix}{symbol}"
@@ -0,0 +1,183 @@
+import threading
+import numpy as np
+import pandas as pd
+
+DEFAULT_CAPACITY = 10_000
+
+TICK_COLUMNS = {
+    "ts": np.int64,
+    "price": np.float64,
+    "size": np.float64,
+    "trade_id": np.int64,
+}
+
+
+class ColumnRing:
+    """
+    Fixed-capacity columnar ring buffer keyed by an int64 `ts` column.
+
+    Columns are preallocated NumPy arrays of twice the capacity. Rows are
+    written linearly and, once the end is reached, the newest `capacity`
+    rows are moved back to the front. Appends never allocate and the
+    retained window is always contiguous, so `view_last` / `view_range`
+    can return zero-copy slices.
+
+    Views alias the internal storage: they are only valid until the next
+    append. Use `snapshot` when the data has to outlive further writes.
+    """
+
+    def __init__(self, columns: dict, capacity: int = DEFAULT_CAPACITY):
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+
+        self.capacity = capacity
+        self._cols = {
+            name: np.zeros(capacity * 2, dtype=dtype)
+            for name, dtype in columns.items()
+        }
+        self._arrays = tuple(self._cols.values())
+        self._ts = self._cols["ts"]
+
+        self._start = 0
+        self._end = 0
+        self.total = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._end - self._start
+
+    def _move_to_front(self, keep: int):
+        src = slice(self._end - keep, self._end)
+        for col in self._arrays:
+            col[:keep] = col[src]
+        self._start = 0
+        self._end = keep
+
+    def append_row(self, *values):
+        """
+        Appends one row; values are given in column order.
+        """
+        with self._lock:
+            if self._end == len(self._ts):
+                self._move_to_front(self.capacity - 1)
+
+            i = self._end
+            for col, value in zip(self._arrays, values):
+                col[i] = value
+
+            self._end = i + 1
+            if self._end - self._start > self.capacity:
+                self._start += 1
+            self.total += 1
+
+    def extend(self, **columns):
+        """
+        Appends a batch of rows given as equally sized arrays per column.
+        Only the newest `capacity` rows of the batch are retained.
+        """
+        n = len(columns["ts"])
+        if n == 0:
+            return
+
+        with self._lock:
+            self.total += n
+
+            skip = max(n - self.capacity, 0)
+            n -= skip
+
+            if self._end + n > len(self._ts):
+                self._move_to_front(min(len(self), self.capacity - n))
+
+            dst = slice(self._end, self._end + n)
+            for name, col in self._cols.items():
+                col[dst] = np.asarray(columns[name])[skip:]
+
+            self._end += n
+            self._start = max(self._start, self._end - self.capacity)
+
+    def _columns(self, lo: int, hi: int) -> dict:
+        return {name: col[lo:hi] for name, col in self._cols.items()}
+
+    def view_last(self, n: int | None = None) -> dict:
+        """
+        Zero-copy column views of the newest `n` rows (all if None).
+        """
+        lo = self._start if n is None else max(self._start, self._end - n)
+        return self._columns(lo, self._end)
+
+    def view_range(self, start_ns: int | None = None, end_ns: int | None = None) -> dict:
+        """
+        Zero-copy column views of rows with start_ns <= ts < end_ns.
+        Relies on timestamps being non-decreasing, as delivered by the exchange.
+        """
+        ts = self._ts[self._start:self._end]
+        lo = 0 if start_ns is None else int(np.searchsorted(ts, start_ns, side="left"))
+        hi = len(ts) if end_ns is None else int(np.searchsorted(ts, end_ns, side="left"))
+        return self._columns(self._start + lo, self._start + hi)
+
+    def snapshot(self, n: int | None = None) -> dict:
+        """
+        Consistent copy of the newest `n` rows, safe to use across appends.
+        """
+        with self._lock:
+            return {k: v.copy() for k, v in self.view_last(n).items()}
+
+    def last(self, column: str):
+        if self._end == self._start:
+            return None
+        return self._cols[column][self._end - 1].item()
+
+    def to_frame(self, n: int | None = None) -> pd.DataFrame:
+        """
+        DataFrame with a UTC `ts` column, built straight from the column arrays.
+        """
+        cols = self.snapshot(n)
+        cols["ts"] = pd.to_datetime(cols["ts"], unit="ns", utc=True)
+        return pd.DataFrame(cols)
+
+
+class TickRingBuffer(ColumnRing):
+    """
+    Per-symbol tick buffer: epoch-ns timestamp, price, size and trade id.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        super().__init__(TICK_COLUMNS, capacity)
+
+    def append(self, ts: int, price: float, size: float, trade_id: int = -1):
+        """
+        Appends a single tick. `ts` is epoch nanoseconds (UTC).
+        """
+        self.append_row(ts, price, size, trade_id)
+
+    def extend(self, ts, price, size, trade_id=None):
+        if trade_id is None:
+            trade_id = np.full(len(ts), -1, dtype=np.int64)
+        super().extend(ts=ts, price=price, size=size, trade_id=trade_id)
+
+    def last_trade_id(self):
+        return self.last("trade_id")
+
+
+class TickStore:
+    """
+    Per-symbol registry of ring buffers, created on first access.
+    """
+
+    def __init__(self, capacity: int = DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self._buffers = {}
+        self._lock = threading.Lock()
+
+    def __getitem__(self, symbol: str) -> TickRingBuffer:
+        buf = self._buffers.get(symbol)
+        if buf is None:
+            with self._lock:
+                buf = self._buffers.setdefault(symbol, TickRingBuffer(self.capacity))
+        return buf
+
+    def __contains__(self, symbol: str):
+        return symbol in self._buffers
+
+    def symbols(self):
+        return list(self._buffers)
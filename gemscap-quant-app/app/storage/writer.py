@@ -0,0 +1,150 @@
+import logging
+import queue
+import threading
+import time
+
+from app.metrics import REGISTRY
+from app.storage.duckdb_store import get_conn, init_db, insert_ticks, ticks_table
+
+logger = logging.getLogger("tick_writer")
+
+FLUSH_SECONDS = REGISTRY.histogram("gq_duckdb_flush_seconds", "Duration of one DuckDB tick batch insert")
+ROWS_WRITTEN = REGISTRY.counter("gq_duckdb_rows_written_total", "Ticks persisted to DuckDB")
+FLUSH_ERRORS = REGISTRY.counter("gq_duckdb_flush_errors_total", "Failed DuckDB batch inserts")
+
+
+class TickWriter:
+    """
+    Background DuckDB writer fed by the ingestion loop.
+
+    `submit` / `submit_many` never block: ticks (or batches of ticks) go
+    onto a queue bounded at `max_queue` ticks, whatever the batch sizes,
+    and are dropped (and counted) when they would not fit. A daemon thread
+    drains the queue and flushes a batch whenever `batch_size` ticks are
+    pending or `flush_interval` seconds have passed since the last flush.
+    """
+
+    def __init__(self, max_queue: int = 100_000, batch_size: int = 5_000,
+                 flush_interval: float = 1.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_queue = max_queue
+        self._queue = queue.Queue()
+        # ticks in the queue; the bound applies to this, not to queue items
+        self._depth = 0
+        self._depth_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.dropped = 0
+        self.high_watermark = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.last_flush_sec = 0.0
+        self._last_drop_log = 0.0
+
+    def submit(self, symbol: str, ts: int, price: float, size: float, trade_id: int) -> bool:
+        return self._put((symbol, ts, price, size, trade_id), 1)
+
+    def submit_many(self, rows: list) -> bool:
+        """
+        Enqueues a list of (symbol, ts, price, size, trade_id) rows as a
+        single queue item.
+        """
+        return self._put(rows, len(rows))
+
+    @property
+    def queue_depth(self) -> int:
+        return self._depth
+
+    def _put(self, item, rows: int) -> bool:
+        with self._depth_lock:
+            depth = self._depth + rows
+            if depth <= self.max_queue:
+                self._depth = depth
+                self._queue.put_nowait(item)
+        if depth > self.max_queue:
+            self.dropped += rows
+            now = time.monotonic()
+            if now - self._last_drop_log > 5:
+                self._last_drop_log = now
+                logger.warning(f"Tick writer queue full, {self.dropped} ticks dropped so far")
+            return False
+
+        if depth > self.high_watermark:
+            self.high_watermark = depth
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        init_db()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="tick-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        cursor = get_conn().cursor()
+        pending = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while not (self._stop.is_set() and self._queue.empty()):
+            timeout = max(deadline - time.monotonic(), 0.0)
+            try:
+                self._take(pending, self._queue.get(timeout=timeout))
+                while len(pending) < self.batch_size:
+                    self._take(pending, self._queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            if len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                self._flush(cursor, pending)
+                pending = []
+                deadline = time.monotonic() + self.flush_interval
+
+        self._flush(cursor, pending)
+
+    def _take(self, pending: list, item):
+        if isinstance(item, list):
+            pending.extend(item)
+            rows = len(item)
+        else:
+            pending.append(item)
+            rows = 1
+        with self._depth_lock:
+            self._depth -= rows
+
+    def _flush(self, cursor, rows):
+        if not rows:
+            return
+
+        start = time.perf_counter()
+        try:
+            insert_ticks(ticks_table(*zip(*rows)), cursor)
+        except Exception:
+            logger.exception(f"Failed to persist {len(rows)} ticks")
+            FLUSH_ERRORS.inc()
+            return
+
+        self.last_flush_sec = time.perf_counter() - start
+        FLUSH_SECONDS.observe(self.last_flush_sec)
+        ROWS_WRITTEN.inc(len(rows))
+        self.rows_written += len(rows)
+        self.flushes += 1
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._depth,
+            "queue_capacity": self.max_queue,
+            "high_watermark": self.high_watermark,
+            "dropped": self.dropped,
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_sec * 1000, 3),
+        }
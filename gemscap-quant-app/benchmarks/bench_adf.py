@@ -0,0 +1,84 @@
+"""
+ADF accuracy and speed: statsmodels `adfuller` vs app.analytics.stationarity.
+
+    python -m benchmarks.bench_adf [--series 50] [--length 1000]
+
+Compares, on synthetic AR(1) spreads of prices around 60k:
+  - adfuller(autolag="AIC")            one series at a time (what the API used)
+  - adf(lag=None)                      same AIC search, batched normal equations
+  - adf(cache_key=...)                 lag reused from LagCache
+  - adf_stats(matrix, lag)             every series in one batched solve
+"""
+import argparse
+import time
+import warnings
+
+import numpy as np
+from statsmodels.tsa.stattools import adfuller
+
+from app.analytics.stationarity import LagCache, adf, adf_stats, mackinnon_p, select_lag
+
+
+def make_series(count: int, length: int, seed: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    phi = rng.uniform(0.9, 1.0, count)
+    e = rng.normal(size=(count, length))
+    y = np.zeros((count, length))
+    for t in range(1, length):
+        y[:, t] = phi * y[:, t - 1] + e[:, t] + 0.3 * e[:, t - 1]
+    return y + 60_000
+
+
+def timed(fn, repeat: int = 3) -> tuple:
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return out, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--series", type=int, default=50)
+    parser.add_argument("--length", type=int, default=1000)
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore", FutureWarning)
+    y = make_series(args.series, args.length)
+
+    ref, t_ref = timed(lambda: [adfuller(s, autolag="AIC") for s in y], repeat=1)
+    ours, t_ours = timed(lambda: [adf(s) for s in y])
+
+    cache = LagCache()
+    for i, s in enumerate(y):
+        cache.get(i, s)
+    _, t_cached = timed(lambda: [adf(s, lag=cache.get(i, s)) for i, s in enumerate(y)])
+
+    lags = select_lag(y)
+    stats, t_batch = timed(lambda: {
+        lag: adf_stats(y[lags == lag], lag) for lag in np.unique(lags)
+    })
+    _, t_p = timed(lambda: mackinnon_p(np.concatenate(list(stats.values()))))
+
+    lag_match = np.mean([r[2] == o["lag"] for r, o in zip(ref, ours)])
+    stat_err = max(abs(r[0] - o["adf_stat"]) for r, o in zip(ref, ours))
+    p_err = max(abs(r[1] - o["p_value"]) for r, o in zip(ref, ours))
+
+    print(f"{args.series} series x {args.length} points")
+    print(f"  lag agreement          {lag_match:.0%}")
+    print(f"  max |stat diff|        {stat_err:.2e}")
+    print(f"  max |p-value diff|     {p_err:.2e}")
+    print()
+    print(f"  {'method':<28}{'total ms':>10}{'per series ms':>16}{'speedup':>10}")
+    for name, t in [
+        ("adfuller(autolag=AIC)", t_ref),
+        ("adf (AIC search)", t_ours),
+        ("adf (cached lag)", t_cached),
+        ("adf_stats (batched)", t_batch + t_p),
+    ]:
+        print(f"  {name:<28}{t * 1e3:>10.1f}{t / args.series * 1e3:>16.3f}{t_ref / t:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
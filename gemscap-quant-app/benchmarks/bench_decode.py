@@ -0,0 +1,141 @@
+"""
+Ingestion decode path: messages/sec and allocation churn.
+
+    python -m benchmarks.bench_decode [--messages 200000] [--symbols 4] [--file recorded.jsonl]
+
+Replays combined-stream trade messages (one raw message per line from
+--file, or synthetic ones in the Binance format) through:
+  - legacy        json.loads + normalize_trade dict (the previous hot path)
+  - <backend>     app.ingestion.decode for each installed decoder
+  - ingest 1/msg  decode + apply one message at a time
+  - ingest batch  decode + MarketStream.ingest in batches of --batch
+
+Allocations are measured with tracemalloc over the first 10k messages:
+blocks still allocated per message afterwards (for the decoders, what
+each decoded trade costs; for ingest, what the stores retain) and the
+peak traced memory of the pass (for ingest this includes the ring
+buffers the stores allocate on first tick).
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import time
+import tracemalloc
+
+os.environ.setdefault("PERSIST_TICKS", "false")
+
+from app.ingestion.decode import DECODERS, make_decoder  # noqa: E402
+from app.ingestion import binance_ws  # noqa: E402
+from app.analytics.bars import BarStore  # noqa: E402
+from app.storage.tick_buffer import TickStore  # noqa: E402
+
+
+def synth_messages(n: int, symbols: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    names = [f"sym{i}usdt" for i in range(symbols)]
+    ids = [1] * symbols
+    prices = [60000.0 / (i + 1) for i in range(symbols)]
+    t = 1_700_000_000_000
+    out = []
+    for k in range(n):
+        i = k % symbols
+        t += rng.randint(0, 3)
+        prices[i] *= 1 + rng.gauss(0, 1e-4)
+        out.append(json.dumps({"stream": f"{names[i]}@trade", "data": {
+            "e": "trade", "E": t, "T": t, "s": names[i].upper(), "t": ids[i],
+            "p": f"{prices[i]:.2f}", "q": f"{rng.expovariate(20):.3f}", "X": "MARKET", "m": False,
+        }}, separators=(",", ":")))
+        ids[i] += 1
+    return out
+
+
+def legacy_decode(message):
+    msg = json.loads(message)
+    data = msg.get("data", msg)
+    if data.get("e") != "trade":
+        return None
+    return {
+        "symbol": data["s"].lower(),
+        "ts": data["T"] * 1_000_000,
+        "price": float(data["p"]),
+        "size": float(data["q"]),
+        "trade_id": data.get("t", -1),
+    }
+
+
+def measure(fn, messages: list, setup=lambda: None) -> dict:
+    state = setup()
+    start = time.perf_counter()
+    fn(messages, state)
+    elapsed = time.perf_counter() - start
+
+    sample = messages[:10_000]
+    state = setup()
+    gc.collect()
+    tracemalloc.start()
+    kept = fn(sample, state)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+
+    blocks = sum(stat.count for stat in snapshot.statistics("filename"))
+    return {
+        "msgs_per_sec": len(messages) / elapsed,
+        "blocks_per_msg": blocks / len(sample),
+        "peak_kib_10k": peak / 1024,
+    }
+
+
+def fresh_stream():
+    binance_ws.TICK_BUFFER = TickStore(capacity=10_000)
+    binance_ws.BAR_STORE = BarStore(["1s", "1min", "5min"], capacity=10_000)
+    return binance_ws.MarketStream()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=200_000)
+    parser.add_argument("--symbols", type=int, default=4)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--file", default=None, help="recorded messages, one per line")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            messages = [line.rstrip("\n") for line in f if line.strip()][:args.messages]
+    else:
+        messages = synth_messages(args.messages, args.symbols)
+
+    results = {"legacy": measure(lambda ms, _: [legacy_decode(m) for m in ms], messages)}
+    for backend in DECODERS:
+        decode = make_decoder(backend)
+        results[backend] = measure(lambda ms, _, d=decode: [d(m) for m in ms], messages)
+
+    decode = make_decoder()
+
+    def one_by_one(ms, stream):
+        for m in ms:
+            tick = decode(m)
+            if tick is not None:
+                stream.ingest([tick])
+
+    def batched(ms, stream):
+        for i in range(0, len(ms), args.batch):
+            stream.ingest([t for t in map(decode, ms[i:i + args.batch]) if t is not None])
+
+    results["ingest 1/msg"] = measure(one_by_one, messages, fresh_stream)
+    results[f"ingest batch {args.batch}"] = measure(batched, messages, fresh_stream)
+
+    base = results["legacy"]["msgs_per_sec"]
+    print(f"{len(messages)} messages, decoders installed: {list(DECODERS)}")
+    print(f"  {'path':<20}{'msgs/sec':>12}{'vs legacy':>11}{'blocks/msg':>12}{'peak KiB/10k':>14}")
+    for name, r in results.items():
+        print(f"  {name:<20}{r['msgs_per_sec']:>12,.0f}{r['msgs_per_sec'] / base:>10.2f}x"
+              f"{r['blocks_per_msg']:>12.2f}{r['peak_kib_10k']:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Analytics and ingestion hot paths at several buffer sizes.
+
+    python -m benchmarks.suite [--sizes 10000,100000,1000000] [--repeat 5] [--only adf|route]
+                               [--out bench.json]
+    python -m benchmarks.suite --out new.json --compare baseline.json [--threshold 0.15]
+    python -m benchmarks.suite --current new.json --compare baseline.json
+
+Each size is N ticks per symbol of a synthetic cointegrated pair
+(ethusdt ~ btcusdt) arriving at --rate trades/s per symbol, so 1M ticks
+is about 14h of trading and 50k one-second bars. Every size runs in its
+own process with the tick buffer and bar capacities set to hold it all.
+
+Cases: tick decode, buffer append/extend, resample (legacy resample_ticks
+and the streaming bar builders), hedge ratio, spread, z-score, ADF,
+half-life, backtest, response encoding (records / columnar JSON / Arrow)
+of the full spread table, and every /analytics/* route end to end through the
+ASGI app - "fresh" right after a new bar closes (snapshot and cache
+invalidated) and "cached" on a repeat request.
+
+Results are JSON: environment, then one record per (case, size) with the
+median and min of --repeat timed runs after a warm-up. --compare flags
+cases whose median is more than --threshold slower than the baseline
+(and at least --min-delta-ms in absolute terms) and exits non-zero.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+DEFAULT_SIZES = "10000,100000,1000000"
+DECODE_MESSAGES = 100_000
+SYMBOL_Y, SYMBOL_X = "ethusdt", "btcusdt"
+
+
+# -------------------------------
+# Synthetic ticks
+# -------------------------------
+def synth_ticks(n: int, rate: float = 20.0, beta: float = 1.2, half_life_sec: float = 30.0,
+                seed: int = 0, start_ns: int = 1_700_000_000_000_000_000) -> dict:
+    """
+    {symbol: {"ts", "price", "size", "trade_id"}} for both legs: log(x) a
+    random walk, log(y) = alpha + beta * log(x) + an AR(1) residual with
+    the given half-life. Trades arrive with exponential gaps at `rate`.
+    """
+    from scipy.signal import lfilter
+
+    rng = np.random.default_rng(seed)
+    gaps = rng.exponential(1.0 / rate, n)
+    ts = start_ns + (np.cumsum(gaps) * 1e9).astype(np.int64)
+
+    decay = 0.5 ** (1.0 / rate / half_life_sec)
+    resid = lfilter([1.0], [1.0, -decay], rng.normal(0, 5e-4 * np.sqrt(1 - decay ** 2), n))
+    log_x = np.log(60_000.0) + np.cumsum(rng.normal(0, 1e-4, n))
+    log_y = -4.6 + beta * log_x + resid
+
+    out = {}
+    for i, (symbol, log_p) in enumerate(((SYMBOL_X, log_x), (SYMBOL_Y, log_y))):
+        out[symbol] = {
+            "ts": ts + i * 1_000_000,
+            "price": np.round(np.exp(log_p), 4),
+            "size": np.round(rng.exponential(0.05, n), 3),
+            "trade_id": np.arange(1, n + 1, dtype=np.int64),
+        }
+    return out
+
+
+def synth_frames(ticks: dict, n: int) -> list:
+    """
+    Raw combined-stream trade messages, alternating between the legs.
+    """
+    frames = []
+    for k in range(n):
+        symbol = (SYMBOL_X, SYMBOL_Y)[k % 2]
+        cols = ticks[symbol]
+        i = k // 2
+        t = int(cols["ts"][i]) // 1_000_000
+        frames.append(json.dumps({"stream": f"{symbol}@trade", "data": {
+            "e": "trade", "E": t, "T": t, "s": symbol.upper(), "t": int(cols["trade_id"][i]),
+            "p": f"{cols['price'][i]:.4f}", "q": f"{cols['size'][i]:.3f}", "X": "MARKET", "m": False,
+        }}, separators=(",", ":")))
+    return frames
+
+
+# -------------------------------
+# Timing
+# -------------------------------
+def measure(fn, repeat: int) -> dict:
+    fn()
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return {"median_ms": statistics.median(runs) * 1e3, "min_ms": min(runs) * 1e3, "repeat": repeat}
+
+
+def run_size(size: int, rate: float, repeat: int, only: str | None) -> list:
+    """
+    All cases at one size. Imports the app here, after the parent set the
+    capacities for this size in the environment.
+    """
+    import pandas as pd
+    import httpx
+
+    from app.analytics.adf import adf_test
+    from app.analytics.backtest import simulate_pairs_trade
+    from app.analytics.bars import BarStore
+    from app.analytics.half_life import half_life
+    from app.analytics.regression import hedge_ratio
+    from app.analytics.resample import resample_ticks
+    from app.analytics.spread import compute_spread
+    from app.analytics.zscore import zscore
+    from app.api.encoding import Table
+    from app.config import RESAMPLE_INTERVALS
+    from app.ingestion.binance_ws import TICK_BUFFER, BAR_STORE
+    from app.ingestion.decode import make_decoder
+    from app.main import app
+    from app.storage.tick_buffer import TickRingBuffer
+
+    ticks = synth_ticks(size, rate)
+    for symbol, cols in ticks.items():
+        TICK_BUFFER[symbol].extend(cols["ts"], cols["price"], cols["size"], cols["trade_id"])
+        BAR_STORE.load(symbol, cols["ts"], cols["price"], cols["size"])
+
+    y = BAR_STORE.closes(SYMBOL_Y)
+    x = BAR_STORE.closes(SYMBOL_X)
+    common = y.index.intersection(x.index)
+    y, x = y.loc[common], x.loc[common]
+    beta = hedge_ratio(x, y)
+    spread = compute_spread(y, x, beta)
+    bt_frame = pd.DataFrame({"spread": spread, "zscore": zscore(spread, 50)}).dropna()
+    table = Table(bt_frame.index, {"spread": bt_frame["spread"], "zscore": bt_frame["zscore"]})
+    leg = ticks[SYMBOL_X]
+    leg_frame = TICK_BUFFER[SYMBOL_X].to_frame()
+
+    decode = make_decoder()
+    frames = synth_frames(ticks, min(size, DECODE_MESSAGES))
+
+    def append_all():
+        buf = TickRingBuffer(size)
+        append = buf.append
+        for t, p, s, i in zip(leg["ts"].tolist(), leg["price"].tolist(),
+                              leg["size"].tolist(), leg["trade_id"].tolist()):
+            append(t, p, s, i)
+
+    def extend_batches():
+        buf = TickRingBuffer(size)
+        for i in range(0, size, 1024):
+            buf.extend(leg["ts"][i:i + 1024], leg["price"][i:i + 1024],
+                       leg["size"][i:i + 1024], leg["trade_id"][i:i + 1024])
+
+    def bars_streaming():
+        store = BarStore(RESAMPLE_INTERVALS, capacity=len(common) + 1000)
+        cols = [leg[k].tolist() for k in ("ts", "price", "size")]
+        for i in range(0, size, 64):
+            store.on_ticks(SYMBOL_X, cols[0][i:i + 64], cols[1][i:i + 64], cols[2][i:i + 64])
+
+    def bars_load():
+        store = BarStore(RESAMPLE_INTERVALS, capacity=len(common) + 1000)
+        store.load(SYMBOL_X, leg["ts"], leg["price"], leg["size"])
+
+    cases = {
+        # (callable, items for per-item cost)
+        "decode": (lambda: [decode(f) for f in frames], len(frames)),
+        "buffer_append": (append_all, size),
+        "buffer_extend_1024": (extend_batches, size),
+        "resample_ticks": (lambda: resample_ticks(leg_frame), size),
+        "bars_on_ticks_64": (bars_streaming, size),
+        "bars_load": (bars_load, size),
+        "hedge_ratio": (lambda: hedge_ratio(x, y), len(y)),
+        "compute_spread": (lambda: compute_spread(y, x, beta), len(y)),
+        "zscore": (lambda: zscore(spread, 50), len(y)),
+        "adf_test": (lambda: adf_test(spread), len(y)),
+        "half_life": (lambda: half_life(spread), len(y)),
+        "backtest": (lambda: simulate_pairs_trade(bt_frame), len(bt_frame)),
+        "encode_records": (table.records, len(table)),
+        "encode_columnar": (table.columnar, len(table)),
+        "encode_arrow": (table.arrow, len(table)),
+    }
+
+    # ---- routes, through the ASGI app (no lifespan: nothing connects out)
+    loop = asyncio.new_event_loop()
+    client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+    clock = {"ts": int(max(c["ts"][-1] for c in ticks.values()))}
+
+    def get(path):
+        response = loop.run_until_complete(client.get(path))
+        if response.status_code != 200 or b'"error"' in response.content[:200]:
+            raise RuntimeError(f"{path}: {response.status_code} {response.content[:200]!r}")
+
+    def new_bar():
+        # one tick per leg a second later closes a bar, invalidating snapshot and cache
+        clock["ts"] += 1_000_000_000
+        for symbol in (SYMBOL_X, SYMBOL_Y):
+            BAR_STORE.on_tick(symbol, clock["ts"], float(ticks[symbol]["price"][-1]), 0.01)
+
+    pair = f"symbol_y={SYMBOL_Y}&symbol_x={SYMBOL_X}"
+    routes = {
+        "spread": f"/analytics/spread?{pair}",
+        "adf": f"/analytics/adf?{pair}",
+        "hedge_ratio": f"/analytics/hedge_ratio?{pair}",
+        "signal_quality": f"/analytics/signal-quality?{pair}",
+        "trade_allowed": f"/analytics/trade-allowed?{pair}",
+        "backtest": f"/analytics/backtest?{pair}",
+        "backtest_sweep": f"/analytics/backtest/sweep?{pair}",
+        "scan": "/analytics/scan",
+    }
+    for name, path in routes.items():
+        cases[f"route_{name}_fresh"] = (lambda p=path: (new_bar(), get(p)), 1)
+        cases[f"route_{name}_cached"] = (lambda p=path: get(p), 1)
+
+    results = []
+    for name, (fn, items) in cases.items():
+        if only and not re.search(only, name):
+            continue
+        r = measure(fn, repeat)
+        r.update(case=name, size=size, items=items,
+                 ns_per_item=round(r["median_ms"] * 1e6 / items, 1) if items > 1 else None)
+        results.append(r)
+        print(f"  {size:>9,} {name:<30}{r['median_ms']:>12.3f} ms", file=sys.stderr, flush=True)
+
+    loop.run_until_complete(client.aclose())
+    loop.close()
+    return results
+
+
+# -------------------------------
+# Orchestration and comparison
+# -------------------------------
+def environment() -> dict:
+    import pandas as pd
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+
+def run_isolated(size: int, args) -> list:
+    bars = int(size / args.rate) + 2000
+    env = dict(
+        os.environ,
+        TICK_BUFFER_CAPACITY=str(size), BAR_CAPACITY=str(bars), SCAN_LOOKBACK=str(bars),
+        PERSIST_TICKS="false", WARM_START="false", CACHE_BACKEND="memory",
+        PROFILING_ENABLED="false", SLOW_LOG_SIZE="0",
+    )
+    cmd = [sys.executable, "-m", "benchmarks.suite", "--worker-size", str(size),
+           "--rate", str(args.rate), "--repeat", str(args.repeat)]
+    if args.only:
+        cmd += ["--only", args.only]
+    out = subprocess.run(cmd, env=env, stdout=subprocess.PIPE, check=True, text=True).stdout
+    return json.loads(out)
+
+
+def compare(current: dict, baseline: dict, threshold: float, min_delta_ms: float) -> int:
+    base = {(r["case"], r["size"]): r for r in baseline["results"]}
+    regressions = 0
+    print(f"baseline {baseline['env'].get('commit')} ({baseline['env'].get('time')}) "
+          f"vs current {current['env'].get('commit')}")
+    print(f"  {'case':<30}{'size':>10}{'base ms':>12}{'now ms':>12}{'ratio':>8}")
+    for r in current["results"]:
+        b = base.get((r["case"], r["size"]))
+        if b is None:
+            print(f"  {r['case']:<30}{r['size']:>10,}{'-':>12}{r['median_ms']:>12.3f}{'new':>8}")
+            continue
+        ratio = r["median_ms"] / b["median_ms"] if b["median_ms"] > 0 else float("inf")
+        flag = ""
+        if ratio > 1 + threshold and r["median_ms"] - b["median_ms"] >= min_delta_ms:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(f"  {r['case']:<30}{r['size']:>10,}{b['median_ms']:>12.3f}{r['median_ms']:>12.3f}"
+              f"{ratio:>7.2f}x{flag}")
+    print(f"{regressions} regression(s) over {threshold:.0%}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Analytics and ingestion benchmark suite")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="ticks per symbol, comma-separated")
+    parser.add_argument("--rate", type=float, default=20.0, help="trades per second per symbol")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--only", default=None, help="regex on case names")
+    parser.add_argument("--out", default=None, help="write results JSON here")
+    parser.add_argument("--compare", default=None, help="baseline results JSON")
+    parser.add_argument("--current", default=None, help="compare this results file instead of running")
+    parser.add_argument("--threshold", type=float, default=0.15)
+    parser.add_argument("--min-delta-ms", type=float, default=0.05)
+    parser.add_argument("--worker-size", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker_size is not None:
+        json.dump(run_size(args.worker_size, args.rate, args.repeat, args.only), sys.stdout)
+        return
+
+    if args.current:
+        with open(args.current) as f:
+            current = json.load(f)
+    else:
+        sizes = [int(float(s)) for s in args.sizes.split(",") if s.strip()]
+        current = {
+            "env": environment(),
+            "params": {"sizes": sizes, "rate": args.rate, "repeat": args.repeat, "only": args.only},
+            "results": [r for size in sizes for r in run_isolated(size, args)],
+        }
+        text = json.dumps(current, indent=2)
+        if args.out:
+            with open(args.out, "w") as f:
+                f.write(text + "\n")
+        elif not args.compare:
+            print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(current, baseline, args.threshold, args.min_delta_ms):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -61,7 +61,9 @@ with col_charts_left:
                 params={
                     "symbol_y": symbol_y,
                     "symbol_x": symbol_x,
-                    "window": window
+                    "window": window,
+                    # one array per column, ts in epoch ms
+                    "format": "columnar"
                 },
                 timeout=5
             )
@@ -77,7 +79,7 @@ with col_charts_left:
                 if df.empty:
                     st.info("Waiting for more data to compute analytics...")
                 else:
-                    df["ts"] = pd.to_datetime(df["ts"])
+                    df["ts"] = pd.to_datetime(df["ts"], unit="ms", utc=True)
 
                     colA, colB = st.columns(2)
 
@@ -143,14 +145,15 @@ with col_charts_left:
     try:
         resp = requests.get(
             f"{BACKEND_URL}/analytics/hedge_ratio",
-            params={"symbol_y": symbol_y, "symbol_x": symbol_x, "window": window},
+            params={"symbol_y": symbol_y, "symbol_x": symbol_x, "window": window, "format": "columnar"},
             timeout=5
         )
         resp.raise_for_status()
-        hr_df = pd.DataFrame(resp.json())
+        hr_data = resp.json()
+        hr_df = pd.DataFrame() if "error" in hr_data else pd.DataFrame(hr_data)
 
         if not hr_df.empty:
-            hr_df["ts"] = pd.to_datetime(hr_df["ts"])
+            hr_df["ts"] = pd.to_datetime(hr_df["ts"], unit="ms", utc=True)
             fig_hr = go.Figure()
             fig_hr.add_trace(go.Scatter(
                 x=hr_df["ts"], y=hr_df["hedge_ratio"], name="Hedge Ratio"
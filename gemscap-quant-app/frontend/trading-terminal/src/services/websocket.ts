@@ -52,3 +52,85 @@ export function connectMarketWS(
   connect()
   return ws!
 }
+
+/* -------------------- Analytics stream -------------------- */
+
+export interface AnalyticsPoints {
+  ts: number[]
+  spread: (number | null)[]
+  zscore: (number | null)[]
+  beta: (number | null)[]
+}
+
+export type AnalyticsMessage =
+  | { type: "snapshot"; points: AnalyticsPoints | null; alert: { triggered: boolean } }
+  | { type: "update"; points: AnalyticsPoints }
+  | { type: "alert"; ts: number; triggered: boolean; zscore: number }
+  | { type: "error"; error: string }
+
+const MAX_POINTS = 300
+
+function appendPoints(
+  current: AnalyticsPoints,
+  delta: AnalyticsPoints
+): AnalyticsPoints {
+  const keep = (a: any[], b: any[]) => a.concat(b).slice(-MAX_POINTS)
+  return {
+    ts: keep(current.ts, delta.ts),
+    spread: keep(current.spread, delta.spread),
+    zscore: keep(current.zscore, delta.zscore),
+    beta: keep(current.beta, delta.beta),
+  }
+}
+
+/**
+ * Subscribes to /ws/analytics and keeps the last MAX_POINTS points,
+ * applying each delta update as bars close. A "snapshot" replaces them
+ * (on connect, and in ols mode whenever the full-sample beta moves).
+ */
+export function connectAnalyticsWS(
+  y: string,
+  x: string,
+  window: number,
+  onPoints: (points: AnalyticsPoints) => void,
+  onAlert?: (alert: { ts: number; triggered: boolean; zscore: number }) => void,
+  hedgeMode: string = "ols",
+  options: WSOptions = { reconnect: true, reconnectDelay: 3000 }
+): WebSocket {
+  let ws: WebSocket
+  let points: AnalyticsPoints = { ts: [], spread: [], zscore: [], beta: [] }
+
+  const connect = () => {
+    ws = new WebSocket(
+      `${WS_BASE}/ws/analytics?symbol_y=${y}&symbol_x=${x}&window=${window}&hedge_mode=${hedgeMode}`
+    )
+
+    ws.onmessage = (event) => {
+      try {
+        const msg = JSON.parse(event.data) as AnalyticsMessage
+        if (msg.type === "snapshot") {
+          points = msg.points ?? { ts: [], spread: [], zscore: [], beta: [] }
+          onPoints(points)
+        } else if (msg.type === "update") {
+          points = appendPoints(points, msg.points)
+          onPoints(points)
+        } else if (msg.type === "alert") {
+          onAlert?.(msg)
+        } else {
+          console.error("[WS] Analytics error", msg.error)
+        }
+      } catch (err) {
+        console.error("[WS] Invalid message", err)
+      }
+    }
+
+    ws.onclose = () => {
+      if (options.reconnect) {
+        setTimeout(connect, options.reconnectDelay)
+      }
+    }
+  }
+
+  connect()
+  return ws!
+}
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from app.analytics.alert_engine import AlertEngine, AlertRule, QueueSink, RULE_KINDS
+from app.analytics.bars import BarStore
+from app.analytics.pair_state import PairStateRegistry
+from app.analytics.signal_quality import latest_correlation
+
+Y, X = "ethusdt", "btcusdt"
+SEC = 1_000_000_000
+T0 = 1_760_000_000 * SEC
+
+
+def feed(store, rng, start: int, bars: int, noise: float):
+    for i in range(start, start + bars):
+        x = 30_000 + 5 * i + rng.normal(0, 20)
+        store.on_tick(X, T0 + i * SEC, x, 0.1)
+        store.on_tick(Y, T0 + i * SEC, 0.05 * x + rng.normal(0, noise), 0.1)
+
+
+@pytest.mark.parametrize("window", [20, 50])
+def test_correlation_metric_matches_pandas(window):
+    store = BarStore(["1s"], capacity=1000)
+    rng = np.random.default_rng(8)
+    registry = PairStateRegistry(store, history=1000)
+    metric = RULE_KINDS["correlation"][0]
+    rule = AlertRule(1, "correlation", Y, X, window=window)
+
+    # incremental across snapshots, as the engine sees it bar by bar
+    for start, bars in ((0, 150), (150, 1), (151, 40)):
+        feed(store, rng, start, bars, noise=1.0)
+        snap = registry.snapshot(Y, X)
+        assert metric(snap, rule) == pytest.approx(latest_correlation(snap.y, snap.x, window), abs=1e-9)
+
+
+def test_correlation_rule_fires_when_the_pair_decouples():
+    store = BarStore(["1s"], capacity=1000)
+    rng = np.random.default_rng(9)
+    sink = QueueSink()
+    engine = AlertEngine(PairStateRegistry(store, history=1000), [sink])
+    engine.add_rule("correlation", Y, X, window=20, cooldown_sec=0)
+
+    feed(store, rng, 0, 100, noise=0.1)
+    assert engine.evaluate_pair((Y, X)) == []
+    # y stops tracking x
+    feed(store, rng, 100, 40, noise=200.0)
+    events = engine.evaluate_pair((Y, X))
+    assert [e["state"] for e in events] == ["triggered"]
+    assert sink.recent() == events
@@ -0,0 +1,60 @@
+import duckdb
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.storage import parquet_archive
+from app.storage.duckdb_store import insert_ticks, ticks_table
+from app.storage.parquet_archive import query_pair_bars
+
+T0 = pd.Timestamp("2025-10-09 00:00:00")
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    # hot table only: no Parquet archive under the temporary directory
+    monkeypatch.setattr(parquet_archive, "PARQUET_DIR", str(tmp_path / "parquet"))
+    conn = duckdb.connect()
+    conn.execute("""
+        CREATE TABLE ticks (symbol VARCHAR, ts TIMESTAMP, price DOUBLE, size DOUBLE, trade_id BIGINT)
+    """)
+    return conn
+
+
+def insert(conn, symbol: str, ticks: list):
+    ts = [(T0 + pd.Timedelta(seconds=sec)).value for sec, _ in ticks]
+    insert_ticks(ticks_table([symbol] * len(ticks), ts, [p for _, p in ticks],
+                             [1.0] * len(ticks), list(range(len(ticks)))), conn)
+
+
+def test_legs_starting_in_different_buckets(conn):
+    insert(conn, "y", [(0.2, 100.0), (5.2, 105.0), (7.1, 107.0)])
+    insert(conn, "x", [(2.5, 50.0), (3.1, 51.0), (6.4, 56.0), (7.9, 57.0)])
+
+    bars = query_pair_bars("y", "x", conn=conn)
+
+    # starts where both legs have traded; y carries its 00:00 close forward
+    assert bars.index[0] == T0.tz_localize("UTC") + pd.Timedelta(seconds=2)
+    assert not bars.isna().any().any()
+    # without `end` the newest (07) bucket may still be filling and is dropped
+    assert bars["y"].tolist() == [100.0, 100.0, 100.0, 105.0, 105.0]
+    assert bars["x"].tolist() == [50.0, 51.0, 51.0, 51.0, 56.0]
+    assert bars["volume"].tolist() == [0.0, 0.0, 0.0, 1.0, 0.0]
+
+
+def test_one_leg_without_ticks_gives_no_bars(conn):
+    insert(conn, "y", [(0.2, 100.0), (5.2, 105.0)])
+
+    assert query_pair_bars("y", "x", conn=conn).empty
+
+
+def test_range_starting_before_one_leg(conn):
+    insert(conn, "y", [(sec + 0.5, 100.0 + sec) for sec in range(0, 20, 3)])
+    insert(conn, "x", [(sec + 0.5, 50.0 + sec) for sec in range(10, 20)])
+
+    start = T0 + pd.Timedelta(seconds=5)
+    bars = query_pair_bars("y", "x", start, T0 + pd.Timedelta(seconds=20), conn=conn)
+
+    assert bars.index[0] == T0.tz_localize("UTC") + pd.Timedelta(seconds=10)
+    # y last traded in the 09 bucket, inside the range but before x's first trade
+    np.testing.assert_array_equal(bars["y"], 100.0 + np.arange(10, 19) // 3 * 3)
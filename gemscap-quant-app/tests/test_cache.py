@@ -0,0 +1,196 @@
+import asyncio
+import itertools
+import threading
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.cache import memory, response_cache
+from app.cache.memory import LRUCache
+from app.cache.redis_client import RedisCache
+
+_ENDPOINTS = itertools.count()
+
+
+class FakeRedis:
+    """
+    Minimal in-memory stand-in for redis.Redis (get / set with `ex` /
+    delete / ping), for testing the Redis backend without a server.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def ping(self):
+        return True
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ex=None):
+        expires = None if ex is None else time.monotonic() + ex
+        if isinstance(value, str):
+            value = value.encode()
+        with self._lock:
+            self._data[key] = (value, expires)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            return sum(self._data.pop(k, None) is not None for k in keys)
+
+    def dbsize(self):
+        return len(self._data)
+
+    def info(self, section=None):
+        return {"evicted_keys": 0}
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+def test_lru_hit_miss():
+    cache = LRUCache(max_entries=4, ttl=30)
+    assert cache.get("a") is None
+    cache.set("a", b"1")
+    assert cache.get("a") == b"1"
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2, ttl=30)
+    cache.set("a", b"1")
+    cache.set("b", b"2")
+    cache.get("a")          # b is now the least recently used
+    cache.set("c", b"3")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1" and cache.get("c") == b"3"
+    assert cache.evictions == 1
+
+
+def test_lru_ttl_expiry(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(memory.time, "monotonic", clock)
+    cache = LRUCache(max_entries=4, ttl=30)
+    cache.set("a", b"1")
+    cache.set("b", b"2", ttl=60)
+    clock.now += 31
+    assert cache.get("a") is None
+    assert cache.get("b") == b"2"
+    assert cache.expirations == 1
+
+
+def test_redis_backend_hit_miss_and_ttl(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "monotonic", clock)
+    cache = RedisCache(FakeRedis(), ttl=30)
+    assert cache.get("a") is None
+    cache.set("a", b"1")
+    assert cache.get("a") == b"1"
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.client.get("gemscap:a") == b"1"
+
+    clock.now += 31
+    assert cache.get("a") is None
+
+
+# -------------------------------
+# cached_response
+# -------------------------------
+@pytest.fixture(params=["memory", "redis"])
+def backend(request, monkeypatch):
+    cache = LRUCache(max_entries=64, ttl=30) if request.param == "memory" else RedisCache(FakeRedis(), ttl=30)
+    monkeypatch.setattr(response_cache, "CACHE", cache)
+    monkeypatch.setattr(response_cache, "LOCAL_CACHE", request.param == "memory")
+    return cache
+
+
+def make_app(handler, version):
+    """
+    One route under a fresh endpoint name (limiter semaphores are bound
+    to the event loop that first uses them).
+    """
+    app = FastAPI()
+    endpoint = f"test_{next(_ENDPOINTS)}"
+    app.get("/r")(response_cache.cached_response(endpoint, version)(handler))
+    return app
+
+
+def run(app, *requests):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            responses = await asyncio.gather(*(client.get("/r", params=p) for p in requests))
+            return [r.json() for r in responses]
+    return asyncio.run(go())
+
+
+def test_hit_then_invalidated_by_bar_seq(backend):
+    seq = {"bars": 1}
+    calls = []
+
+    def handler(window: int = 50):
+        calls.append(window)
+        return {"window": window, "seq": seq["bars"]}
+
+    app = make_app(handler, lambda **_: seq["bars"])
+
+    assert run(app, {"window": 5}) == [{"window": 5, "seq": 1}]
+    assert run(app, {"window": 5}) == [{"window": 5, "seq": 1}]
+    assert len(calls) == 1
+
+    # other parameters are other entries
+    run(app, {"window": 6})
+    assert len(calls) == 2
+
+    # a new bar makes the old entry unreachable
+    seq["bars"] = 2
+    assert run(app, {"window": 5}) == [{"window": 5, "seq": 2}]
+    assert len(calls) == 3
+
+
+def test_concurrent_misses_coalesce(backend):
+    calls = []
+    lock = threading.Lock()
+
+    def handler():
+        with lock:
+            calls.append(1)
+        time.sleep(0.2)
+        return {"value": 42}
+
+    app = make_app(handler, lambda **_: 1)
+    assert run(app, {}, {}) == [{"value": 42}, {"value": 42}]
+    assert len(calls) == 1
+
+
+def test_errors_are_not_cached(backend):
+    calls = []
+
+    def handler():
+        calls.append(1)
+        return {"error": "Not enough data yet"}
+
+    app = make_app(handler, lambda **_: 1)
+    run(app, {})
+    run(app, {})
+    assert len(calls) == 2
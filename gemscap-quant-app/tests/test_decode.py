@@ -0,0 +1,33 @@
+import pytest
+
+from app.ingestion.decode import DECODERS, DECODE_ERRORS, make_decoder
+
+TRADE = '{"stream":"btcusdt@trade","data":{"e":"trade","s":"BTCUSDT","T":1700000000000,' \
+        '"p":"30000.5","q":"0.010","t":42}}'
+
+BAD_FRAMES = [
+    b"{bad",
+    b"\xff\xfe",
+    "[1, 2]",
+    '{"data": "trade"}',
+    '{"data":{"e":"trade","T":1,"p":"1","q":"1"}}',            # no symbol
+    '{"data":{"e":"trade","s":"BTCUSDT","T":1,"p":"x","q":"1"}}',
+    '{"data":{"e":"trade","s":"BTCUSDT","T":null,"p":"1","q":"1"}}',
+]
+
+
+@pytest.mark.parametrize("backend", list(DECODERS))
+def test_decodes_trades(backend):
+    decode = make_decoder(backend)
+    assert decode(TRADE) == ("btcusdt", 1_700_000_000_000_000_000, 30000.5, 0.01, 42)
+    assert decode(TRADE.encode()) == decode(TRADE)
+    assert decode('{"stream":"btcusdt@depth","data":{"e":"depthUpdate"}}') is None
+
+
+@pytest.mark.parametrize("backend", list(DECODERS))
+@pytest.mark.parametrize("frame", BAD_FRAMES)
+def test_bad_frames_are_counted_not_raised(backend, frame):
+    decode = make_decoder(backend)
+    before = DECODE_ERRORS.labels().value
+    assert decode(frame) is None
+    assert DECODE_ERRORS.labels().value == before + 1
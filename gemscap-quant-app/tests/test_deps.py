@@ -0,0 +1,34 @@
+import pandas as pd
+
+from app.api.deps import bars_seq
+from app.config import HISTORY_SETTLE_SEC
+from app.ingestion.binance_ws import BAR_STORE
+
+SYMBOL = "tstcusdt"
+SEC = 1_000_000_000
+
+
+def close_bar(i: int):
+    BAR_STORE.on_tick(SYMBOL, (1_760_000_000 + i) * SEC, 100.0 + i, 1.0)
+
+
+def test_bars_seq_follows_live_bars_until_the_range_settles():
+    now = pd.Timestamp.now("UTC")
+    settled = (now - pd.Timedelta(seconds=HISTORY_SETTLE_SEC + 60)).isoformat()
+    recent = (now - pd.Timedelta(seconds=1)).isoformat()
+    future = str(int((now + pd.Timedelta(hours=1)).timestamp() * 1000))
+
+    close_bar(0)
+    close_bar(1)
+    before = {end: bars_seq(SYMBOL.upper(), end=end) for end in (None, recent, future)}
+    close_bar(2)
+    after = {end: bars_seq(SYMBOL.upper(), end=end) for end in (None, recent, future)}
+
+    assert all(before[end] != after[end] for end in before)
+    assert bars_seq(SYMBOL, end=settled) == "settled"
+
+
+def test_bars_seq_does_not_create_builders():
+    assert bars_seq("nosuchusdt") == 0
+    assert "nosuchusdt" not in BAR_STORE.symbols()
+    assert bars_seq(SYMBOL, end="not a time") is None
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+import numpy as np
+
+from app.analytics.bars import BarStore
+from app.analytics.pair_state import PairStateRegistry
+from app.api.hub import AnalyticsHub, Channel
+
+Y, X = "ethusdt", "btcusdt"
+SEC = 1_000_000_000
+T0 = 1_760_000_000 * SEC
+
+
+def feed(store, rng, start: int, bars: int):
+    for i in range(start, start + bars):
+        ts = T0 + i * SEC
+        x = 30_000 + rng.normal(0, 20)
+        store.on_tick(X, ts, x, 0.1)
+        store.on_tick(Y, ts, 0.05 * x + rng.normal(0, 1), 0.1)
+
+
+async def stream(hedge_mode: str) -> list:
+    rng = np.random.default_rng(5)
+    store = BarStore(["1s"], capacity=1000)
+    hub = AnalyticsHub(PairStateRegistry(store, history=1000))
+    store.add_listener(hub.on_bar)
+    feed(store, rng, 0, 120)
+
+    queue = await hub.subscribe((Y, X, 20, hedge_mode, 2.0))
+    messages = [queue.get_nowait()]
+    for i in range(3):
+        feed(store, rng, 120 + i, 1)
+        while hub._channels[(Y, X, 20, hedge_mode, 2.0)].pending or queue.empty():
+            await asyncio.sleep(0.01)
+        while not queue.empty():
+            messages.append(queue.get_nowait())
+    return [m for m in messages if m["type"] != "alert"]
+
+
+def test_rolling_mode_streams_deltas():
+    messages = asyncio.run(stream("rolling"))
+    assert messages[0]["type"] == "snapshot"
+    assert [m["type"] for m in messages[1:]] == ["update"] * 3
+    assert all(len(m["points"]["ts"]) == 1 for m in messages[1:])
+
+
+def test_ols_mode_resends_tail_when_beta_moves():
+    messages = asyncio.run(stream("ols"))
+    assert [m["type"] for m in messages] == ["snapshot"] * 4
+    # each resend is consistent: spread recomputed under one beta
+    last, prev = messages[-1]["points"], messages[-2]["points"]
+    assert last["ts"][-2] == prev["ts"][-1]
+    assert last["spread"][-2] != prev["spread"][-1]
+    assert len(set(last["beta"])) == 1
+
+
+def test_cancelled_first_subscriber_does_not_strand_others(monkeypatch):
+    compute = Channel.compute
+
+    def slow_compute(self, pair_states):
+        time.sleep(0.2)
+        return compute(self, pair_states)
+    monkeypatch.setattr(Channel, "compute", slow_compute)
+
+    async def client(hub, key):
+        # same shape as the stream endpoints
+        queue = None
+        try:
+            queue = await hub.subscribe(key)
+            await asyncio.Event().wait()
+        finally:
+            hub.unsubscribe(key, queue)
+
+    async def run():
+        store = BarStore(["1s"], capacity=1000)
+        hub = AnalyticsHub(PairStateRegistry(store, history=1000))
+        feed(store, np.random.default_rng(5), 0, 120)
+        key = (Y, X, 20, "rolling", 2.0)
+
+        # alone: cancelling it mid-build leaves no channel behind
+        first = asyncio.create_task(client(hub, key))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        assert key not in hub._channels
+
+        # with a waiter: the waiter rebuilds the channel and gets a snapshot
+        first = asyncio.create_task(client(hub, key))
+        await asyncio.sleep(0.05)
+        second = asyncio.create_task(hub.subscribe(key))
+        await asyncio.sleep(0.05)
+        first.cancel()
+        queue = await asyncio.wait_for(second, 2.0)
+        assert hub._channels[key].clients == {queue}
+        assert queue.get_nowait()["points"] is not None
+    asyncio.run(run())
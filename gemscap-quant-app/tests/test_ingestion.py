@@ -0,0 +1,57 @@
+import asyncio
+import socket
+
+import numpy as np
+
+from app.ingestion.binance_ws import MarketStream, LocalSink, TICK_BUFFER, BAR_STORE
+from app.ingestion.fake_server import FakeBinanceServer
+
+# symbols no other test feeds into the shared stores
+SYMBOLS = ["tstausdt", "tstbusdt"]
+DROP_EVERY = 7
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def run_stream(seconds: float) -> tuple[MarketStream, FakeBinanceServer]:
+    server = FakeBinanceServer(port=free_port(), rate=200, symbols=SYMBOLS,
+                               disconnect_after=60, drop_every=DROP_EVERY, seed=3)
+    await server.start()
+    stream = MarketStream(base_url=server.url, backoff_base=0.02, backoff_max=0.05,
+                          sink=LocalSink(persist=False))
+    stream.start(SYMBOLS)
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        await stream.stop()
+        await server.stop()
+    return stream, server
+
+
+def test_reconnects_and_counts_missed_trades():
+    stream, server = asyncio.run(run_stream(1.5))
+
+    assert stream.connects > 1
+    assert server.connections == stream.connects
+    assert stream.duplicates == 0
+
+    for symbol in SYMBOLS:
+        ids = TICK_BUFFER[symbol].to_frame()["trade_id"].to_numpy()
+        assert len(ids) == stream.accepted[symbol] > 0
+        assert np.all(np.diff(ids) > 0)
+
+        # every id the client never saw inside the span it covered is counted,
+        # and that includes every trade the server dropped
+        span = set(range(int(ids[0]), int(ids[-1]) + 1))
+        missing = span - set(ids.tolist())
+        dropped = {i for i in span if i % DROP_EVERY == 0}
+        assert dropped <= missing
+        assert stream.missed_trades[symbol] == len(missing)
+
+        # bars were built from the accepted ticks only
+        bars = BAR_STORE.get(symbol, "1s").frame(include_partial=True)
+        assert int(bars["count"].sum()) == len(ids)
@@ -0,0 +1,20 @@
+from app.config import SYMBOLS
+from app.ingestion.binance_ws import BAR_STORE
+from app.metrics import REGISTRY, Registry
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    counter = registry.counter("t_total", "test", ("symbol",))
+    counter.labels('a"b\nfoo\\').inc()
+
+    lines = registry.render().splitlines()
+    assert 't_total{symbol="a\\"b\\nfoo\\\\"} 1.0' in lines
+    assert not any(line.startswith("foo") for line in lines)
+
+
+def test_bar_series_cover_configured_symbols_only():
+    BAR_STORE.on_tick("tstdusdt", 1_760_000_000 * 10 ** 9, 1.0, 1.0)
+
+    lines = [line for line in REGISTRY.render().splitlines() if line.startswith("gq_bars_closed_total{")]
+    assert {line.split('"')[1] for line in lines} == set(SYMBOLS)
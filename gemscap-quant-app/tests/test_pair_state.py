@@ -0,0 +1,82 @@
+import asyncio
+
+import httpx
+import numpy as np
+from fastapi import FastAPI
+
+from app.analytics.bars import BarStore
+from app.analytics.pair_state import PairStateRegistry
+from app.api.deps import PAIR_STATES, pair_data
+from app.api.routes import router
+from app.config import MAX_WINDOW
+from app.ingestion.binance_ws import BAR_STORE
+
+Y, X = "ethusdt", "btcusdt"
+SEC = 1_000_000_000
+T0 = 1_760_000_000 * SEC
+
+
+def make_registry(bars: int = 200) -> PairStateRegistry:
+    rng = np.random.default_rng(2)
+    store = BarStore(["1s"], capacity=1000)
+    for i in range(bars):
+        x = 30_000 + rng.normal(0, 20)
+        store.on_tick(X, T0 + i * SEC, x, 0.1)
+        store.on_tick(Y, T0 + i * SEC, 0.05 * x + rng.normal(0, 1), 0.1)
+    return PairStateRegistry(store, history=1000)
+
+
+def test_rolling_engines_are_bounded_lru():
+    registry = make_registry()
+    state = registry.get(Y, X)
+    state.max_engines = 3
+    snap = state.snapshot()
+
+    for window in (10, 20, 30):
+        snap.rolling(window)
+    first = state._engines[10]
+    state.rolling(10, snap.y, snap.x)
+    state.rolling(40, snap.y, snap.x)
+
+    # 20 was least recently used; 10 was touched again and survives
+    assert list(state._engines) == [30, 10, 40]
+    assert state._engines[10] is first
+
+
+def get(path: str, **params) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(router)
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            return await client.get(path, params=params)
+    return asyncio.run(go())
+
+
+def test_window_is_validated():
+    for window in (0, -5, 1, MAX_WINDOW + 1, 10 ** 9):
+        r = get("/analytics/spread", symbol_y=Y, symbol_x=X, window=window)
+        assert r.status_code == 422, window
+
+
+def test_reads_do_not_create_bar_builders():
+    store = BarStore(["1s"], capacity=10)
+    state = PairStateRegistry(store).get("ETHUSDT", "nosuchusdt")
+
+    assert (state.symbol_y, state.symbol_x) == ("ethusdt", "nosuchusdt")
+    assert state.seq() == (0, 0)
+    assert len(state.snapshot()) == 0
+    assert store.symbols() == []
+
+
+def test_symbols_are_normalised_and_must_be_configured():
+    pair = asyncio.run(pair_data(" ETHUSDT", "BtcUsdt"))
+    assert pair.error is None
+    assert pair.state is PAIR_STATES.get("ethusdt", "btcusdt")
+
+    junk = 'a"b\nfoo'
+    r = get("/analytics/spread", symbol_y=junk, symbol_x="btcusdt")
+    assert r.status_code == 200 and "Unknown symbol" in r.json()["error"]
+    assert junk not in BAR_STORE.symbols()
+    assert not any(junk in key for key in PAIR_STATES._states)
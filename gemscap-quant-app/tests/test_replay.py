@@ -0,0 +1,123 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analytics.bars import BarStore
+from app.analytics.pair_state import PairStateRegistry
+from app.analytics.regression import hedge_ratio
+from app.ingestion.binance_ws import MarketStream
+from app.replay.player import replay_into
+from app.replay.recorder import FrameWriter, read_frames
+from app.replay.synthetic import cointegrated_frames
+from app.storage.tick_buffer import TickStore
+
+Y, X = "ethusdt", "btcusdt"
+TRADES = 4000
+WINDOW = 20
+TOL = 1e-9
+
+
+class StoreSink:
+    """
+    MarketStream sink applying ticks to private stores, so the test does
+    not share state with the process-wide ones.
+    """
+
+    def __init__(self):
+        self.ticks = TickStore()
+        self.bars = BarStore(["1s"], capacity=10_000)
+
+    def last_trade_id(self, symbol: str):
+        return self.ticks[symbol].last_trade_id() if symbol in self.ticks else None
+
+    def apply(self, symbol: str, rows: list):
+        _, ts, price, size, trade_id = zip(*rows)
+        self.ticks[symbol].extend(ts, price, size, trade_id)
+        self.bars.on_ticks(symbol, ts, price, size)
+
+
+def pandas_bars(frames: list, symbol: str) -> pd.DataFrame:
+    """
+    Closed 1s bars of `symbol` straight from the raw frames: empty buckets
+    repeat the previous close with zero volume, a bar without volume has
+    its close as vwap, and the open bucket is dropped.
+    """
+    trades = [json.loads(raw)["data"] for _, raw in frames]
+    trades = [t for t in trades if t["s"].lower() == symbol]
+    ticks = pd.DataFrame({
+        "price": [float(t["p"]) for t in trades],
+        "size": [float(t["q"]) for t in trades],
+    }, index=pd.to_datetime([t["T"] for t in trades], unit="ms", utc=True).as_unit("ns"))
+    ticks["notional"] = ticks["price"] * ticks["size"]
+
+    grouped = ticks.resample("1s")
+    close = grouped["price"].last().ffill()
+    volume = grouped["size"].sum()
+    bars = pd.DataFrame({
+        "open": grouped["price"].first().fillna(close),
+        "high": grouped["price"].max().fillna(close),
+        "low": grouped["price"].min().fillna(close),
+        "close": close,
+        "volume": volume,
+        "vwap": (grouped["notional"].sum() / volume).where(volume > 0, close),
+        "count": grouped["price"].count(),
+    })
+    return bars.iloc[:-1]
+
+
+@pytest.fixture(scope="module")
+def frames():
+    # about two trades a second, so some 1s buckets are empty and forward-filled
+    return list(cointegrated_frames(Y, X, trades=TRADES, rate=1.0, seed=11))
+
+
+def test_recording_round_trip(frames, tmp_path):
+    path = str(tmp_path / "replays" / "synth.jsonl.gz")
+    with FrameWriter(path) as writer:
+        for recv_ns, raw in frames:
+            writer.write(raw, recv_ns)
+        writer.write(raw.encode(), recv_ns)
+
+    assert writer.frames == TRADES + 1
+    assert list(read_frames(path)) == frames + [frames[-1]]
+
+
+def test_replay_matches_pandas(frames, tmp_path):
+    path = str(tmp_path / "synth.jsonl.gz")
+    with FrameWriter(path) as writer:
+        for recv_ns, raw in frames:
+            writer.write(raw, recv_ns)
+
+    sink = StoreSink()
+    stream = MarketStream(sink=sink)
+    result = replay_into(stream, read_frames(path), batch=64)
+
+    assert result["frames"] == result["accepted"] == TRADES
+    assert stream.missed_trades == {} and stream.duplicates == 0
+
+    for symbol in (Y, X):
+        got = sink.bars.get(symbol, "1s").frame()
+        want = pandas_bars(frames, symbol)
+        assert (want["count"] == 0).any()
+        assert got.index.equals(want.index)
+        for col in want:
+            np.testing.assert_allclose(got[col], want[col], rtol=TOL, err_msg=col)
+
+    # spread and z-score from the app's pair snapshot against pandas on the same ticks
+    snap = PairStateRegistry(sink.bars, history=10_000).snapshot(Y, X)
+    y, x = pandas_bars(frames, Y)["close"], pandas_bars(frames, X)["close"]
+    common = y.index.intersection(x.index)
+    y, x = y.loc[common], x.loc[common]
+
+    beta = hedge_ratio(x, y)
+    spread = y - beta * x
+    z = ((spread - spread.rolling(WINDOW).mean()) / spread.rolling(WINDOW).std()).dropna()
+
+    assert len(snap) == len(common)
+    assert snap.beta == pytest.approx(beta, rel=TOL)
+    pd.testing.assert_series_equal(snap.spread, spread, check_names=False,
+                                   check_freq=False, rtol=TOL)
+    pd.testing.assert_series_equal(snap.zscore(WINDOW), z, check_names=False,
+                                   check_freq=False, rtol=1e-6)
@@ -0,0 +1,103 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.analytics.correlation import rolling_corr
+from app.analytics.regression import rolling_hedge_ratio
+from app.analytics.rolling import RollingPairStats
+from app.analytics.zscore import zscore
+
+WINDOW = 50
+TOL = 1e-6
+
+
+def cointegrated_pair(n: int, seed: int = 7):
+    """
+    x a random walk at BTC-like price levels, y = 1.3 x + 250 + OU noise,
+    so the engine's first-observation shift does real work.
+    """
+    rng = np.random.default_rng(seed)
+    x = 30_000 + np.cumsum(rng.normal(0, 5, n))
+    resid = np.zeros(n)
+    for i in range(1, n):
+        resid[i] = 0.95 * resid[i - 1] + rng.normal(0, 3)
+    y = 1.3 * x + 250 + resid
+    index = pd.date_range("2025-01-01", periods=n, freq="1s", tz="UTC")
+    return pd.Series(y, index=index), pd.Series(x, index=index)
+
+
+@pytest.fixture(scope="module")
+def fed():
+    # ten window wrap-arounds, each one rebuilding the running sums
+    y, x = cointegrated_pair(10 * WINDOW + 7)
+    engine = RollingPairStats(WINDOW, history=len(y))
+    for ts, yv, xv in zip(y.index.as_unit("ns").asi8, y.values, x.values):
+        engine.update(float(yv), float(xv), int(ts))
+    return engine, y, x
+
+
+def test_series_match_pandas(fed):
+    engine, y, x = fed
+    got = engine.series()
+
+    expected_z = zscore(y, WINDOW)
+    expected_corr = rolling_corr(y, x, WINDOW).dropna()
+    expected_beta = rolling_hedge_ratio(x, y, WINDOW).dropna()
+
+    assert got.index.equals(expected_z.index)
+    np.testing.assert_allclose(got["zscore"], expected_z, rtol=0, atol=TOL)
+    np.testing.assert_allclose(got["corr"], expected_corr.loc[got.index], rtol=0, atol=TOL)
+    np.testing.assert_allclose(got["beta"], expected_beta.loc[got.index], rtol=0, atol=TOL)
+
+
+def test_latest_values_match_pandas(fed):
+    engine, y, x = fed
+    assert engine.zscore() == pytest.approx(zscore(y, WINDOW).iloc[-1], abs=TOL)
+    assert engine.corr() == pytest.approx(rolling_corr(y, x, WINDOW).iloc[-1], abs=TOL)
+    assert engine.beta() == pytest.approx(rolling_hedge_ratio(x, y, WINDOW).iloc[-1], abs=TOL)
+
+
+def test_spread_zscore_matches_pandas(fed):
+    engine, y, x = fed
+    beta = 1.3
+    expected = zscore(y - beta * x, WINDOW)
+    got = engine.spread_zscore_series(beta)
+    np.testing.assert_allclose(got, expected.loc[got.index], rtol=0, atol=TOL)
+
+
+def test_not_ready_before_a_full_window():
+    y, x = cointegrated_pair(WINDOW - 1)
+    engine = RollingPairStats(WINDOW)
+    engine.feed(y, x)
+    assert not engine.ready
+    assert engine.zscore() is None and engine.beta() is None
+    assert len(engine.series()) == 0
+
+
+def test_feed_is_incremental(fed):
+    engine, y, x = fed
+    split = RollingPairStats(WINDOW, history=len(y))
+    split.feed(y.iloc[:123], x.iloc[:123])
+    # overlapping rows are skipped, only newer ones are pushed
+    split.feed(y.iloc[:400], x.iloc[:400])
+    split.feed(y, x)
+    pd.testing.assert_frame_equal(split.series(), engine.series())
+
+
+def test_non_finite_rows_are_skipped():
+    y, x = cointegrated_pair(300, seed=4)
+    bad = [10, 11, 150, 299]
+    y_bad, x_bad = y.copy(), x.copy()
+    y_bad.iloc[bad[:2]] = np.nan
+    x_bad.iloc[bad[2]] = np.inf
+    y_bad.iloc[bad[3]] = np.nan
+
+    clean = RollingPairStats(WINDOW, history=300)
+    clean.feed(y.drop(y.index[bad]), x.drop(x.index[bad]))
+    dirty = RollingPairStats(WINDOW, history=300)
+    dirty.feed(y_bad.iloc[:200], x_bad.iloc[:200])
+    dirty.feed(y_bad, x_bad)
+
+    assert np.isfinite(dirty.series().to_numpy()).all()
+    pd.testing.assert_frame_equal(dirty.series(), clean.series())
+    assert dirty.last_ts == y.index[-1].value
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from statsmodels.tsa.adfvalues import mackinnonp
+from statsmodels.tsa.stattools import adfuller
+
+from app.analytics import stationarity
+from app.analytics.stationarity import adf, mackinnon_p
+
+STATS = np.linspace(-8, 3, 45)
+
+
+@pytest.mark.parametrize("regression,n", [("c", 1), ("ct", 1), ("c", 2)])
+def test_batched_p_values_match_mackinnonp(regression, n):
+    expected = [mackinnonp(s, regression, n) for s in STATS]
+    np.testing.assert_allclose(mackinnon_p(STATS, regression, n), expected, rtol=0, atol=1e-12)
+
+
+def test_falls_back_without_private_tables(monkeypatch):
+    monkeypatch.setattr(stationarity, "_tau_maxs", None)
+    expected = [mackinnonp(s, "c", 2) for s in STATS]
+    np.testing.assert_allclose(mackinnon_p(STATS, "c", 2), expected, rtol=0, atol=1e-12)
+    assert mackinnon_p(-3.0) == pytest.approx(mackinnonp(-3.0))
+
+
+@pytest.mark.filterwarnings("ignore::FutureWarning")
+def test_adf_matches_adfuller():
+    rng = np.random.default_rng(11)
+    e = rng.normal(size=1500)
+    y = np.zeros_like(e)
+    for i in range(1, len(e)):
+        y[i] = 0.97 * y[i - 1] + e[i]
+
+    stat, p, lag, *_ = adfuller(y, autolag="AIC")
+    result = adf(y)
+    assert result["lag"] == lag
+    assert result["adf_stat"] == pytest.approx(stat, abs=1e-8)
+    assert result["p_value"] == pytest.approx(p, abs=1e-8)
@@ -0,0 +1,77 @@
+import asyncio
+
+import httpx
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+
+from app.analytics.sweep import parse_grid, run_sweep, SORT_FIELDS
+from app.api.routes import router
+
+
+@pytest.fixture(scope="module")
+def pair():
+    rng = np.random.default_rng(3)
+    n = 2000
+    x = 100 + np.cumsum(rng.normal(0, 0.2, n))
+    resid = np.zeros(n)
+    for i in range(1, n):
+        resid[i] = 0.9 * resid[i - 1] + rng.normal(0, 0.3)
+    index = pd.date_range("2025-01-01", periods=n, freq="1s", tz="UTC")
+    return pd.Series(1.5 * x + resid, index=index), pd.Series(x, index=index)
+
+
+@pytest.mark.parametrize("sort_by", list(SORT_FIELDS))
+def test_rows_ranked_best_first(pair, sort_by):
+    y, x = pair
+    rows = run_sweep(y, x, [20, 50], [1.5, 2.0, 2.5], [0.0, 0.5],
+                     max_workers=1, sort_by=sort_by)["results"]
+    values = [r[sort_by] for r in rows]
+    expected = sorted(values, reverse=SORT_FIELDS[sort_by])
+    assert values == expected
+    if sort_by == "max_drawdown":
+        assert values[0] == min(values)
+
+
+def test_unknown_sort_key_rejected(pair):
+    y, x = pair
+    with pytest.raises(ValueError):
+        run_sweep(y, x, [20], [2.0], [0.0], max_workers=1, sort_by="nope")
+
+
+def test_parse_grid():
+    assert parse_grid("20,50,100", int) == [20, 50, 100]
+    assert parse_grid("1.5:3:0.5") == [1.5, 2.0, 2.5, 3.0]
+    assert parse_grid("3:1:1") == []
+    for value in ("10:50:0", "10:50:-5"):
+        with pytest.raises(ValueError, match="step"):
+            parse_grid(value, int)
+    with pytest.raises(ValueError, match="max 100"):
+        parse_grid("1:1000000:1", int, limit=100)
+
+
+def sweep(**params) -> httpx.Response:
+    app = FastAPI()
+    app.include_router(router)
+
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            return await client.get("/analytics/backtest/sweep", params={
+                "symbol_y": "ethusdt", "symbol_x": "btcusdt", **params
+            })
+    return asyncio.run(go())
+
+
+@pytest.mark.parametrize("params, message", [
+    ({"sort_by": "nope"}, "sort_by"),
+    ({"windows": "10:50:0"}, "step"),
+    ({"windows": "1:1000000:1"}, "max"),
+    ({"windows": "1,20"}, "windows must be"),
+    ({"windows": "2:200:1", "entry_z": "1:3:0.1"}, "combinations"),
+])
+def test_sweep_route_rejects_bad_grids(params, message):
+    r = sweep(**params)
+    assert r.status_code == 200
+    assert message in r.json()["error"]
@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from app.storage import writer as writer_module
+from app.storage.writer import TickWriter
+
+
+def rows(n: int, start: int = 0) -> list:
+    return [("btcusdt", i, 30_000.0, 0.1, i) for i in range(start, start + n)]
+
+
+def test_queue_bound_counts_ticks_not_batches():
+    writer = TickWriter(max_queue=10)
+
+    assert writer.submit_many(rows(4))
+    assert writer.submit_many(rows(4, 4))
+    # two queue items, but a third batch of 4 would hold 12 ticks
+    assert not writer.submit_many(rows(4, 8))
+    assert writer.submit("btcusdt", 8, 30_000.0, 0.1, 8)
+
+    stats = writer.stats()
+    assert stats["queue_depth"] == 9
+    assert stats["queue_capacity"] == 10
+    assert stats["high_watermark"] == 9
+    assert stats["dropped"] == 4
+
+
+def test_depth_drains_with_the_writer_thread(monkeypatch):
+    written = []
+    monkeypatch.setattr(writer_module, "init_db", lambda: None)
+    monkeypatch.setattr(writer_module, "get_conn", lambda: SimpleNamespace(cursor=lambda: None))
+    monkeypatch.setattr(writer_module, "ticks_table", lambda *cols: list(zip(*cols)))
+    monkeypatch.setattr(writer_module, "insert_ticks", lambda table, cursor: written.extend(table))
+
+    writer = TickWriter(max_queue=100, batch_size=10, flush_interval=0.05)
+    for i in range(0, 60, 6):
+        writer.submit_many(rows(6, i))
+    assert writer.queue_depth == 60
+
+    writer.start()
+    writer.stop()
+
+    assert writer.queue_depth == 0
+    assert writer.rows_written == len(written) == 60
+    assert [r[4] for r in written] == list(range(60))
+    # room again for a full queue's worth
+    assert writer.submit_many(rows(100))